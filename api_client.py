@@ -1,8 +1,47 @@
 import requests
 import yaml
 import logging
+import copy
+import os
+import time
 from typing import Dict, Any, Optional
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from utils.retry import RetryPolicy, CircuitBreaker
+from utils.http_cache import HTTPCache
+
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+# 按(connections, maxsize)缓存的连接池适配器
+_pool_adapters: Dict[tuple, HTTPAdapter] = {}
+
+# 按绝对路径缓存的配置文件内容：路径 -> (mtime, 配置)
+_config_cache: Dict[str, tuple] = {}
+
+
+class NotFoundError(Exception):
+    """API返回资源不存在（错误码404）"""
+
+
+def _get_pool_adapter(pool_connections: int, pool_maxsize: int) -> HTTPAdapter:
+    """获取进程内共享的连接池适配器"""
+    key = (pool_connections, pool_maxsize)
+    adapter = _pool_adapters.get(key)
+    if adapter is None:
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        _pool_adapters[key] = adapter
+    return adapter
+
+
+def _is_connect_failure(error: requests.exceptions.RequestException) -> bool:
+    """判断异常是否发生在建立连接阶段（请求尚未发出）"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
 
 
 class APIClient:
@@ -14,12 +53,24 @@ class APIClient:
         self.session = requests.Session()
         self._setup_session()
         self._setup_logging()
+        self.cache = HTTPCache.from_config(self.config.get('cache'))
     
     def _load_config(self, config_path: str) -> Dict[str, Any]:
-        """加载配置文件"""
+        """加载配置文件
+
+        同一进程内（守护进程、交互式shell等）按文件修改时间缓存解析结果，
+        每个客户端拿到独立的副本。
+        """
         try:
+            abs_path = os.path.abspath(config_path)
+            mtime = os.stat(abs_path).st_mtime_ns
+            cached = _config_cache.get(abs_path)
+            if cached and cached[0] == mtime:
+                return copy.deepcopy(cached[1])
             with open(config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                config = yaml.safe_load(f)
+            _config_cache[abs_path] = (mtime, config)
+            return copy.deepcopy(config)
         except FileNotFoundError:
             # 如果配置文件不存在，创建默认配置
             default_config = {
@@ -49,17 +100,42 @@ class APIClient:
         base_url = api_config.get('base_url', 'http://localhost:9380')
         timeout = api_config.get('timeout', 30)
         headers = api_config.get('headers', {})
+        pool_config = api_config.get('pool', {}) or {}
         
+        # 连接池适配器在进程内按配置共享，同一进程中的多个客户端复用TCP连接
+        self._pool_connections = pool_config.get('connections', DEFAULT_POOL_CONNECTIONS)
+        self._pool_maxsize = pool_config.get('maxsize', DEFAULT_POOL_MAXSIZE)
+        self._mount_pool(_get_pool_adapter(self._pool_connections, self._pool_maxsize))
+        if not pool_config.get('keep_alive', True):
+            self.session.headers['Connection'] = 'close'
+        
+        # requests自带的默认头（User-Agent、Accept-Encoding等）随每个请求发送
+        self._base_headers = set(self.session.headers.keys())
         self.session.headers.update(headers)
+        self.timeout = timeout
         self.session.timeout = timeout
         self.base_url = base_url.rstrip('/')
         
+        # 重试策略与熔断器
+        self.retry_policy = RetryPolicy.from_config(api_config.get('retry'))
+        self.circuit_breaker = CircuitBreaker.from_config(self.base_url, api_config.get('circuit_breaker'))
+        
         # 添加认证头（如果配置中有）
         auth_token = api_config.get('auth_token')
         if auth_token:
             # Flask-Login期望直接的token，不是Bearer格式
             self.session.headers['Authorization'] = auth_token
     
+    def _mount_pool(self, adapter: HTTPAdapter):
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def ensure_pool_size(self, size: int):
+        """确保连接池至少能容纳size个并发连接（多线程共用一个客户端时调用）"""
+        if size > self._pool_maxsize:
+            self._pool_maxsize = size
+            self._mount_pool(_get_pool_adapter(self._pool_connections, size))
+    
     def _setup_logging(self):
         """设置日志"""
         log_config = self.config.get('logging', {})
@@ -73,67 +149,134 @@ class APIClient:
         """处理API响应"""
         try:
             data = response.json()
-            
-            # 检查API错误码
-            if isinstance(data, dict):
-                code = data.get('code')
-                message = data.get('message', '')
-                
-                if code == 100:  # 错误码
-                    raise Exception(f"API错误: {message}")
-                elif code == 401:  # 未认证
-                    raise Exception(f"认证失败: {message}")
-                elif code == 403:  # 权限不足
-                    raise Exception(f"权限不足: {message}")
-                elif code == 404:  # 资源不存在
-                    raise Exception(f"资源不存在: {message}")
-            
-            return data
         except ValueError:
             # 如果不是JSON格式，返回文本内容
             return {"text": response.text}
+        return self._check_api_error(data)
     
-    def get(self, endpoint: str, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> Dict[str, Any]:
-        """发送GET请求"""
+    def _check_api_error(self, data: Any) -> Any:
+        """检查API错误码"""
+        if isinstance(data, dict):
+            code = data.get('code')
+            message = data.get('message', '')
+            
+            if code == 100:  # 错误码
+                raise Exception(f"API错误: {message}")
+            elif code == 401:  # 未认证
+                raise Exception(f"认证失败: {message}")
+            elif code == 403:  # 权限不足
+                raise Exception(f"权限不足: {message}")
+            elif code == 404:  # 资源不存在
+                raise NotFoundError(f"资源不存在: {message}")
+        
+        return data
+    
+    def _build_headers(self, headers: Optional[Dict] = None) -> Dict[str, Any]:
+        """构建单次请求的请求头
+
+        只继承会话中的Authorization，config.yaml中的默认头（如Content-Type）
+        不会被带上，避免破坏multipart上传；值为None的头会被requests移除。
+        """
+        request_headers = {}
+        for name in self.session.headers:
+            if name not in self._base_headers:
+                request_headers[name] = None
+        if 'Authorization' in self.session.headers:
+            request_headers['Authorization'] = self.session.headers['Authorization']
+
+        # 如果提供了自定义headers，则覆盖默认的
+        if headers:
+            request_headers.update(headers)
+        return request_headers
+
+    def _request(self, method: str, endpoint: str, headers: Optional[Dict] = None,
+                 idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+        """通过连接池会话发送请求，按重试策略重试并更新熔断器状态"""
         url = f"{self.base_url}{endpoint}"
-        self.logger.info(f"GET {url}")
+        safe = self.retry_policy.is_idempotent(method, endpoint, idempotent)
+        attempt = 0
         
+        while True:
+            attempt += 1
+            self.circuit_breaker.before_request()
+            self.logger.info(f"{method} {url}")
+            try:
+                response = self.session.request(method, url, headers=self._build_headers(headers),
+                                                timeout=self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.circuit_breaker.record_failure()
+                # 连接建立失败时请求尚未发出，任何方法都可以重试
+                retryable = safe or _is_connect_failure(e)
+                if not retryable or attempt >= self.retry_policy.max_attempts:
+                    raise
+                delay = self.retry_policy.compute_delay(attempt)
+                self.logger.warning(f"{method} {url} 失败: {e}，{delay:.1f}秒后第{attempt + 1}次尝试")
+            else:
+                # 502/503/504 表示网关或服务不可用，计入熔断
+                if response.status_code >= 502:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+                if (not self.retry_policy.should_retry_status(response.status_code, safe)
+                        or attempt >= self.retry_policy.max_attempts):
+                    response.raise_for_status()
+                    # 写操作之后使相关路径的GET缓存失效
+                    if self.cache and (method in ('PUT', 'DELETE') or (method == 'POST' and not safe)):
+                        self.cache.invalidate(url)
+                    return response
+                retry_after = self.retry_policy.parse_retry_after(response.headers.get('Retry-After'))
+                delay = self.retry_policy.compute_delay(attempt, retry_after)
+                self.logger.warning(f"{method} {url} 返回 {response.status_code}，{delay:.1f}秒后第{attempt + 1}次尝试")
+            time.sleep(delay)
+    
+    def get(self, endpoint: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            use_cache: bool = True) -> Dict[str, Any]:
+        """发送GET请求
+
+        端点在 cache.ttls 中配置了缓存时间时，优先返回磁盘缓存中的响应。
+        """
         try:
-            # 对于GET请求，只设置Authorization头，不设置Content-Type
-            request_headers = {}
-            if 'Authorization' in self.session.headers:
-                request_headers['Authorization'] = self.session.headers['Authorization']
-            
-            # 如果提供了自定义headers，则覆盖默认的
-            if headers:
-                request_headers.update(headers)
-            
-            # 使用requests.get而不是session.get，避免继承session的默认头
-            response = requests.get(url, params=params, headers=request_headers, timeout=self.session.timeout)
-            response.raise_for_status()
+            ttl = self.cache.ttl_for(endpoint) if (self.cache and use_cache) else None
+            if ttl is not None:
+                return self._cached_get(endpoint, params, headers, ttl)
+            response = self._request('GET', endpoint, headers=headers, params=params)
             return self._handle_response(response)
         except requests.exceptions.RequestException as e:
             self.logger.error(f"GET请求失败: {e}")
             raise
     
-    def post(self, endpoint: str, data: Optional[Dict] = None, json_data: Optional[Dict] = None, files: Optional[Dict] = None, headers: Optional[Dict] = None) -> Dict[str, Any]:
-        """发送POST请求"""
+    def _cached_get(self, endpoint: str, params: Optional[Dict], headers: Optional[Dict], ttl: float) -> Dict[str, Any]:
+        """带缓存的GET请求，过期条目通过ETag重新验证"""
         url = f"{self.base_url}{endpoint}"
-        self.logger.info(f"POST {url}")
+        key = self.cache.make_key(url, params, self._build_headers(headers).get('Authorization'))
+        entry = self.cache.lookup(key)
+        if entry and self.cache.is_fresh(entry):
+            self.logger.info(f"GET {url} (缓存命中)")
+            return entry['data']
+        
+        request_headers = dict(headers or {})
+        if entry and entry.get('etag'):
+            request_headers['If-None-Match'] = entry['etag']
+        response = self._request('GET', endpoint, headers=request_headers, params=params)
+        if response.status_code == 304 and entry:
+            self.cache.refresh(key, entry, ttl)
+            return entry['data']
         
+        data = self._handle_response(response)
+        # 只缓存成功的响应
+        if not isinstance(data, dict) or data.get('code', 0) == 0:
+            self.cache.store(key, data, ttl, response.headers.get('ETag'))
+        return data
+    
+    def post(self, endpoint: str, data: Optional[Dict] = None, json_data: Optional[Dict] = None, files: Optional[Dict] = None, headers: Optional[Dict] = None,
+             idempotent: Optional[bool] = None) -> Dict[str, Any]:
+        """发送POST请求
+
+        idempotent 显式声明该POST是否可以安全重试，默认按 api.retry.idempotent_post 判断。
+        """
         try:
-            # 构建请求头
-            request_headers = {}
-            if 'Authorization' in self.session.headers:
-                request_headers['Authorization'] = self.session.headers['Authorization']
-            
-            # 如果提供了自定义headers，则覆盖默认的
-            if headers:
-                request_headers.update(headers)
-            
-            # 使用requests.post而不是session.post，避免继承session的默认头
-            response = requests.post(url, data=data, json=json_data, files=files, headers=request_headers, timeout=self.session.timeout)
-            response.raise_for_status()
+            response = self._request('POST', endpoint, headers=headers, idempotent=idempotent,
+                                     data=data, json=json_data, files=files)
             
             # 检查响应头中是否有Authorization
             auth_header = response.headers.get('Authorization')
@@ -148,45 +291,17 @@ class APIClient:
     
     def put(self, endpoint: str, data: Optional[Dict] = None, json_data: Optional[Dict] = None, headers: Optional[Dict] = None) -> Dict[str, Any]:
         """发送PUT请求"""
-        url = f"{self.base_url}{endpoint}"
-        self.logger.info(f"PUT {url}")
-        
         try:
-            # 构建请求头
-            request_headers = {}
-            if 'Authorization' in self.session.headers:
-                request_headers['Authorization'] = self.session.headers['Authorization']
-            
-            # 如果提供了自定义headers，则覆盖默认的
-            if headers:
-                request_headers.update(headers)
-            
-            # 使用requests.put而不是session.put，避免继承session的默认头
-            response = requests.put(url, data=data, json=json_data, headers=request_headers, timeout=self.session.timeout)
-            response.raise_for_status()
+            response = self._request('PUT', endpoint, headers=headers, data=data, json=json_data)
             return self._handle_response(response)
         except requests.exceptions.RequestException as e:
             self.logger.error(f"PUT请求失败: {e}")
             raise
     
-    def delete(self, endpoint: str, headers: Optional[Dict] = None) -> Dict[str, Any]:
+    def delete(self, endpoint: str, json_data: Optional[Dict] = None, headers: Optional[Dict] = None) -> Dict[str, Any]:
         """发送DELETE请求"""
-        url = f"{self.base_url}{endpoint}"
-        self.logger.info(f"DELETE {url}")
-        
         try:
-            # 构建请求头
-            request_headers = {}
-            if 'Authorization' in self.session.headers:
-                request_headers['Authorization'] = self.session.headers['Authorization']
-            
-            # 如果提供了自定义headers，则覆盖默认的
-            if headers:
-                request_headers.update(headers)
-            
-            # 使用requests.delete而不是session.delete，避免继承session的默认头
-            response = requests.delete(url, headers=request_headers, timeout=self.session.timeout)
-            response.raise_for_status()
+            response = self._request('DELETE', endpoint, headers=headers, json=json_data)
             return self._handle_response(response) if response.content else {}
         except requests.exceptions.RequestException as e:
             self.logger.error(f"DELETE请求失败: {e}")
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+from typing import Dict, Any, Optional
+
+import aiohttp
+
+from api_client import APIClient
+
+
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+class AsyncAPIClient:
+    """异步API客户端
+
+    包装一个同步的APIClient（``self.client``），沿用它的配置、重试策略、熔断器、
+    错误码语义和认证头：认证头保存在 ``self.client.session.headers`` 中，
+    ``_ensure_token`` 等现有的令牌切换逻辑对 ``self.client`` 直接生效，传入已有的
+    客户端时两者共享认证状态。端点方法 get/post/put/delete 均为协程。每个
+    客户端持有一个信号量，限制同时在途的请求数量。
+
+    用法:
+        async with AsyncAPIClient(max_concurrency=32) as client:
+            results = await asyncio.gather(*(client.get(ep) for ep in endpoints))
+    """
+    
+    def __init__(self, config_path: str = "config.yaml", max_concurrency: Optional[int] = None,
+                 client: Optional[APIClient] = None):
+        self.client = client or APIClient(config_path)
+        self.config = self.client.config
+        self.base_url = self.client.base_url
+        self.timeout = self.client.timeout
+        self.retry_policy = self.client.retry_policy
+        self.circuit_breaker = self.client.circuit_breaker
+        self.logger = self.client.logger
+        api_config = self.config.get('api', {})
+        self.max_concurrency = max_concurrency or api_config.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._http: Optional[aiohttp.ClientSession] = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    def _get_http(self) -> aiohttp.ClientSession:
+        """惰性创建aiohttp会话（必须在事件循环中调用）"""
+        if self._http is None or self._http.closed:
+            pool_config = self.config.get('api', {}).get('pool', {}) or {}
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             force_close=not pool_config.get('keep_alive', True))
+            self._http = aiohttp.ClientSession(connector=connector,
+                                               timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._http
+    
+    async def close(self):
+        """关闭aiohttp会话"""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+    
+    def _build_async_headers(self, headers: Optional[Dict] = None) -> Dict[str, str]:
+        """构建请求头，去掉用于屏蔽requests会话默认头的None值"""
+        return {k: v for k, v in self.client._build_headers(headers).items() if v is not None}
+    
+    @staticmethod
+    def _build_form(data: Optional[Dict], files: Optional[Dict]) -> aiohttp.FormData:
+        """将requests风格的data/files参数转换为multipart表单"""
+        form = aiohttp.FormData()
+        for key, value in (data or {}).items():
+            form.add_field(key, str(value))
+        for key, value in files.items():
+            if isinstance(value, tuple):
+                filename, fileobj = value[0], value[1]
+                content_type = value[2] if len(value) > 2 else None
+            else:
+                fileobj = value
+                filename = os.path.basename(getattr(value, 'name', key))
+                content_type = None
+            form.add_field(key, fileobj, filename=filename, content_type=content_type)
+        return form
+    
+    @staticmethod
+    def _resendable(files: Dict) -> bool:
+        """multipart表单能否重发：aiohttp发送后会关闭文件对象，只有内容为bytes/str的表单可以重建"""
+        return all(isinstance(value[1] if isinstance(value, tuple) else value, (bytes, str))
+                   for value in files.values())
+    
+    async def _breaker(self, action: str):
+        """在线程中执行熔断器操作，其状态文件读写不阻塞事件循环"""
+        await asyncio.to_thread(getattr(self.circuit_breaker, action))
+    
+    async def _request(self, method: str, endpoint: str, headers: Optional[Dict] = None,
+                       idempotent: Optional[bool] = None, files: Optional[Dict] = None, **kwargs):
+        """发送请求并返回 (响应头, 响应文本)，重试与熔断语义与APIClient一致
+
+        files 不为空时，每次尝试都用 data/files 重新构建multipart表单（aiohttp的
+        FormData只能发送一次）；表单中有文件对象时无法重建，请求不重试。
+        """
+        url = f"{self.base_url}{endpoint}"
+        safe = self.retry_policy.is_idempotent(method, endpoint, idempotent)
+        max_attempts = self.retry_policy.max_attempts if not files or self._resendable(files) else 1
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._breaker('before_request')
+            self.logger.info(f"{method} {url}")
+            request_kwargs = dict(kwargs, data=self._build_form(kwargs.get('data'), files)) if files else kwargs
+            try:
+                async with self._semaphore:
+                    async with self._get_http().request(method, url, headers=self._build_async_headers(headers),
+                                                        **request_kwargs) as response:
+                        status = response.status
+                        retryable_status = self.retry_policy.should_retry_status(status, safe)
+                        if not retryable_status or attempt >= max_attempts:
+                            await self._breaker('record_failure' if status >= 502 else 'record_success')
+                            response.raise_for_status()
+                            return response.headers, await response.text()
+                        retry_after = self.retry_policy.parse_retry_after(response.headers.get('Retry-After'))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                await self._breaker('record_failure')
+                # 连接建立失败时请求尚未发出，任何方法都可以重试
+                retryable = safe or isinstance(e, aiohttp.ClientConnectorError)
+                if not retryable or attempt >= max_attempts:
+                    raise
+                delay = self.retry_policy.compute_delay(attempt)
+                self.logger.warning(f"{method} {url} 失败: {e}，{delay:.1f}秒后第{attempt + 1}次尝试")
+            else:
+                await self._breaker('record_failure' if status >= 502 else 'record_success')
+                delay = self.retry_policy.compute_delay(attempt, retry_after)
+                self.logger.warning(f"{method} {url} 返回 {status}，{delay:.1f}秒后第{attempt + 1}次尝试")
+            await asyncio.sleep(delay)
+    
+    def _handle_text(self, text: str) -> Dict[str, Any]:
+        """处理API响应文本，语义与APIClient._handle_response一致"""
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return {"text": text}
+        return self.client._check_api_error(data)
+    
+    async def get(self, endpoint: str, params: Optional[Dict] = None, headers: Optional[Dict] = None) -> Dict[str, Any]:
+        """发送GET请求"""
+        try:
+            _, text = await self._request('GET', endpoint, headers=headers, params=params)
+            return self._handle_text(text)
+        except aiohttp.ClientError as e:
+            self.logger.error(f"GET请求失败: {e}")
+            raise
+    
+    async def post(self, endpoint: str, data: Optional[Dict] = None, json_data: Optional[Dict] = None, files: Optional[Dict] = None, headers: Optional[Dict] = None,
+                   idempotent: Optional[bool] = None) -> Dict[str, Any]:
+        """发送POST请求"""
+        try:
+            if files:
+                response_headers, text = await self._request('POST', endpoint, headers=headers, idempotent=idempotent,
+                                                              data=data, files=files)
+            else:
+                response_headers, text = await self._request('POST', endpoint, headers=headers, idempotent=idempotent,
+                                                              data=data, json=json_data)
+            
+            # 检查响应头中是否有Authorization
+            auth_header = response_headers.get('Authorization')
+            if auth_header:
+                self.client.session.headers['Authorization'] = auth_header
+                self.logger.info("从响应头获取认证令牌")
+            
+            return self._handle_text(text)
+        except aiohttp.ClientError as e:
+            self.logger.error(f"POST请求失败: {e}")
+            raise
+    
+    async def put(self, endpoint: str, data: Optional[Dict] = None, json_data: Optional[Dict] = None, headers: Optional[Dict] = None) -> Dict[str, Any]:
+        """发送PUT请求"""
+        try:
+            _, text = await self._request('PUT', endpoint, headers=headers, data=data, json=json_data)
+            return self._handle_text(text)
+        except aiohttp.ClientError as e:
+            self.logger.error(f"PUT请求失败: {e}")
+            raise
+    
+    async def delete(self, endpoint: str, json_data: Optional[Dict] = None, headers: Optional[Dict] = None) -> Dict[str, Any]:
+        """发送DELETE请求"""
+        try:
+            _, text = await self._request('DELETE', endpoint, headers=headers, json=json_data)
+            return self._handle_text(text) if text else {}
+        except aiohttp.ClientError as e:
+            self.logger.error(f"DELETE请求失败: {e}")
+            raise
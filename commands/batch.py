@@ -0,0 +1,139 @@
+import click
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from utils.cli_runner import OutputCapture, split_command_line
+
+
+@click.group()
+def batch():
+    """批量执行命令"""
+    pass
+
+
+def _load_commands(file_path: str) -> List[Dict[str, Any]]:
+    """读取命令文件
+
+    支持两种格式（可混用）：
+    - 每行一条CLI命令，如 `documents upload <dataset_id> --file a.txt`，`#` 开头为注释
+    - JSONL，每行 `{"args": [...]}` 或 `{"command": "..."}`
+    """
+    commands = []
+    with click.open_file(file_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            text = line.strip()
+            if not text or text.startswith('#'):
+                continue
+            if text.startswith('{'):
+                entry = json.loads(text)
+                args = entry.get('args')
+                if args is None:
+                    args = split_command_line(entry.get('command', ''))
+                command = entry.get('command') or ' '.join(args)
+            else:
+                args = split_command_line(text)
+                command = text
+            if args:
+                commands.append({'line': line_no, 'command': command, 'args': [str(a) for a in args]})
+    return commands
+
+
+@batch.command()
+@click.argument('file_path')
+@click.option('--jobs', '-j', type=int, default=1, help='并行执行的命令数')
+@click.option('--continue-on-error', is_flag=True, help='某条命令失败后继续执行后续命令')
+@click.option('--log', 'log_file', help='结果日志文件（JSONL，每条命令的状态和耗时）')
+@click.option('--log-output', is_flag=True, help='在结果日志中记录命令输出')
+@click.option('--quiet', is_flag=True, help='不显示命令输出，只显示汇总')
+@click.pass_context
+def run(ctx, file_path, jobs, continue_on_error, log_file, log_output, quiet):
+    """在同一进程内执行命令文件中的所有命令（FILE_PATH 为 - 时从标准输入读取）
+
+    所有命令共享配置缓存、连接池和响应缓存。命令输出了错误消息或退出码
+    非零时视为失败。
+    """
+    from utils.output import OutputFormatter, reset_error_count, error_count
+    formatter = OutputFormatter()
+    root_command = ctx.find_root().command
+
+    try:
+        commands = _load_commands(file_path)
+    except (OSError, ValueError) as e:
+        formatter.print_error(f"读取命令文件失败: {e}")
+        ctx.exit(1)
+    if not commands:
+        formatter.print_warning("命令文件中没有可执行的命令")
+        return
+
+    log = open(log_file, 'w', encoding='utf-8') if log_file else None
+    results = []
+    stopped = False
+
+    def execute(entry: Dict[str, Any], capture: OutputCapture) -> Optional[tuple]:
+        if stopped:
+            return None
+        reset_error_count()
+        start = time.perf_counter()
+        exit_code, stdout, stderr = capture.run(root_command, entry['args'])
+        latency_ms = (time.perf_counter() - start) * 1000
+        ok = exit_code == 0 and error_count() == 0
+        result = {
+            'line': entry['line'],
+            'command': entry['command'],
+            'status': 'ok' if ok else 'failed',
+            'exit_code': exit_code,
+            'latency_ms': round(latency_ms, 1),
+        }
+        if log_output:
+            result['stdout'] = stdout
+            result['stderr'] = stderr
+        return result, stdout, stderr
+
+    def report(outcome, capture: OutputCapture):
+        nonlocal stopped
+        if outcome is None:
+            return
+        result, stdout, stderr = outcome
+        results.append(result)
+        if log:
+            log.write(json.dumps(result, ensure_ascii=False) + '\n')
+            log.flush()
+        if not quiet:
+            # 输出写回原始流（捕获期间sys.stdout是按线程分流的代理）
+            click.echo(f"[{result['line']}] {result['command']} ({result['latency_ms']:.0f} ms)",
+                       file=capture.original_stderr)
+            capture.original_stdout.write(stdout)
+            capture.original_stderr.write(stderr)
+        if result['status'] != 'ok' and not continue_on_error:
+            stopped = True
+
+    started = time.perf_counter()
+    try:
+        with OutputCapture() as capture:
+            if jobs <= 1:
+                for entry in commands:
+                    report(execute(entry, capture), capture)
+                    if stopped:
+                        break
+            else:
+                with ThreadPoolExecutor(max_workers=jobs) as executor:
+                    futures = [executor.submit(execute, entry, capture) for entry in commands]
+                    for future in futures:
+                        report(future.result(), capture)
+    finally:
+        if log:
+            log.close()
+    elapsed = time.perf_counter() - started
+
+    succeeded = sum(1 for r in results if r['status'] == 'ok')
+    failed = len(results) - succeeded
+    skipped = len(commands) - len(results)
+    summary = (f"共 {len(commands)} 条命令，成功 {succeeded}，失败 {failed}"
+               + (f"，跳过 {skipped}" if skipped else "")
+               + f"，耗时 {elapsed:.2f}s（{len(results) / elapsed if elapsed else 0:.1f} 条/秒）")
+    if failed or skipped:
+        formatter.print_error(summary)
+        ctx.exit(1)
+    formatter.print_success(summary)
@@ -2,6 +2,7 @@ import click
 from typing import Dict, Any, Optional
 from api_client import APIClient
 from utils.output import OutputFormatter
+from utils.batching import read_ids, run_batches
 
 
 @click.group()
@@ -138,4 +139,68 @@ def delete(dataset_id, document_id, chunk_id):
         
     except Exception as e:
         formatter = OutputFormatter()
-        formatter.print_error(f"删除文档块失败: {e}") 
\ No newline at end of file
+        formatter.print_error(f"删除文档块失败: {e}")
+
+
+@chunks.command(name='bulk-delete')
+@click.argument('dataset_id')
+@click.argument('document_id')
+@click.argument('chunk_ids', nargs=-1)
+@click.option('--ids-file', help='从文件读取块ID（每行一个，- 表示标准输入）')
+@click.option('--batch-size', type=int, default=500, help='每个DELETE请求包含的块数')
+@click.option('--workers', type=int, default=4, help='并发执行的删除请求数')
+@click.option('--dry-run', is_flag=True, help='只列出将被删除的块，不实际删除')
+@click.option('--format', 'output_format', default='table', 
+              type=click.Choice(['table', 'json', 'yaml']), 
+              help='输出格式')
+def bulk_delete(dataset_id, document_id, chunk_ids, ids_file, batch_size, workers, dry_run, output_format):
+    """批量删除文档块
+
+    块ID来自参数或 --ids-file（- 为标准输入），按 --batch-size 分批、并发发送
+    DELETE 请求，某批被拒绝时二分重试以定位出错的块。
+    """
+    try:
+        client = APIClient()
+        formatter = OutputFormatter(output_format)
+        
+        ids = list(dict.fromkeys(list(chunk_ids) + (read_ids(ids_file) if ids_file else [])))
+        if not ids:
+            formatter.print_error("请指定要删除的块ID")
+            return
+        
+        if dry_run:
+            if output_format == 'table':
+                formatter.print_rich_table([{'id': chunk_id} for chunk_id in ids[:50]],
+                                           f"将删除 {len(ids)} 个块" + ("（仅显示前50个）" if len(ids) > 50 else ""))
+            else:
+                print(formatter.format_output({'dry_run': True, 'count': len(ids), 'chunk_ids': ids}))
+            formatter.print_info(f"预览模式：共 {len(ids)} 个块将被删除，去掉 --dry-run 执行删除")
+            return
+        
+        endpoint = f'/api/v1/datasets/{dataset_id}/documents/{document_id}/chunks'
+        
+        def send(batch):
+            response = client.delete(endpoint, json_data={'chunk_ids': batch})
+            if isinstance(response, dict) and response.get('code', 0) != 0:
+                return response.get('message', '未知错误')
+            return None
+        
+        client.ensure_pool_size(workers)
+        outcome = run_batches(send, ids, batch_size, workers)
+        failed = [{'id': chunk_id, 'message': outcome[chunk_id]} for chunk_id in ids if outcome.get(chunk_id)]
+        summary = {'requested': len(ids), 'deleted': len(ids) - len(failed), 'failed': len(failed)}
+        
+        if output_format == 'table':
+            formatter.print_rich_table([summary], "批量删除结果")
+            if failed:
+                formatter.print_rich_table(failed, f"删除失败的块 ({len(failed)} 个)")
+        else:
+            print(formatter.format_output({'summary': summary, 'failed': failed}))
+        
+        if failed:
+            formatter.print_error(f"{len(failed)} 个块删除失败")
+        else:
+            formatter.print_success(f"已删除 {summary['deleted']} 个块")
+    except Exception as e:
+        formatter = OutputFormatter()
+        formatter.print_error(f"批量删除文档块失败: {e}")
@@ -0,0 +1,300 @@
+import click
+import io
+import json
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from utils.daemon_client import get_socket_path, send_message, request as daemon_request
+from utils.cli_runner import run_command
+
+
+class _Job:
+    """一条转发来的命令：请求、所属连接、退出码和取消状态"""
+
+    def __init__(self, sock: socket.socket, request: Dict[str, Any]):
+        self.sock = sock
+        self.request = request
+        self.send_lock = threading.Lock()
+        self.done = threading.Event()
+        self.exit_code = 1
+        self.cancelled = False
+
+
+class _SocketWriter(io.TextIOBase):
+    """把写入的文本按流名称封装成消息发回客户端
+
+    命令线程和rich进度条的刷新线程可能同时写入，同一连接上的写入共用
+    send_lock，保证每条消息完整发送、不会交错。客户端已断开时引发
+    KeyboardInterrupt 中止命令（命令中的 except Exception 不会吞掉它）。
+    """
+
+    def __init__(self, sock: socket.socket, stream: str, isatty: bool = False,
+                 send_lock: Optional[threading.Lock] = None):
+        self._sock = sock
+        self._stream = stream
+        self._isatty = isatty
+        self._send_lock = send_lock or threading.Lock()
+        self._broken = False
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return self._isatty
+
+    def write(self, text):
+        # 对bytes抛出TypeError，click据此把它识别为文本流，而不是按二进制流写入bytes
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if text:
+            if self._broken:
+                raise KeyboardInterrupt
+            try:
+                with self._send_lock:
+                    send_message(self._sock, {self._stream: text})
+            except OSError:
+                self._broken = True
+                raise KeyboardInterrupt
+        return len(text)
+
+
+class DaemonServer:
+    """常驻进程：持有预热的配置、APIClient和连接池，串行执行转发来的命令
+
+    命令会修改进程级状态（工作目录、sys.stdout、环境变量），因此由主线程
+    逐条执行，连接线程只负责收发消息；连接池和配置缓存在命令之间复用。
+    客户端取消（Ctrl-C 或断开连接）时向主线程发送SIGINT，与本地执行时按下
+    Ctrl-C 一样能中断sleep、join等阻塞等待，命令中止后立即执行下一条。
+    """
+
+    def __init__(self, root_command: click.Command, socket_path: str):
+        self.root_command = root_command
+        self.socket_path = socket_path
+        self.started_at = time.time()
+        self.served = 0
+        self._jobs = queue.Queue()
+        self._state_lock = threading.Lock()
+        self._current: Optional[_Job] = None
+        self._interrupt_pending = False
+        self._stopping = threading.Event()
+        self._listener: Optional[socket.socket] = None
+
+    def _execute(self, job: _Job) -> int:
+        """在主线程内执行一条命令，输出实时发回客户端；客户端取消时返回130"""
+        request = job.request
+        argv = request.get('argv', [])
+        env = request.get('env', {})
+        isatty = env.get('FORCE_COLOR') == '1'
+        saved_cwd = os.getcwd()
+        saved_streams = (sys.stdout, sys.stderr, sys.stdin)
+        # 转发来的环境变量（如 RAGFORGE_NO_CACHE）只作用于这条命令，结束后整体恢复
+        saved_environ = dict(os.environ)
+        os.environ.update(env)
+        try:
+            os.chdir(request.get('cwd') or saved_cwd)
+            sys.stdout = _SocketWriter(job.sock, 'stdout', isatty, job.send_lock)
+            sys.stderr = _SocketWriter(job.sock, 'stderr', isatty, job.send_lock)
+            sys.stdin = io.StringIO(request.get('stdin', ''))
+            with self._state_lock:
+                if job.cancelled:
+                    # 客户端在排队等待期间已经取消
+                    return 130
+                self._current = job
+            try:
+                return run_command(self.root_command, argv)
+            finally:
+                with self._state_lock:
+                    self._current = None
+        except KeyboardInterrupt:
+            return 130
+        finally:
+            sys.stdout, sys.stderr, sys.stdin = saved_streams
+            os.chdir(saved_cwd)
+            os.environ.clear()
+            os.environ.update(saved_environ)
+            self.served += 1
+
+    def _cancel(self, job: _Job):
+        """取消命令：尚未执行的不再执行，正在执行的向主线程发送SIGINT"""
+        with self._state_lock:
+            job.cancelled = True
+            if self._current is job:
+                self._interrupt_pending = True
+                signal.pthread_kill(threading.main_thread().ident, signal.SIGINT)
+
+    def _watch_cancel(self, reader, job: _Job):
+        """等待客户端的取消消息；连接断开（客户端被 Ctrl-C 终止）同样视为取消"""
+        try:
+            for line in reader:
+                if json.loads(line).get('op') == 'cancel':
+                    break
+        except (OSError, ValueError):
+            pass
+        if not job.done.is_set():
+            self._cancel(job)
+
+    def _handle(self, sock: socket.socket):
+        with sock, sock.makefile('r', encoding='utf-8') as reader:
+            try:
+                line = reader.readline()
+                if not line:
+                    return
+                request = json.loads(line)
+                op = request.get('op')
+                if op == 'run':
+                    job = _Job(sock, request)
+                    threading.Thread(target=self._watch_cancel, args=(reader, job), daemon=True).start()
+                    self._jobs.put(job)
+                    job.done.wait()
+                    with job.send_lock:
+                        send_message(sock, {'exit_code': job.exit_code})
+                    # 结束 _watch_cancel 线程中阻塞的读取
+                    sock.shutdown(socket.SHUT_RD)
+                elif op == 'ping':
+                    send_message(sock, {'pid': os.getpid(), 'uptime': round(time.time() - self.started_at, 1),
+                                 'served': self.served, 'socket': self.socket_path})
+                elif op == 'shutdown':
+                    send_message(sock, {'ok': True})
+                    self.stop()
+                else:
+                    send_message(sock, {'error': f"未知操作: {op}"})
+            except (OSError, ValueError):
+                # 客户端提前断开或发送了无效请求
+                pass
+
+    def _accept_loop(self):
+        """为每个连接启动一个线程"""
+        while not self._stopping.is_set():
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def serve_forever(self):
+        """监听socket，在主线程中逐条执行命令（必须在主线程中调用）"""
+        os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._listener.listen(64)
+        # 后台启动时SIGINT可能被继承为忽略，取消命令依赖它引发 KeyboardInterrupt
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        try:
+            while not self._stopping.is_set():
+                job = None
+                try:
+                    job = self._jobs.get(timeout=0.5)
+                    job.exit_code = self._execute(job)
+                except queue.Empty:
+                    continue
+                except KeyboardInterrupt:
+                    with self._state_lock:
+                        pending, self._interrupt_pending = self._interrupt_pending, False
+                    if not pending:
+                        # 前台运行时在终端按下 Ctrl-C：停止守护进程
+                        raise
+                    if job is not None:
+                        job.exit_code = 130
+                finally:
+                    if job is not None:
+                        job.done.set()
+        finally:
+            self.stop()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def stop(self):
+        self._stopping.set()
+        if self._listener is not None:
+            try:
+                self._listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._listener.close()
+
+
+@click.group()
+def daemon():
+    """常驻守护进程（预热客户端，CLI调用通过Unix socket转发）"""
+    pass
+
+
+@daemon.command()
+@click.option('--foreground', is_flag=True, help='在前台运行（不脱离终端）')
+@click.option('--log-file', default='~/.ragforge/daemon.log', help='后台运行时的日志文件')
+@click.pass_context
+def start(ctx, foreground, log_file):
+    """启动守护进程"""
+    from utils.output import OutputFormatter
+    formatter = OutputFormatter()
+    socket_path = get_socket_path()
+
+    info = daemon_request('ping')
+    if info:
+        formatter.print_warning(f"守护进程已在运行 (PID {info['pid']})")
+        return
+
+    if foreground:
+        # 预热配置、日志和连接池
+        from api_client import APIClient
+        APIClient()
+        formatter.print_success(f"守护进程已启动: {socket_path} (PID {os.getpid()})")
+        DaemonServer(ctx.find_root().command, socket_path).serve_forever()
+        return
+
+    import subprocess
+    log_path = os.path.expanduser(log_file)
+    os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+    main_script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+    with open(log_path, 'a', encoding='utf-8') as log:
+        subprocess.Popen([sys.executable, main_script, 'daemon', 'start', '--foreground'],
+                         stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                         start_new_session=True, cwd=os.getcwd())
+
+    # 等待socket就绪
+    for _ in range(100):
+        info = daemon_request('ping')
+        if info:
+            formatter.print_success(f"守护进程已启动: {socket_path} (PID {info['pid']})")
+            return
+        time.sleep(0.1)
+    formatter.print_error(f"守护进程启动超时，请查看日志: {log_path}")
+
+
+@daemon.command()
+def stop():
+    """停止守护进程"""
+    from utils.output import OutputFormatter
+    formatter = OutputFormatter()
+    if daemon_request('shutdown'):
+        formatter.print_success("守护进程已停止")
+    else:
+        formatter.print_warning("守护进程未运行")
+
+
+@daemon.command()
+@click.option('--format', 'output_format', default='table',
+              type=click.Choice(['table', 'json', 'yaml']),
+              help='输出格式')
+def status(output_format):
+    """查看守护进程状态"""
+    from utils.output import OutputFormatter
+    formatter = OutputFormatter(output_format)
+    info = daemon_request('ping')
+    if not info:
+        formatter.print_warning("守护进程未运行")
+        return
+    if output_format == 'table':
+        formatter.print_rich_table([info], "守护进程状态")
+    else:
+        print(formatter.format_output(info))
@@ -1,7 +1,13 @@
 import click
+import json
+import os
+import time
 from typing import Dict, Any, Optional
 from api_client import APIClient
 from utils.output import OutputFormatter
+from utils.batching import bounded_map
+from utils.pagination import iter_documents, iter_chunks, DEFAULT_PAGE_SIZE, DEFAULT_PREFETCH
+from utils.journal import ExportState, DEFAULT_JOURNAL_PATH
 
 
 @click.group()
@@ -195,4 +201,208 @@ def update(dataset_id, name, description, output_format):
             
     except Exception as e:
         formatter = OutputFormatter()
-        formatter.print_error(f"更新数据集失败: {e}") 
\ No newline at end of file
+        formatter.print_error(f"更新数据集失败: {e}") 
+
+
+class _JsonlExportWriter:
+    """JSONL导出：每个文档一行 {"document": {...}, "chunks": [...]}"""
+
+    def __init__(self, path: str):
+        self._file = click.open_file(path, 'w', encoding='utf-8')
+
+    def write(self, dataset_id: str, doc: Dict[str, Any], chunks):
+        self._file.write(json.dumps({'document': doc, 'chunks': chunks}, ensure_ascii=False))
+        self._file.write('\n')
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetExportWriter:
+    """Parquet导出：每个块一行，没有块的文档也占一行（块字段为空）
+
+    行先在内存中攒到 batch_rows 条再写出一个行组，内存占用与导出总量无关。
+    """
+
+    def __init__(self, path: str, batch_rows: int = 10000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise click.ClickException("导出Parquet需要安装pyarrow: pip install pyarrow")
+        self._pa = pa
+        self._schema = pa.schema([
+            ('dataset_id', pa.string()),
+            ('document_id', pa.string()),
+            ('document_name', pa.string()),
+            ('document_update_time', pa.float64()),
+            ('chunk_id', pa.string()),
+            ('chunk_index', pa.int64()),
+            ('content', pa.string()),
+            ('document', pa.string()),
+            ('chunk', pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._batch_rows = batch_rows
+        self._rows = []
+
+    def write(self, dataset_id: str, doc: Dict[str, Any], chunks):
+        update_time = doc.get('update_time')
+        base = {
+            'dataset_id': dataset_id,
+            'document_id': doc.get('id'),
+            'document_name': doc.get('name'),
+            'document_update_time': float(update_time) if isinstance(update_time, (int, float)) else None,
+            'document': json.dumps(doc, ensure_ascii=False),
+        }
+        if not chunks:
+            self._rows.append({**base, 'chunk_id': None, 'chunk_index': None, 'content': None, 'chunk': None})
+        for index, chunk in enumerate(chunks):
+            self._rows.append({**base, 'chunk_id': chunk.get('id'), 'chunk_index': index,
+                               'content': chunk.get('content'),
+                               'chunk': json.dumps(chunk, ensure_ascii=False)})
+        if len(self._rows) >= self._batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def _export_format(output: str, export_format: Optional[str]) -> str:
+    """未指定格式时按扩展名推断，标准输出只支持JSONL"""
+    if export_format:
+        return export_format
+    if output != '-' and os.path.splitext(output)[1].lower() in ('.parquet', '.pq'):
+        return 'parquet'
+    return 'jsonl'
+
+
+def _delta_path(output):
+    """增量导出的文件名：在扩展名前插入时间戳，如 backup.jsonl -> backup.20240601T120000.jsonl"""
+    root, ext = os.path.splitext(output)
+    return f"{root}.{time.strftime('%Y%m%dT%H%M%S')}{ext}"
+
+
+@datasets.command()
+@click.argument('dataset_id')
+@click.option('-o', '--output', required=True, type=click.Path(dir_okay=False, allow_dash=True),
+              help='输出文件，- 表示标准输出（仅JSONL）')
+@click.option('--format', 'export_format', type=click.Choice(['jsonl', 'parquet']),
+              help='导出格式，默认按扩展名推断（.parquet 为Parquet，其余为JSONL）')
+@click.option('--workers', default=4, show_default=True, type=click.IntRange(1, 64),
+              help='并发拉取块的文档数')
+@click.option('--page-size', default=DEFAULT_PAGE_SIZE, show_default=True, type=click.IntRange(1, 1000),
+              help='文档列表每页条数')
+@click.option('--chunk-page-size', default=1024, show_default=True, type=click.IntRange(1, 10000),
+              help='块列表每页条数')
+@click.option('--incremental', is_flag=True,
+              help='只导出上次成功导出后更新过的文档，写入带时间戳的增量文件，不覆盖完整导出')
+@click.option('--journal', 'journal_path', default=DEFAULT_JOURNAL_PATH, show_default=True,
+              help='记录导出水位的本地数据库')
+def export(dataset_id, output, export_format, workers, page_size, chunk_page_size, incremental, journal_path):
+    """导出知识库的全部文档和块到JSONL或Parquet
+
+    文档列表和块列表都分页拉取，多个文档的块并发拉取、按文档列表顺序
+    流式写出，内存中只保留在途的少量文档。写入文件时先写临时文件，
+    完成后再改名，中途失败不会留下半个导出文件。
+
+    --incremental 有导出记录时只导出之后更新过的文档，写入
+    ``<文件名>.<时间戳><扩展名>``（输出到标准输出时不变），-o 指定的完整
+    导出文件保持不动。
+    """
+    formatter = OutputFormatter(stderr=output == '-')
+    try:
+        client = APIClient()
+
+        api_token = client.config.get('api', {}).get('api_token')
+        if not api_token:
+            formatter.print_error("未找到API令牌，请先登录")
+            return
+        client.session.headers['Authorization'] = f"Bearer {api_token}"
+
+        export_format = _export_format(output, export_format)
+        if export_format == 'parquet' and output == '-':
+            formatter.print_error("Parquet格式不支持输出到标准输出")
+            return
+
+        with ExportState(journal_path) as state:
+            since = state.watermark(dataset_id) if incremental else None
+            if incremental:
+                if since is None:
+                    formatter.print_info("没有导出记录，将导出全部文档")
+                else:
+                    if output != '-':
+                        output = _delta_path(output)
+                    formatter.print_info(f"增量导出 update_time >= {since} 的文档到 {output}")
+
+            client.ensure_pool_size(workers + DEFAULT_PREFETCH)
+            target = output if output == '-' else output + '.part'
+            writer = _ParquetExportWriter(target) if export_format == 'parquet' else _JsonlExportWriter(target)
+
+            stats = {'documents': 0, 'chunks': 0, 'skipped': 0, 'failed': 0}
+            failures = []
+            latest = since
+
+            def selected():
+                for doc in iter_documents(client, dataset_id, page_size=page_size):
+                    update_time = doc.get('update_time')
+                    if since is not None and isinstance(update_time, (int, float)) and update_time < since:
+                        stats['skipped'] += 1
+                        continue
+                    yield doc
+
+            def fetch(doc):
+                try:
+                    return doc, [*iter_chunks(client, dataset_id, doc['id'], page_size=chunk_page_size)], None
+                except Exception as e:
+                    return doc, None, str(e)
+
+            start = time.perf_counter()
+            try:
+                for doc, chunks, error in bounded_map(fetch, selected(), workers=workers):
+                    if error is not None:
+                        stats['failed'] += 1
+                        failures.append({'id': doc.get('id'), 'name': doc.get('name'), 'error': error})
+                        continue
+                    writer.write(dataset_id, doc, chunks)
+                    stats['documents'] += 1
+                    stats['chunks'] += len(chunks)
+                    update_time = doc.get('update_time')
+                    if isinstance(update_time, (int, float)) and (latest is None or update_time > latest):
+                        latest = update_time
+            except BaseException:
+                writer.close()
+                if target != output:
+                    os.remove(target)
+                raise
+            writer.close()
+            if target != output:
+                os.replace(target, output)
+            elapsed = time.perf_counter() - start
+
+            # 有文档失败时不前移水位，下次增量导出会重新导出它们
+            if not failures:
+                state.record(dataset_id, latest, stats['documents'], output)
+
+        for failure in failures:
+            formatter.print_error(f"导出文档 {failure['name'] or failure['id']} 失败: {failure['error']}")
+        summary = f"导出完成: {stats['documents']} 个文档, {stats['chunks']} 个块"
+        if incremental:
+            summary += f", 跳过未更新 {stats['skipped']} 个"
+        summary += f", 失败 {stats['failed']} 个, 耗时 {elapsed:.1f}s"
+        if failures:
+            formatter.print_warning(summary)
+        else:
+            formatter.print_success(summary)
+
+    except click.ClickException as e:
+        formatter.print_error(e.message)
+    except Exception as e:
+        formatter.print_error(f"导出知识库失败: {e}")
+
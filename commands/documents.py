@@ -1,7 +1,13 @@
 import click
+import requests
 from typing import Dict, Any, Optional
-from api_client import APIClient
+from api_client import APIClient, NotFoundError
 from utils.output import OutputFormatter
+from utils.multipart import MultipartEncoder, BandwidthLimiter, DEFAULT_BLOCK_SIZE, parse_rate
+from utils.batching import read_ids, submit_with_bisect, run_batches
+from utils.pagination import iter_pages, iter_documents, extract_documents, DEFAULT_PAGE_SIZE, DEFAULT_PREFETCH
+from utils.journal import (IngestJournal, ContentIndex, DocumentIndex, DEFAULT_JOURNAL_PATH,
+                           file_sha256, hash_files)
 
 
 @click.group()
@@ -12,10 +18,13 @@ def documents():
 
 @documents.command(name='list')
 @click.argument('dataset_id')
+@click.option('--all', 'fetch_all', is_flag=True, help='自动翻页列出全部文档')
+@click.option('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help='每页文档数')
+@click.option('--prefetch', type=int, default=DEFAULT_PREFETCH, help='并发预取的页数')
 @click.option('--format', 'output_format', default='table', 
-              type=click.Choice(['table', 'json', 'yaml', 'simple']), 
-              help='输出格式')
-def list_documents(dataset_id, output_format):
+              type=click.Choice(['table', 'json', 'yaml', 'simple', 'ndjson', 'csv']), 
+              help='输出格式（ndjson/csv 边翻页边输出，内存占用恒定）')
+def list_documents(dataset_id, fetch_all, page_size, prefetch, output_format):
     """列出数据集中的所有文档"""
     try:
         client = APIClient()
@@ -30,17 +39,28 @@ def list_documents(dataset_id, output_format):
         # 使用API token设置认证头（Bearer格式）
         client.session.headers['Authorization'] = f"Bearer {api_token}"
         
-        # 调用API
-        response = client.get(f'/api/v1/datasets/{dataset_id}/documents')
+        endpoint = f'/api/v1/datasets/{dataset_id}/documents'
+        if output_format in ('ndjson', 'csv'):
+            pages = iter_pages(client, endpoint, page_size=page_size, prefetch=prefetch)
+            if not fetch_all:
+                pages = [next(pages)]
+            try:
+                for docs in pages:
+                    formatter.write_rows(docs)
+            except BrokenPipeError:
+                # 下游（如 head）提前关闭了管道
+                import os
+                import sys
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return
         
-        docs = response.get('documents')
-        if docs is None or docs is False or docs == {}:
-            docs = response.get('data')
-        # 兼容重试后返回{'docs': [], 'total': 0}
-        if isinstance(docs, dict) and 'docs' in docs:
-            docs = docs['docs']
-        if not isinstance(docs, list):
-            docs = []
+        if fetch_all:
+            docs = list(iter_documents(client, dataset_id, page_size=page_size, prefetch=prefetch))
+            response = {'code': 0, 'data': {'docs': docs, 'total': len(docs)}}
+        else:
+            # 调用API
+            response = client.get(endpoint)
+            docs, _ = extract_documents(response)
         
         # 格式化输出
         if output_format == 'table':
@@ -151,6 +171,10 @@ def delete(dataset_id, document_id):
 
         # 调用API
         client.delete(f'/api/v1/datasets/{dataset_id}/documents/{document_id}')
+        with ContentIndex() as index:
+            index.remove_documents(dataset_id, [document_id])
+        with DocumentIndex() as index:
+            index.remove(dataset_id, [document_id])
         
         formatter.print_success(f"文档 {document_id} 删除成功")
         
@@ -159,6 +183,156 @@ def delete(dataset_id, document_id):
         formatter.print_error(f"删除文档失败: {e}")
 
 
+def _to_timestamp(value):
+    """把时间（毫秒/秒时间戳、ISO日期或HTTP日期字符串）转换为秒级时间戳，无法解析时返回None"""
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    if not isinstance(value, str) or not value.strip():
+        return None
+    from datetime import datetime
+    from email.utils import parsedate_to_datetime
+    text = value.strip()
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(text).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _document_matches(doc, status_filter, name_pattern, created_before):
+    """判断文档是否满足批量删除的过滤条件"""
+    import fnmatch
+    if status_filter and str(doc.get('run', '')).upper() not in status_filter:
+        return False
+    if name_pattern and not fnmatch.fnmatch(doc.get('name') or '', name_pattern):
+        return False
+    if created_before is not None:
+        created = _to_timestamp(doc.get('create_time') or doc.get('create_date'))
+        if created is None or created >= created_before:
+            return False
+    return True
+
+
+def _delete_sender(client, endpoint, key):
+    """返回按ID列表批量删除的函数，成功返回None，被拒绝时返回错误信息"""
+    def send(batch):
+        response = client.delete(endpoint, json_data={key: batch})
+        if isinstance(response, dict) and response.get('code', 0) != 0:
+            return response.get('message', '未知错误')
+        return None
+    return send
+
+
+def _existing_documents(client, dataset_id):
+    """返回查询一批文档中仍然存在的ID的函数，供删除被拒绝时排除已删除的文档"""
+    def pending(batch):
+        return _lookup_by_id(client, dataset_id, batch, workers=4).keys()
+    return pending
+
+
+@documents.command(name='bulk-delete')
+@click.argument('dataset_id')
+@click.argument('document_ids', nargs=-1)
+@click.option('--ids-file', help='从文件读取文档ID（每行一个，- 表示标准输入）')
+@click.option('--status', 'statuses', multiple=True,
+              type=click.Choice(['UNSTART', 'RUNNING', 'CANCEL', 'DONE', 'FAIL'], case_sensitive=False),
+              help='只删除解析状态为该值的文档，可多次指定')
+@click.option('--name', 'name_pattern', help='只删除名称匹配该通配模式的文档，如 "stress_*.txt"')
+@click.option('--created-before', help='只删除在该时间之前创建的文档（如 2024-06-01 或 2024-06-01T12:00:00）')
+@click.option('--batch-size', type=int, default=100, help='每个DELETE请求包含的文档数')
+@click.option('--workers', type=int, default=4, help='并发执行的删除请求数')
+@click.option('--dry-run', is_flag=True, help='只列出将被删除的文档，不实际删除')
+@click.option('--format', 'output_format', default='table', 
+              type=click.Choice(['table', 'json', 'yaml']), 
+              help='输出格式')
+def bulk_delete(dataset_id, document_ids, ids_file, statuses, name_pattern, created_before,
+                batch_size, workers, dry_run, output_format):
+    """批量删除文档
+
+    文档ID来自参数、--ids-file（- 为标准输入），或按 --status / --name /
+    --created-before 过滤知识库中的文档（同时给出ID时取交集）。删除按
+    --batch-size 分批、并发发送 DELETE 请求，某批被拒绝时二分重试。
+    """
+    try:
+        client = APIClient()
+        formatter = OutputFormatter(output_format)
+        
+        # 检查是否有API token
+        if not _ensure_token(client, formatter):
+            return
+        
+        ids = list(dict.fromkeys(list(document_ids) + (read_ids(ids_file) if ids_file else [])))
+        cutoff = None
+        if created_before:
+            cutoff = _to_timestamp(created_before)
+            if cutoff is None:
+                formatter.print_error(f"无法解析时间: {created_before}")
+                return
+        status_filter = {s.upper() for s in statuses}
+        has_filter = bool(status_filter or name_pattern or cutoff is not None)
+        if not ids and not has_filter:
+            formatter.print_error("请指定要删除的文档ID，或使用 --status/--name/--created-before 过滤")
+            return
+        
+        if has_filter:
+            # 删除接口沿用 _ensure_token 选择的认证头，列表接口使用Bearer api_token
+            api_token = client.config.get('api', {}).get('api_token')
+            list_headers = {'Authorization': f"Bearer {api_token}"} if api_token else None
+            wanted = set(ids)
+            targets = [doc for doc in iter_documents(client, dataset_id, headers=list_headers)
+                       if (not wanted or doc.get('id') in wanted)
+                       and _document_matches(doc, status_filter, name_pattern, cutoff)]
+        else:
+            targets = [{'id': doc_id} for doc_id in ids]
+        
+        if not targets:
+            formatter.print_warning("没有符合条件的文档")
+            return
+        
+        if dry_run:
+            preview = [{'id': doc.get('id'), 'name': doc.get('name', ''), 'run': doc.get('run', ''),
+                        'create_time': doc.get('create_time', '')} for doc in targets]
+            if output_format == 'table':
+                formatter.print_rich_table(preview[:50], f"将删除 {len(preview)} 个文档"
+                                           + ("（仅显示前50个）" if len(preview) > 50 else ""))
+            else:
+                print(formatter.format_output({'dry_run': True, 'count': len(preview), 'documents': preview}))
+            formatter.print_info(f"预览模式：共 {len(targets)} 个文档将被删除，去掉 --dry-run 执行删除")
+            return
+        
+        target_ids = [doc['id'] for doc in targets]
+        client.ensure_pool_size(workers)
+        outcome = run_batches(_delete_sender(client, f'/api/v1/datasets/{dataset_id}/documents', 'ids'),
+                              target_ids, batch_size, workers, pending=_existing_documents(client, dataset_id))
+        deleted = [doc_id for doc_id in target_ids if outcome.get(doc_id) is None]
+        failed = [{'id': doc_id, 'message': outcome[doc_id]} for doc_id in target_ids if outcome.get(doc_id)]
+        
+        # 同步清理本地的内容索引和文档索引
+        with ContentIndex() as index:
+            index.remove_documents(dataset_id, deleted)
+        with DocumentIndex() as index:
+            index.remove(dataset_id, deleted)
+        
+        summary = {'requested': len(target_ids), 'deleted': len(deleted), 'failed': len(failed)}
+        if output_format == 'table':
+            formatter.print_rich_table([summary], "批量删除结果")
+            if failed:
+                formatter.print_rich_table(failed, f"删除失败的文档 ({len(failed)} 个)")
+        else:
+            print(formatter.format_output({'summary': summary, 'failed': failed}))
+        
+        if failed:
+            formatter.print_error(f"{len(failed)} 个文档删除失败")
+        else:
+            formatter.print_success(f"已删除 {len(deleted)} 个文档")
+    except Exception as e:
+        formatter = OutputFormatter()
+        formatter.print_error(f"批量删除文档失败: {e}")
+
+
 @documents.command()
 @click.argument('dataset_id')
 @click.argument('document_id')
@@ -235,14 +409,20 @@ def chunks(dataset_id, document_id, output_format):
 @documents.command()
 @click.argument('dataset_id')
 @click.option('--file', 'file_path', required=True, help='要上传的本地文件路径')
+@click.option('--limit-rate', help='上传带宽上限（字节/秒，支持 K/M/G 后缀，如 10M）')
+@click.option('--block-size', type=int, default=DEFAULT_BLOCK_SIZE, help='流式上传的读块大小（字节）')
+@click.option('--no-dedup', is_flag=True, help='不查询内容索引，即使已有内容相同的文档也上传')
 @click.option('--format', 'output_format', default='table', 
               type=click.Choice(['table', 'json', 'yaml']), 
               help='输出格式')
-def upload(dataset_id, file_path, output_format):
-    """上传本地文件到知识库（dataset）"""
+def upload(dataset_id, file_path, limit_rate, block_size, no_dedup, output_format):
+    """上传本地文件到知识库（dataset）
+
+    文件以流式multipart分块发送，内存占用与文件大小无关；在终端中运行时显示上传进度。
+    知识库中已有内容相同（SHA-256一致）的文档时跳过上传。
+    """
     import os
-    import requests
-    from utils.output import OutputFormatter
+    import sys
     try:
         client = APIClient()
         formatter = OutputFormatter(output_format)
@@ -255,23 +435,27 @@ def upload(dataset_id, file_path, output_format):
             formatter.print_error(f"文件不存在: {file_path}")
             return
         
-        # 修正上传接口路径和参数
-        headers = {}
-        if 'Authorization' in client.session.headers:
-            headers['Authorization'] = client.session.headers['Authorization']
-        url = client.base_url.rstrip('/') + '/v1/document/upload'
-        with open(file_path, 'rb') as f:
-            files = {'file': (os.path.basename(file_path), f)}
-            data = {'kb_id': dataset_id}
-            resp = requests.post(url, headers=headers, files=files, data=data)
+        if not no_dedup:
+            with ContentIndex() as index:
+                existing_id = index.lookup(dataset_id, file_sha256(file_path))
+            if existing_id:
+                formatter.print_warning(f"知识库中已有内容相同的文档 {existing_id}，跳过上传（使用 --no-dedup 强制上传）")
+                return
         
-        try:
-            response = resp.json()
-        except Exception:
-            formatter.print_error(f"服务端返回非JSON: {resp.text}")
+        rate = parse_rate(limit_rate)
+        limiter = BandwidthLimiter(rate) if rate else None
+        size = os.path.getsize(file_path)
+        with _UploadProgress(1, size, enabled=sys.stderr.isatty()) as progress:
+            response, sha256 = _upload_file(client, dataset_id, file_path, progress.advance_bytes, limiter, block_size)
+        
+        if 'text' in response and 'code' not in response:
+            formatter.print_error(f"服务端返回非JSON: {response['text']}")
             return
         
         if response.get('code') == 0:
+            result = _upload_result(file_path, size, response, sha256=sha256)
+            with ContentIndex() as index:
+                index.add(dataset_id, sha256, result['document_id'], size, os.path.abspath(file_path))
             formatter.print_success(f"文件 {file_path} 上传成功")
             if output_format == 'table':
                 formatter.print_rich_table(response.get('data', []), "上传结果")
@@ -284,6 +468,620 @@ def upload(dataset_id, file_path, output_format):
         formatter.print_error(f"文件上传失败: {e}")
 
 
+def _upload_file(client, dataset_id, file_path, progress_callback=None, limiter=None,
+                 block_size=DEFAULT_BLOCK_SIZE, headers=None):
+    """以流式multipart上传单个文件到知识库，返回 (API响应, 文件内容的SHA-256)
+
+    文件按block_size分块读取发送，内存占用与文件大小无关，哈希在发送时顺带
+    计算；progress_callback接收发送字节数的增量（重发时为负数），limiter用于限制（可跨并发
+    上传共享的）带宽；headers为额外的请求头（如按请求指定的认证头）。
+    """
+    encoder = MultipartEncoder({'kb_id': dataset_id}, 'file', file_path, block_size=block_size,
+                               progress_callback=progress_callback, limiter=limiter)
+    response = client.post('/v1/document/upload', data=encoder, headers={**(headers or {}), **encoder.headers})
+    return response, encoder.sha256
+
+
+async def _upload_file_async(client, dataset_id, file_path, progress_callback=None, limiter=None,
+                             block_size=DEFAULT_BLOCK_SIZE):
+    """_upload_file 的异步版本（client为AsyncAPIClient）"""
+    encoder = MultipartEncoder({'kb_id': dataset_id}, 'file', file_path, block_size=block_size,
+                               progress_callback=progress_callback, limiter=limiter)
+    response = await client.post('/v1/document/upload', data=encoder, headers=encoder.headers)
+    return response, encoder.sha256
+
+
+def _collect_files(directory, includes, excludes, recursive=True):
+    """按包含/排除的通配模式收集目录下的文件，模式同时匹配相对路径和文件名"""
+    import os
+    import fnmatch
+    
+    def matches(rel_path, patterns):
+        name = os.path.basename(rel_path)
+        return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+    
+    collected = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        if not recursive:
+            dirs[:] = []
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, directory).replace(os.sep, '/')
+            if includes and not matches(rel_path, includes):
+                continue
+            if excludes and matches(rel_path, excludes):
+                continue
+            collected.append(path)
+    return collected
+
+
+def _upload_result(file_path, size, response=None, error=None, elapsed=0.0, sha256=''):
+    """把单个文件的上传结果整理为报告行"""
+    if error is None and isinstance(response, dict) and response.get('code') == 0:
+        data = response.get('data') or [{}]
+        doc = data[0] if isinstance(data, list) and data else {}
+        return {'path': file_path, 'size': size, 'status': 'success', 'document_id': doc.get('id', ''),
+                'sha256': sha256, 'message': '', 'elapsed_ms': round(elapsed * 1000, 1)}
+    if error is None:
+        error = response.get('message', '未知错误') if isinstance(response, dict) else str(response)
+    return {'path': file_path, 'size': size, 'status': 'failed', 'document_id': '',
+            'sha256': '', 'message': str(error), 'elapsed_ms': round(elapsed * 1000, 1)}
+
+
+def _duplicate_result(file_path, size, sha256, document_id='', message=''):
+    """内容索引命中、无需上传的文件的报告行"""
+    return {'path': file_path, 'size': size, 'status': 'duplicate', 'document_id': document_id,
+            'sha256': sha256, 'message': message, 'elapsed_ms': 0.0}
+
+
+class _UploadProgress:
+    """批量上传进度显示：文件数、字节数和吞吐量（files/s、MB/s）"""
+    
+    def __init__(self, total_files, total_bytes, enabled=True):
+        import time
+        self.total_files = total_files
+        self.done_files = 0
+        self.failed_files = 0
+        self.started = time.perf_counter()
+        self._progress = None
+        if enabled:
+            from rich.progress import (Progress, BarColumn, DownloadColumn, TransferSpeedColumn,
+                                       TextColumn, TimeRemainingColumn)
+            from rich.console import Console
+            # 进度条输出到stderr，不干扰 --format json 等标准输出
+            self._progress = Progress(TextColumn("[bold blue]{task.description}"), BarColumn(),
+                                      DownloadColumn(), TransferSpeedColumn(),
+                                      TextColumn("{task.fields[files]}"), TimeRemainingColumn(),
+                                      console=Console(stderr=True))
+            self._task = self._progress.add_task("上传", total=total_bytes, files="")
+    
+    def __enter__(self):
+        if self._progress:
+            self._progress.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if self._progress:
+            self._progress.stop()
+    
+    def advance_bytes(self, nbytes):
+        if self._progress:
+            self._progress.update(self._task, advance=nbytes)
+    
+    def file_done(self, result):
+        import time
+        self.done_files += 1
+        if result['status'] != 'success':
+            self.failed_files += 1
+        if self._progress:
+            elapsed = max(time.perf_counter() - self.started, 1e-9)
+            self._progress.update(self._task, files=(
+                f"{self.done_files}/{self.total_files} 文件 "
+                f"{self.done_files / elapsed:.1f} files/s 失败 {self.failed_files}"))
+
+
+def _upload_many(client, dataset_id, paths, workers, engine, progress, on_result=None,
+                 limiter=None, block_size=DEFAULT_BLOCK_SIZE):
+    """用线程池或asyncio并发上传多个文件，按完成顺序回调on_result并返回全部结果"""
+    import os
+    import time
+    results = []
+    
+    def finish(result):
+        results.append(result)
+        progress.file_done(result)
+        if on_result:
+            on_result(result)
+    
+    def track(size):
+        """返回 (进度回调, 失败时补齐剩余字节的函数)"""
+        sent = [0]
+        
+        def callback(nbytes):
+            sent[0] += nbytes
+            progress.advance_bytes(nbytes)
+        
+        def settle():
+            if size > sent[0]:
+                progress.advance_bytes(size - sent[0])
+        return callback, settle
+    
+    if engine == 'async':
+        import asyncio
+        from async_api_client import AsyncAPIClient
+        
+        async def run_all():
+            async with AsyncAPIClient(max_concurrency=workers, client=client) as async_client:
+                async def upload_one(path):
+                    size = os.path.getsize(path)
+                    callback, settle = track(size)
+                    start = time.perf_counter()
+                    try:
+                        response, sha256 = await _upload_file_async(async_client, dataset_id, path, callback,
+                                                                    limiter, block_size)
+                        result = _upload_result(path, size, response, elapsed=time.perf_counter() - start,
+                                                sha256=sha256)
+                    except Exception as e:
+                        result = _upload_result(path, size, error=e, elapsed=time.perf_counter() - start)
+                    settle()
+                    finish(result)
+                
+                await asyncio.gather(*(upload_one(path) for path in paths))
+        
+        asyncio.run(run_all())
+        return results
+    
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    client.ensure_pool_size(workers)
+    
+    def upload_one(path):
+        size = os.path.getsize(path)
+        callback, settle = track(size)
+        start = time.perf_counter()
+        try:
+            response, sha256 = _upload_file(client, dataset_id, path, callback, limiter, block_size)
+            result = _upload_result(path, size, response, elapsed=time.perf_counter() - start,
+                                    sha256=sha256)
+        except Exception as e:
+            result = _upload_result(path, size, error=e, elapsed=time.perf_counter() - start)
+        settle()
+        return result
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(upload_one, path) for path in paths]
+        for future in as_completed(futures):
+            finish(future.result())
+    return results
+
+
+def _write_report(report_path, results):
+    """写入上传报告（.json 为JSON数组，其余为JSONL）"""
+    import json
+    with open(report_path, 'w', encoding='utf-8') as f:
+        if report_path.endswith('.json'):
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        else:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+@documents.command(name='upload-dir')
+@click.argument('dataset_id')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--include', 'includes', multiple=True, help='包含的文件通配模式，可多次指定（如 "*.pdf"）')
+@click.option('--exclude', 'excludes', multiple=True, help='排除的文件通配模式，可多次指定')
+@click.option('--recursive/--no-recursive', default=True, help='是否递归子目录')
+@click.option('--workers', type=int, default=8, help='并发上传数')
+@click.option('--engine', type=click.Choice(['thread', 'async']), default='thread', help='并发方式：线程池或asyncio')
+@click.option('--report', 'report_path', help='上传报告文件（.json 或 .jsonl）')
+@click.option('--no-progress', is_flag=True, help='不显示进度条')
+@click.option('--limit-rate', help='总上传带宽上限（字节/秒，支持 K/M/G 后缀，如 10M）')
+@click.option('--block-size', type=int, default=DEFAULT_BLOCK_SIZE, help='流式上传的读块大小（字节）')
+@click.option('--resume', is_flag=True, help='跳过上传日志中已成功且未修改的文件，只上传失败或新增的文件')
+@click.option('--journal', 'journal_path', default=DEFAULT_JOURNAL_PATH, show_default=True,
+              help='上传日志和内容索引（SQLite）路径')
+@click.option('--no-dedup', is_flag=True, help='不按内容哈希跳过知识库中已有的文件')
+@click.option('--hash-workers', type=int, help='计算内容哈希的进程数（默认为CPU核数）')
+@click.option('--format', 'output_format', default='table', 
+              type=click.Choice(['table', 'json', 'yaml']), 
+              help='输出格式')
+def upload_dir(dataset_id, directory, includes, excludes, recursive, workers, engine,
+               report_path, no_progress, limit_rate, block_size, resume, journal_path,
+               no_dedup, hash_workers, output_format):
+    """并发上传目录中的文件到知识库（dataset）
+
+    每个文件的上传结果（大小、mtime、SHA-256、文档ID）都会写入上传日志，
+    中断后使用 --resume 重新运行即可从断点继续。上传前用进程池计算所有
+    文件的SHA-256并查询内容索引，跳过知识库中已有的和本批次内重复的文件。
+    """
+    import time
+    try:
+        client = APIClient()
+        formatter = OutputFormatter(output_format)
+        
+        # 检查是否有API token
+        if not _ensure_token(client, formatter):
+            return
+        
+        rate = parse_rate(limit_rate)
+        limiter = BandwidthLimiter(rate) if rate else None
+        
+        paths = _collect_files(directory, includes, excludes, recursive)
+        if not paths:
+            formatter.print_warning(f"目录 {directory} 中没有匹配的文件")
+            return
+        
+        import os
+        journal = IngestJournal(journal_path)
+        skipped = 0
+        if resume:
+            completed = journal.completed(dataset_id)
+            pending = []
+            for path in paths:
+                entry = completed.get(os.path.abspath(path))
+                if entry and journal.is_unchanged(dataset_id, path, entry):
+                    skipped += 1
+                else:
+                    pending.append(path)
+            paths = pending
+            formatter.print_info(f"上传日志中已完成 {skipped} 个文件，剩余 {len(paths)} 个")
+        
+        index = ContentIndex(journal_path)
+        duplicates = []
+        if not no_dedup and paths:
+            hashes = hash_files(paths, hash_workers)
+            known = index.lookup_many(dataset_id, hashes.values())
+            first_seen = {}
+            pending = []
+            for path in paths:
+                sha256 = hashes.get(path)
+                if sha256 in known:
+                    duplicates.append(_duplicate_result(path, os.path.getsize(path), sha256, known[sha256],
+                                                        "知识库中已有内容相同的文档"))
+                elif sha256 in first_seen:
+                    duplicates.append(_duplicate_result(path, os.path.getsize(path), sha256,
+                                                        message=f"与 {first_seen[sha256]} 内容相同"))
+                else:
+                    if sha256:
+                        first_seen[sha256] = path
+                    pending.append(path)
+            paths = pending
+            if duplicates:
+                formatter.print_info(f"内容索引命中 {len(duplicates)} 个重复文件，跳过上传")
+        
+        def record(result):
+            stat = os.stat(result['path'])
+            # 命中已有文档的重复文件按成功记录，--resume 时直接跳过
+            status = 'success' if result['status'] == 'duplicate' and result['document_id'] else result['status']
+            journal.record(dataset_id, result['path'], status, stat.st_size, stat.st_mtime,
+                           result['sha256'], result['document_id'], result['message'])
+            if result['status'] == 'success':
+                index.add(dataset_id, result['sha256'], result['document_id'], stat.st_size,
+                          os.path.abspath(result['path']))
+        
+        for result in duplicates:
+            record(result)
+        
+        total_bytes = sum(os.path.getsize(p) for p in paths)
+        formatter.print_info(f"共 {len(paths)} 个文件，{total_bytes / 1024 / 1024:.2f} MB，并发 {workers}")
+        
+        start = time.perf_counter()
+        try:
+            with _UploadProgress(len(paths), total_bytes, enabled=not no_progress and bool(paths)) as progress:
+                results = _upload_many(client, dataset_id, paths, workers, engine, progress,
+                                       on_result=record, limiter=limiter, block_size=block_size)
+        finally:
+            journal.close()
+            index.close()
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        
+        if report_path:
+            _write_report(report_path, duplicates + results)
+        
+        succeeded = [r for r in results if r['status'] == 'success']
+        failed = [r for r in results if r['status'] == 'failed']
+        uploaded_bytes = sum(r['size'] for r in succeeded)
+        summary = {
+            'total': len(results),
+            'success': len(succeeded),
+            'failed': len(failed),
+            'skipped': skipped,
+            'duplicates': len(duplicates),
+            'elapsed_s': round(elapsed, 2),
+            'files_per_s': round(len(results) / elapsed, 2),
+            'mb_per_s': round(uploaded_bytes / 1024 / 1024 / elapsed, 2),
+        }
+        
+        if output_format == 'table':
+            formatter.print_rich_table([summary], "上传汇总")
+            if failed:
+                formatter.print_rich_table([{'path': r['path'], 'message': r['message']} for r in failed],
+                                           f"上传失败的文件 ({len(failed)} 个)")
+        else:
+            print(formatter.format_output({'summary': summary, 'failed': failed}))
+        
+        if failed:
+            formatter.print_error(f"{len(failed)} 个文件上传失败")
+        else:
+            formatter.print_success(f"全部 {len(succeeded)} 个文件上传成功")
+    except Exception as e:
+        formatter = OutputFormatter()
+        formatter.print_error(f"目录上传失败: {e}")
+
+
+@documents.command(name='index')
+@click.argument('dataset_id')
+@click.option('--journal', 'journal_path', default=DEFAULT_JOURNAL_PATH, show_default=True,
+              help='上传日志和内容索引（SQLite）路径')
+@click.option('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help='拉取文档列表的分页大小')
+@click.option('--format', 'output_format', default='table', 
+              type=click.Choice(['table', 'json', 'yaml']), 
+              help='输出格式')
+def index_documents(dataset_id, journal_path, page_size, output_format):
+    """按服务端文档列表重建知识库的内容索引
+
+    把上传日志中的成功记录补充进索引，并删除服务端已不存在的文档，
+    避免去重时跳过实际已被删除的文件。
+    """
+    try:
+        client = APIClient()
+        formatter = OutputFormatter(output_format)
+        
+        # 检查是否有API token
+        if not _ensure_token(client, formatter):
+            return
+        
+        existing_ids = {doc.get('id') for doc in iter_documents(client, dataset_id, page_size=page_size)
+                        if doc.get('id')}
+        
+        with ContentIndex(journal_path) as index:
+            imported = index.import_journal(dataset_id)
+            removed = index.reconcile(dataset_id, existing_ids)
+            summary = {
+                'dataset_id': dataset_id,
+                'server_documents': len(existing_ids),
+                'imported': imported,
+                'removed': removed,
+                'indexed': index.count(dataset_id),
+            }
+        
+        if output_format == 'table':
+            formatter.print_rich_table([summary], "内容索引")
+        else:
+            print(formatter.format_output(summary))
+    except Exception as e:
+        formatter = OutputFormatter()
+        formatter.print_error(f"重建内容索引失败: {e}")
+
+
+def _diff_directory(dataset_id, paths, remote_docs, journal, content_index, hash_workers=None):
+    """按文件名对比本地文件和知识库文档，返回同步计划
+
+    计划包含 new（知识库中没有同名文档）、changed（[(路径, 旧文档)]）、
+    unchanged（路径）和 ambiguous（本地有多个同名文件，无法对应）。
+    上传日志中有记录的文件先比较大小和mtime，只有mtime变化时才计算哈希；
+    没有记录的文件（如由其他客户端上传）计算哈希，只有内容索引确认该哈希
+    属于这个文档时才视为未修改并补记到上传日志，下次同步直接命中；服务端
+    文档不含内容哈希，无法确认时按已修改处理（重新上传）。
+    """
+    import os
+    remote_by_name = {}
+    for doc in remote_docs:
+        name = doc.get('name')
+        current = remote_by_name.get(name)
+        # 同名文档取最近更新的一个
+        if current is None or (doc.get('update_time') or 0) > (current.get('update_time') or 0):
+            remote_by_name[name] = doc
+    
+    by_name = {}
+    for path in paths:
+        by_name.setdefault(os.path.basename(path), []).append(path)
+    
+    plan = {'new': [], 'changed': [], 'unchanged': [], 'ambiguous': []}
+    completed = journal.completed(dataset_id)
+    unknown = []
+    for name, same_name in by_name.items():
+        if len(same_name) > 1:
+            plan['ambiguous'].extend(same_name)
+            continue
+        path = same_name[0]
+        doc = remote_by_name.get(name)
+        if doc is None:
+            plan['new'].append(path)
+            continue
+        entry = completed.get(os.path.abspath(path))
+        if entry and entry.get('document_id') == doc.get('id'):
+            if journal.is_unchanged(dataset_id, path, entry):
+                plan['unchanged'].append(path)
+            else:
+                plan['changed'].append((path, doc))
+        elif isinstance(doc.get('size'), int) and doc['size'] != os.path.getsize(path):
+            plan['changed'].append((path, doc))
+        else:
+            unknown.append((path, doc))
+    
+    if unknown:
+        hashes = hash_files([path for path, _ in unknown], hash_workers)
+        known = content_index.lookup_many(dataset_id, hashes.values())
+        for path, doc in unknown:
+            sha256 = hashes.get(path)
+            if not sha256 or known.get(sha256) != doc.get('id'):
+                plan['changed'].append((path, doc))
+                continue
+            stat = os.stat(path)
+            journal.record(dataset_id, path, 'success', stat.st_size, stat.st_mtime, sha256, doc['id'], '')
+            plan['unchanged'].append(path)
+    return plan
+
+
+@documents.command()
+@click.argument('dataset_id')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--include', 'includes', multiple=True, help='包含的文件通配模式，可多次指定（如 "*.pdf"）')
+@click.option('--exclude', 'excludes', multiple=True, help='排除的文件通配模式，可多次指定')
+@click.option('--recursive/--no-recursive', default=True, help='是否递归子目录')
+@click.option('--delete', 'delete_removed', is_flag=True, help='删除知识库中本地已不存在的同名文档')
+@click.option('--parse/--no-parse', 'start_parse', default=True, help='是否对新上传的文档启动解析')
+@click.option('--dry-run', is_flag=True, help='只显示同步计划，不实际上传或删除')
+@click.option('--full-refresh', is_flag=True, help='重新拉取完整文档列表，而不是增量刷新本地清单')
+@click.option('--workers', type=int, default=8, help='并发上传数')
+@click.option('--batch-size', type=int, default=100, help='每个删除/解析请求包含的文档数')
+@click.option('--hash-workers', type=int, help='计算内容哈希的进程数（默认为CPU核数）')
+@click.option('--no-progress', is_flag=True, help='不显示进度条')
+@click.option('--journal', 'journal_path', default=DEFAULT_JOURNAL_PATH, show_default=True,
+              help='上传日志、内容索引和文档清单（SQLite）路径')
+@click.option('--format', 'output_format', default='table', 
+              type=click.Choice(['table', 'json', 'yaml']), 
+              help='输出格式')
+def sync(dataset_id, directory, includes, excludes, recursive, delete_removed, start_parse, dry_run,
+         full_refresh, workers, batch_size, hash_workers, no_progress, journal_path, output_format):
+    """把本地目录增量同步到知识库
+
+    按文件名对应本地文件和知识库文档，用大小、mtime和内容哈希判断是否修改：
+    新文件上传，修改过的文件重新上传（成功后删除旧文档）并启动解析，
+    --delete 时删除本地已不存在的文档。知识库的文档清单缓存在本地，
+    只增量刷新，没有变化时同步只需一次列表请求。
+    """
+    import os
+    import time
+    import fnmatch
+    try:
+        client = APIClient()
+        formatter = OutputFormatter(output_format)
+        
+        api_config = client.config.get('api', {})
+        auth_token = api_config.get('auth_token')
+        api_token = api_config.get('api_token')
+        if not auth_token and not api_token:
+            formatter.print_error("未找到API令牌，请先登录")
+            return
+        
+        paths = _collect_files(directory, includes, excludes, recursive)
+        
+        # 列表接口使用Bearer api_token
+        client.session.headers['Authorization'] = f"Bearer {api_token}" if api_token else auth_token
+        start = time.perf_counter()
+        with DocumentIndex(journal_path) as doc_index:
+            _refresh_document_index(client, doc_index, dataset_id, full=full_refresh)
+            remote_docs = doc_index.get_all(dataset_id).values()
+        
+        journal = IngestJournal(journal_path)
+        content_index = ContentIndex(journal_path)
+        try:
+            plan = _diff_directory(dataset_id, paths, remote_docs, journal, content_index, hash_workers)
+            
+            local_names = {os.path.basename(path) for path in paths}
+            removed = []
+            for doc in remote_docs:
+                name = doc.get('name') or ''
+                if name in local_names or not doc.get('id'):
+                    continue
+                # 只处理符合包含/排除模式的文档，避免误删同步范围以外的文档
+                if includes and not any(fnmatch.fnmatch(name, p) for p in includes):
+                    continue
+                if excludes and any(fnmatch.fnmatch(name, p) for p in excludes):
+                    continue
+                removed.append(doc)
+            
+            for path in plan['ambiguous']:
+                formatter.print_warning(f"存在多个同名文件，跳过: {path}")
+            
+            if dry_run:
+                rows = ([{'action': 'upload', 'path': path, 'document_id': ''} for path in plan['new']]
+                        + [{'action': 'reupload', 'path': path, 'document_id': doc['id']}
+                           for path, doc in plan['changed']]
+                        + [{'action': 'delete' if delete_removed else 'remote-only', 'path': doc.get('name'),
+                            'document_id': doc['id']} for doc in removed])
+                if output_format == 'table':
+                    if rows:
+                        formatter.print_rich_table(rows, "同步计划")
+                    formatter.print_info(f"新增 {len(plan['new'])}，修改 {len(plan['changed'])}，"
+                                         f"未变 {len(plan['unchanged'])}，仅远端 {len(removed)}")
+                else:
+                    print(formatter.format_output({'dry_run': True, 'unchanged': len(plan['unchanged']),
+                                                   'actions': rows}))
+                return
+            
+            # 上传和解析接口优先使用auth_token
+            if not _ensure_token(client, formatter):
+                return
+            
+            def record(result):
+                stat = os.stat(result['path'])
+                journal.record(dataset_id, result['path'], result['status'], stat.st_size, stat.st_mtime,
+                               result['sha256'], result['document_id'], result['message'])
+                if result['status'] == 'success':
+                    content_index.add(dataset_id, result['sha256'], result['document_id'], stat.st_size,
+                                      os.path.abspath(result['path']))
+            
+            uploads = plan['new'] + [path for path, _ in plan['changed']]
+            results = []
+            if uploads:
+                total_bytes = sum(os.path.getsize(p) for p in uploads)
+                with _UploadProgress(len(uploads), total_bytes, enabled=not no_progress) as progress:
+                    results = _upload_many(client, dataset_id, uploads, workers, 'thread', progress,
+                                           on_result=record)
+            uploaded = {r['path']: r for r in results if r['status'] == 'success'}
+            failed = [{'path': r['path'], 'action': 'upload', 'message': r['message']}
+                      for r in results if r['status'] != 'success']
+            
+            # 修改过的文件只有新版本上传成功后才删除旧文档
+            stale_ids = [doc['id'] for path, doc in plan['changed'] if path in uploaded]
+            delete_ids = stale_ids + ([doc['id'] for doc in removed] if delete_removed else [])
+            deleted = []
+            if delete_ids:
+                outcome = run_batches(_delete_sender(client, f'/api/v1/datasets/{dataset_id}/documents', 'ids'),
+                                      delete_ids, batch_size, min(workers, 4),
+                                      pending=_existing_documents(client, dataset_id))
+                deleted = [doc_id for doc_id in delete_ids if outcome.get(doc_id) is None]
+                failed.extend({'path': doc_id, 'action': 'delete', 'message': outcome[doc_id]}
+                              for doc_id in delete_ids if outcome.get(doc_id))
+                content_index.remove_documents(dataset_id, deleted)
+                with DocumentIndex(journal_path) as doc_index:
+                    doc_index.remove(dataset_id, deleted)
+            
+            parsed = 0
+            new_ids = [r['document_id'] for r in uploaded.values() if r['document_id']]
+            if start_parse and new_ids:
+                headers = {'Authorization': auth_token} if auth_token else None
+                outcome = run_batches(_parse_sender(client, headers), new_ids, batch_size, min(workers, 4))
+                parsed = sum(1 for doc_id in new_ids if outcome.get(doc_id) is None)
+                failed.extend({'path': doc_id, 'action': 'parse', 'message': outcome[doc_id]}
+                              for doc_id in new_ids if outcome.get(doc_id))
+        finally:
+            journal.close()
+            content_index.close()
+        
+        summary = {
+            'local': len(paths),
+            'unchanged': len(plan['unchanged']),
+            'new': sum(1 for path in plan['new'] if path in uploaded),
+            'changed': sum(1 for path, _ in plan['changed'] if path in uploaded),
+            'deleted': len(deleted),
+            'remote_only': 0 if delete_removed else len(removed),
+            'parsed': parsed,
+            'failed': len(failed),
+            'elapsed_s': round(time.perf_counter() - start, 2),
+        }
+        if output_format == 'table':
+            formatter.print_rich_table([summary], f"同步 {directory} -> {dataset_id}")
+            if failed:
+                formatter.print_rich_table(failed, f"失败的操作 ({len(failed)} 个)")
+        else:
+            print(formatter.format_output({'summary': summary, 'failed': failed}))
+        
+        if failed:
+            formatter.print_error(f"{len(failed)} 个操作失败")
+        elif not uploads and not deleted:
+            formatter.print_success("知识库已是最新")
+        else:
+            formatter.print_success("同步完成")
+    except Exception as e:
+        formatter = OutputFormatter()
+        formatter.print_error(f"目录同步失败: {e}")
+
+
 @documents.command()
 @click.argument('dataset_id')
 @click.argument('document_id')
@@ -331,14 +1129,135 @@ def parse(dataset_id, document_id, output_format):
         formatter.print_error(f"启动文档解析失败: {e}")
 
 
+# 不超过该数量的ID逐个按服务端 id 过滤查询，更多时改用本地文档索引
+_STATUS_BY_ID_LIMIT = 32
+
+# 文档索引水位相对扫描开始时最新 update_time 的回退量（update_time 为毫秒时间戳）
+_WATERMARK_MARGIN = 10 * 1000
+
+# 解析已结束的文档状态
+_FINISHED_RUN_STATES = ('DONE', 'FAIL', 'CANCEL')
+
+
+def _status_row(doc):
+    """提取文档的解析状态字段"""
+    return {
+        'id': doc.get('id'),
+        'name': doc.get('name'),
+        'run': doc.get('run'),
+        'status': doc.get('status'),
+        'progress': doc.get('progress', 0),
+        'progress_msg': doc.get('progress_msg', ''),
+        'chunk_count': doc.get('chunk_count', 0),
+        'token_count': doc.get('token_count', 0)
+    }
+
+
+def _lookup_by_id(client, dataset_id, document_ids, workers=8):
+    """用文档列表接口的 id 过滤并发查询文档，返回 {文档ID: 文档}，未找到的不在结果中
+
+    只有资源不存在（HTTP 404 或错误码404）视为未找到，认证、网络、熔断等
+    其他错误照常抛出。
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    endpoint = f'/api/v1/datasets/{dataset_id}/documents'
+    
+    def fetch(document_id):
+        try:
+            response = client.get(endpoint, params={'id': document_id}, use_cache=False)
+        except NotFoundError:
+            return None
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+        docs, _ = extract_documents(response)
+        # 不支持 id 过滤的服务端会返回普通的一页，这里按ID再筛一次
+        return next((doc for doc in docs if doc.get('id') == document_id), None)
+    
+    client.ensure_pool_size(workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        docs = executor.map(fetch, document_ids)
+        return {doc['id']: doc for doc in docs if doc}
+
+
+def _refresh_document_index(client, index, dataset_id, page_size=DEFAULT_PAGE_SIZE, full=False):
+    """同步本地文档索引，返回本次拉取到的文档
+
+    按 update_time 倒序翻页：首次同步拉取完整列表（并发翻页）；之后遇到早于
+    水位的文档即停止，只拉取上次同步后更新过的文档。翻页按偏移进行，扫描期间
+    排序会随文档更新而变化，个别文档可能被跳过，因此水位只前移到扫描开始时
+    （第一页）最新的 update_time 减去 _WATERMARK_MARGIN，扫描期间更新过或可能
+    被跳过的文档下次刷新时会重新拉取。增量同步看不到其他客户端删除的文档，
+    full=True 时拉取完整列表并清除这些文档。
+    """
+    endpoint = f'/api/v1/datasets/{dataset_id}/documents'
+    watermark = None if full else index.watermark(dataset_id)
+    params = {'orderby': 'update_time', 'desc': 'true'}
+    if watermark is None:
+        pages = iter_pages(client, endpoint, params=params, page_size=page_size)
+    else:
+        pages = iter_pages(client, endpoint, params=params, page_size=page_size, prefetch=1)
+    fetched = []
+    scan_start = None
+    for docs in pages:
+        page_latest = index.upsert(dataset_id, docs)
+        if not fetched:
+            scan_start = page_latest
+        fetched.extend(docs)
+        if watermark is not None and any(isinstance(doc.get('update_time'), (int, float))
+                                         and doc['update_time'] < watermark for doc in docs):
+            pages.close()
+            break
+    if full:
+        index.remove(dataset_id, set(index.get_all(dataset_id)) - {doc.get('id') for doc in fetched})
+    index.mark_synced(dataset_id, scan_start - _WATERMARK_MARGIN if scan_start is not None else None)
+    return fetched
+
+
+def _lookup_documents(client, index, dataset_id, ids):
+    """按ID查找文档，返回 {文档ID: 文档}
+
+    少量ID用服务端 id 过滤直接查询；ID较多或服务端查不到时增量刷新本地索引后读取。
+    增量刷新可能跳过个别文档，刷新后仍找不到的ID、以及本次刷新中没有出现的
+    未结束文档（每次至多 _STATUS_BY_ID_LIMIT 个，轮流核对）再按ID分批查询，
+    不完全依赖本地索引。
+    """
+    found = {}
+    if len(ids) <= _STATUS_BY_ID_LIMIT:
+        found = _lookup_by_id(client, dataset_id, ids)
+        index.upsert(dataset_id, found.values())
+    missing = [doc_id for doc_id in ids if doc_id not in found]
+    if missing:
+        refreshed = {doc.get('id') for doc in _refresh_document_index(client, index, dataset_id)}
+        found.update(index.get_many(dataset_id, missing))
+        unchanged = [doc_id for doc_id in missing if doc_id in found and doc_id not in refreshed
+                     and found[doc_id].get('run') not in _FINISHED_RUN_STATES]
+        verify = ([doc_id for doc_id in missing if doc_id not in found]
+                  + index.least_recently_verified(dataset_id, unchanged, _STATUS_BY_ID_LIMIT))
+        for start in range(0, len(verify), _STATUS_BY_ID_LIMIT):
+            chunk = verify[start:start + _STATUS_BY_ID_LIMIT]
+            docs = _lookup_by_id(client, dataset_id, chunk)
+            index.upsert(dataset_id, docs.values())
+            index.mark_verified(dataset_id, chunk)
+            found.update(docs)
+    return found
+
+
 @documents.command()
 @click.argument('dataset_id')
-@click.argument('document_id')
+@click.argument('document_ids', nargs=-1)
+@click.option('--ids-file', help='从文件读取文档ID（每行一个，- 表示标准输入）')
 @click.option('--format', 'output_format', default='table', 
               type=click.Choice(['table', 'json', 'yaml']), 
               help='输出格式')
-def status(dataset_id, document_id, output_format):
-    """查看文档解析状态"""
+def status(dataset_id, document_ids, ids_file, output_format):
+    """查看一个或多个文档的解析状态
+
+    少量ID直接用服务端 id 过滤查询；ID较多或服务端查不到时，使用增量刷新
+    的本地文档索引（~/.ragforge/ingest_journal.db），检查上千个文档只需
+    少量请求。
+    """
     try:
         client = APIClient()
         formatter = OutputFormatter(output_format)
@@ -352,51 +1271,230 @@ def status(dataset_id, document_id, output_format):
         # 使用API token设置认证头（Bearer格式）
         client.session.headers['Authorization'] = f"Bearer {api_token}"
         
-        # 获取文档列表，找到指定文档
-        response = client.get(f'/api/v1/datasets/{dataset_id}/documents')
+        ids = list(document_ids) + (read_ids(ids_file) if ids_file else [])
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            formatter.print_error("请指定文档ID")
+            return
+        
+        with DocumentIndex() as index:
+            found = _lookup_documents(client, index, dataset_id, ids)
         
-        docs = response.get('data', {}).get('docs', [])
-        target_doc = None
+        rows = [_status_row(found[doc_id]) for doc_id in ids if doc_id in found]
+        not_found = [doc_id for doc_id in ids if doc_id not in found]
         
-        for doc in docs:
-            if doc.get('id') == document_id:
-                target_doc = doc
-                break
+        # 格式化输出
+        if len(ids) == 1:
+            if rows:
+                if output_format == 'table':
+                    formatter.print_rich_table(rows, f"文档 {ids[0]} 解析状态")
+                else:
+                    print(formatter.format_output(rows[0]))
+        elif output_format == 'table':
+            formatter.print_rich_table(rows, f"{len(rows)} 个文档的解析状态")
+        else:
+            print(formatter.format_output(rows))
         
-        if not target_doc:
-            formatter.print_error(f"未找到文档 {document_id}")
+        if not_found:
+            shown = ', '.join(not_found[:10]) + (' ...' if len(not_found) > 10 else '')
+            formatter.print_error(f"未找到文档 {shown}" if len(ids) == 1
+                                  else f"未找到 {len(not_found)} 个文档: {shown}")
+            
+    except Exception as e:
+        formatter = OutputFormatter()
+        formatter.print_error(f"获取文档解析状态失败: {e}")
+
+
+def _progress_bucket(row):
+    """把进度划分为10%一档，跨档才算状态变化"""
+    try:
+        return int(float(row.get('progress') or 0) * 10)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _next_interval(interval, changed, near_done, min_interval, max_interval):
+    """自适应轮询间隔：有变化或接近完成时回到最小间隔，否则逐步退避"""
+    if changed or near_done:
+        return min_interval
+    return min(interval * 1.5, max_interval)
+
+
+@documents.command()
+@click.argument('dataset_id')
+@click.argument('document_ids', nargs=-1)
+@click.option('--ids-file', help='从文件读取文档ID（每行一个，- 表示标准输入）')
+@click.option('--min-interval', type=float, default=1.0, help='最小轮询间隔（秒）')
+@click.option('--max-interval', type=float, default=30.0, help='最大轮询间隔（秒）')
+@click.option('--timeout', type=float, help='最长等待时间（秒），默认一直等到没有解析中的文档')
+@click.option('--format', 'output_format', default='table', 
+              type=click.Choice(['table', 'json', 'yaml', 'ndjson']), 
+              help='输出格式（ndjson 把每次状态变化输出为一行JSON）')
+def watch(dataset_id, document_ids, ids_file, min_interval, max_interval, timeout, output_format):
+    """跟踪知识库（或指定文档）的解析进度，直到没有解析中的文档
+
+    只输出状态变化（run 变化或进度跨过10%），无变化时轮询间隔逐步退避到
+    --max-interval，有变化或有文档进度超过90%时回到 --min-interval。
+    整个知识库按 update_time 增量刷新本地文档索引，每次轮询通常只需一个请求。
+    结束（或 Ctrl-C）时输出吞吐量统计。
+    """
+    import json
+    import time
+    try:
+        client = APIClient()
+        formatter = OutputFormatter(output_format)
+        
+        # 对于数据集相关API，使用Bearer格式的API token
+        api_token = client.config.get('api', {}).get('api_token')
+        if not api_token:
+            formatter.print_error("未找到API令牌，请先登录")
             return
         
-        # 提取解析状态信息
-        status_info = {
-            'id': target_doc.get('id'),
-            'name': target_doc.get('name'),
-            'run': target_doc.get('run'),
-            'status': target_doc.get('status'),
-            'progress': target_doc.get('progress', 0),
-            'progress_msg': target_doc.get('progress_msg', ''),
-            'chunk_count': target_doc.get('chunk_count', 0),
-            'token_count': target_doc.get('token_count', 0)
+        # 使用API token设置认证头（Bearer格式）
+        client.session.headers['Authorization'] = f"Bearer {api_token}"
+        
+        ids = list(dict.fromkeys(list(document_ids) + (read_ids(ids_file) if ids_file else [])))
+        index = DocumentIndex()
+        
+        def poll():
+            """返回 {文档ID: 状态行}；整个知识库时只返回本次有更新的文档"""
+            if ids:
+                docs = _lookup_documents(client, index, dataset_id, ids)
+            else:
+                docs = {doc['id']: doc for doc in _refresh_document_index(client, index, dataset_id)
+                        if doc.get('id')}
+            return {doc_id: _status_row(doc) for doc_id, doc in docs.items()}
+        
+        def report(row, previous):
+            event = dict(row, previous_run=previous.get('run') if previous else None,
+                         time=time.strftime('%H:%M:%S'))
+            if output_format == 'ndjson':
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+                return
+            progress = float(row.get('progress') or 0) * 100
+            run = row.get('run')
+            if event['previous_run'] != run:
+                run = f"{event['previous_run'] or '-'} -> {run}"
+            line = (f"[{event['time']}] {row.get('name') or row['id']} ({row['id']}): {run} {progress:.0f}% "
+                    f"chunks={row.get('chunk_count', 0)} tokens={row.get('token_count', 0)}")
+            if row.get('progress_msg'):
+                line += f"  {str(row['progress_msg']).strip().splitlines()[-1][:80]}"
+            formatter.console.print(line, style="red" if row.get('run') == 'FAIL' else None,
+                                    highlight=False)
+        
+        start = time.monotonic()
+        if ids:
+            state = poll()
+        else:
+            # 整个知识库：首轮完整刷新本地索引并从中读取完整状态，之后只处理增量；
+            # 增量刷新不会清除服务端已删除的文档，残留的解析中文档会让跟踪无法结束
+            _refresh_document_index(client, index, dataset_id, full=True)
+            state = {doc_id: _status_row(doc) for doc_id, doc in index.get_all(dataset_id).items()}
+        missing = [doc_id for doc_id in ids if doc_id not in state]
+        if missing:
+            formatter.print_warning(f"未找到 {len(missing)} 个文档: {', '.join(missing[:10])}")
+        initial = {doc_id: dict(row) for doc_id, row in state.items()}
+        polls = 1
+        interval = min_interval
+        
+        def running():
+            return [row for row in state.values() if row.get('run') == 'RUNNING']
+        
+        if output_format != 'ndjson':
+            formatter.print_info(f"跟踪 {len(state)} 个文档，解析中 {len(running())} 个")
+        
+        try:
+            while running():
+                if timeout is not None and time.monotonic() - start >= timeout:
+                    formatter.print_warning(f"等待超时（{timeout:.0f} 秒）")
+                    break
+                time.sleep(interval)
+                polls += 1
+                changed = False
+                for doc_id, row in poll().items():
+                    previous = state.get(doc_id)
+                    if previous is None:
+                        initial.setdefault(doc_id, dict(row, run='UNSTART', chunk_count=0, token_count=0))
+                    if (previous is None or previous.get('run') != row.get('run')
+                            or _progress_bucket(previous) != _progress_bucket(row)):
+                        report(row, previous)
+                        changed = True
+                    state[doc_id] = row
+                near_done = any(float(row.get('progress') or 0) >= 0.9 for row in running())
+                interval = _next_interval(interval, changed, near_done, min_interval, max_interval)
+        except KeyboardInterrupt:
+            formatter.print_warning("已中断")
+        finally:
+            index.close()
+        
+        minutes = max(time.monotonic() - start, 1e-9) / 60
+        finished = [doc_id for doc_id, row in state.items()
+                    if row.get('run') == 'DONE' and initial.get(doc_id, {}).get('run') != 'DONE']
+        chunks = sum(max(0, (row.get('chunk_count') or 0) - (initial.get(doc_id, {}).get('chunk_count') or 0))
+                     for doc_id, row in state.items())
+        tokens = sum(max(0, (row.get('token_count') or 0) - (initial.get(doc_id, {}).get('token_count') or 0))
+                     for doc_id, row in state.items())
+        counts = {}
+        for row in state.values():
+            counts[row.get('run')] = counts.get(row.get('run'), 0) + 1
+        stats = {
+            'documents': len(state),
+            'done': counts.get('DONE', 0),
+            'failed': counts.get('FAIL', 0),
+            'running': counts.get('RUNNING', 0),
+            'finished_during_watch': len(finished),
+            'elapsed_s': round(minutes * 60, 1),
+            'polls': polls,
+            'docs_per_min': round(len(finished) / minutes, 2),
+            'chunks_per_min': round(chunks / minutes, 2),
+            'tokens_per_min': round(tokens / minutes, 2),
         }
         
-        # 格式化输出
-        if output_format == 'table':
-            formatter.print_rich_table([status_info], f"文档 {document_id} 解析状态")
+        if output_format == 'ndjson':
+            print(json.dumps({'summary': stats}, ensure_ascii=False), flush=True)
         else:
-            print(formatter.format_output(status_info))
+            print(formatter.format_output(stats))
             
     except Exception as e:
         formatter = OutputFormatter()
-        formatter.print_error(f"获取文档解析状态失败: {e}")
+        formatter.print_error(f"跟踪解析进度失败: {e}")
+
+
+def _parse_sender(client, headers=None):
+    """返回提交一批文档解析的函数，成功返回None，被拒绝时返回错误信息"""
+    def send(batch):
+        result = client.post('/v1/document/run', json_data={
+            "doc_ids": batch,
+            "run": "1"  # TaskStatus.RUNNING = "1"
+        }, headers=headers)
+        if result is True or (isinstance(result, dict) and result.get('code') == 0):
+            return None
+        return result.get('message', '未知错误') if isinstance(result, dict) else str(result)
+    return send
+
+
+def _submit_parse(client, doc_ids, headers=None):
+    """提交一批文档解析，返回 {文档ID: 错误信息}，成功的为None
+
+    /v1/document/run 接受ID列表，但只要有一个文档被拒绝整批都会报错，
+    此时二分重试以定位被拒绝的文档（见 utils.batching.submit_with_bisect）。
+    """
+    return submit_with_bisect(_parse_sender(client, headers), doc_ids)
 
 
 @documents.command()
 @click.argument('dataset_id')
+@click.option('--batch-size', type=int, default=100, help='每个解析请求包含的文档数')
+@click.option('--workers', type=int, default=4, help='并发提交的批次数')
 @click.option('--format', 'output_format', default='table', 
               type=click.Choice(['table', 'json', 'yaml']), 
               help='输出格式')
-def parse_all(dataset_id, output_format):
-    """批量启动所有未解析文档的解析"""
+def parse_all(dataset_id, batch_size, workers, output_format):
+    """批量启动所有未解析文档的解析
+
+    未解析文档按 --batch-size 分批并发提交，批次被拒绝时逐步拆分，
+    单个文档出错不影响同批的其他文档。
+    """
     try:
         client = APIClient()
         formatter = OutputFormatter(output_format)
@@ -415,70 +1513,393 @@ def parse_all(dataset_id, output_format):
         if api_token:
             client.session.headers['Authorization'] = f"Bearer {api_token}"
         
-        response = client.get(f'/api/v1/datasets/{dataset_id}/documents')
-        docs = response.get('data', {}).get('docs', [])
+        # 筛选未解析的文档（遍历全部分页）
+        total = 0
+        unparsed_docs = []
+        for doc in iter_documents(client, dataset_id):
+            total += 1
+            if doc.get('run') == 'UNSTART':
+                unparsed_docs.append({'id': doc.get('id'), 'name': doc.get('name')})
         
-        if not docs:
+        if not total:
             formatter.print_error(f"数据集 {dataset_id} 中没有文档")
             return
         
-        # 筛选未解析的文档
-        unparsed_docs = [doc for doc in docs if doc.get('run') == 'UNSTART']
-        
         if not unparsed_docs:
             formatter.print_success("所有文档都已开始解析或已完成")
             return
         
-        # 恢复使用auth_token进行解析API调用
-        client.session.headers['Authorization'] = auth_token
+        # 解析API使用auth_token，按请求传入，不影响并发中的其他请求
+        headers = {'Authorization': auth_token}
+        batch_size = max(1, batch_size)
+        doc_ids = [doc['id'] for doc in unparsed_docs]
+        batch_count = (len(doc_ids) + batch_size - 1) // batch_size
+        formatter.print_info(f"共 {len(doc_ids)} 个未解析文档，分 {batch_count} 批提交，并发 {workers}")
         
         # 启动解析
+        client.ensure_pool_size(workers)
+        outcome = run_batches(_parse_sender(client, headers), doc_ids, batch_size, workers)
+        
         results = []
         for doc in unparsed_docs:
-            doc_id = doc.get('id')
-            doc_name = doc.get('name')
-            
-            try:
-                # 使用正确的API格式
-                parse_data = {
-                    "doc_ids": [doc_id],
-                    "run": "1"  # TaskStatus.RUNNING = "1"
-                }
-                result = client.post('/v1/document/run', json_data=parse_data)
-                
-                if result.get('code') == 0:
-                    results.append({
-                        'id': doc_id,
-                        'name': doc_name,
-                        'status': '启动成功',
-                        'message': '解析已启动'
-                    })
-                else:
-                    results.append({
-                        'id': doc_id,
-                        'name': doc_name,
-                        'status': '启动失败',
-                        'message': result.get('message', '未知错误')
-                    })
-            except Exception as e:
-                results.append({
-                    'id': doc_id,
-                    'name': doc_name,
-                    'status': '启动失败',
-                    'message': str(e)
-                })
+            error = outcome.get(doc['id'])
+            results.append({
+                'id': doc['id'],
+                'name': doc['name'],
+                'status': '启动失败' if error else '启动成功',
+                'message': error or '解析已启动'
+            })
+        failed = [r for r in results if r['status'] == '启动失败']
         
         # 格式化输出
         if output_format == 'table':
-            formatter.print_rich_table(results, f"批量解析结果 ({len(results)} 个文档)")
+            summary = {'total': len(results), 'success': len(results) - len(failed),
+                       'failed': len(failed), 'batches': batch_count}
+            formatter.print_rich_table([summary], f"批量解析结果 ({len(results)} 个文档)")
+            if failed:
+                formatter.print_rich_table(failed, f"启动失败的文档 ({len(failed)} 个)")
         else:
             print(formatter.format_output(results))
+        
+        if failed:
+            formatter.print_error(f"{len(failed)} 个文档启动解析失败")
             
     except Exception as e:
         formatter = OutputFormatter()
         formatter.print_error(f"批量启动解析失败: {e}")
 
 
+def _probe_retrieval(client, dataset_id, document_id, question):
+    """对单个文档执行一次探测检索，返回命中的块数"""
+    response = client.post('/api/v1/retrieval', json_data={
+        'question': question,
+        'dataset_ids': [dataset_id],
+        'document_ids': [document_id],
+        'top_k': 1,
+    })
+    data = response.get('data') if isinstance(response.get('data'), dict) else response
+    return len(data.get('chunks') or [])
+
+
+@documents.command()
+@click.argument('dataset_id')
+@click.argument('paths', nargs=-1, required=True)
+@click.option('--include', 'includes', multiple=True, help='目录中要包含的文件通配模式，可多次指定')
+@click.option('--exclude', 'excludes', multiple=True, help='目录中要排除的文件通配模式，可多次指定')
+@click.option('--upload-workers', type=int, default=8, help='上传阶段并发数')
+@click.option('--parse-batch-size', type=int, default=32, help='解析阶段每批提交的文档数')
+@click.option('--parse-workers', type=int, default=2, help='解析阶段并发提交的批次数')
+@click.option('--watch-workers', type=int, default=1,
+              help='等待阶段并发轮询的线程数，每个线程轮询各自接收的文档')
+@click.option('--verify-workers', type=int, default=4, help='验证阶段并发数')
+@click.option('--queue-size', type=int, default=256, help='阶段之间队列的容量，队列满时上游阶段等待')
+@click.option('--min-interval', type=float, default=1.0, help='等待阶段的最小轮询间隔（秒）')
+@click.option('--max-interval', type=float, default=15.0, help='等待阶段的最大轮询间隔（秒）')
+@click.option('--timeout', type=float, help='每个文档从上传完成起等待解析完成的最长时间（秒）')
+@click.option('--probe', help='验证阶段对每个文档执行的探测检索问题')
+@click.option('--report', 'report_path', help='每个文档的处理结果（.json 或 .jsonl）')
+@click.option('--format', 'output_format', default='table', 
+              type=click.Choice(['table', 'json', 'yaml']), 
+              help='输出格式')
+def ingest(dataset_id, paths, includes, excludes, upload_workers, parse_batch_size, parse_workers,
+           watch_workers, verify_workers, queue_size, min_interval, max_interval, timeout, probe, report_path,
+           output_format):
+    """上传 -> 解析 -> 等待 -> 验证 的流水线导入（PATHS 可以是文件或目录）
+
+    四个阶段同时运行，之间用有界队列衔接：先上传完的文档立即进入解析批次，
+    解析完成的文档立即验证（chunk_count > 0，可选 --probe 探测检索）。
+    每个阶段有独立的并发数，结束时输出各阶段延迟的百分位数。
+    """
+    import os
+    import queue
+    import threading
+    import time
+    from utils.stats import latency_summary
+    try:
+        client = APIClient()
+        formatter = OutputFormatter(output_format)
+        
+        api_config = client.config.get('api', {})
+        auth_token = api_config.get('auth_token')
+        api_token = api_config.get('api_token')
+        if not auth_token and not api_token:
+            formatter.print_error("未找到API令牌，请先登录")
+            return
+        # 列表和检索接口使用Bearer api_token，上传和解析接口优先使用auth_token；
+        # 各阶段并发请求，认证头按请求传入而不修改会话
+        bearer = f"Bearer {api_token}" if api_token else auth_token
+        direct_headers = {'Authorization': auth_token or bearer}
+        client.session.headers['Authorization'] = bearer
+        
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(_collect_files(path, includes, excludes))
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                formatter.print_warning(f"路径不存在: {path}")
+        if not files:
+            formatter.print_warning("没有要导入的文件")
+            return
+        
+        formatter.print_info(f"共 {len(files)} 个文件：上传并发 {upload_workers}，解析批大小 {parse_batch_size}"
+                             f"（并发 {parse_workers}），等待并发 {watch_workers}，验证并发 {verify_workers}")
+        client.ensure_pool_size(upload_workers + parse_workers + watch_workers + verify_workers + 8)
+        
+        stop = object()
+        path_queue = queue.Queue(queue_size)
+        parse_queue = queue.Queue(queue_size)
+        watch_queue = queue.Queue(queue_size)
+        verify_queue = queue.Queue(queue_size)
+        records = []
+        latencies = {'upload': [], 'parse': [], 'wait': [], 'verify': [], 'total': []}
+        lock = threading.Lock()
+        aborted = threading.Event()
+        stage_errors = []
+        started = time.perf_counter()
+        timeout_message = f"等待解析超时（上传完成后 {timeout:g} 秒）" if timeout is not None else None
+        
+        def observe(stage, since):
+            with lock:
+                latencies[stage].append((time.perf_counter() - since) * 1000)
+        
+        def fail(record, stage, message):
+            record.update(status='failed', stage=stage, message=str(message))
+        
+        def handoff(stage_queue, item):
+            """放入下一阶段的队列；流水线中止（某个阶段的线程异常退出）时放弃并返回False"""
+            while not aborted.is_set():
+                try:
+                    stage_queue.put(item, timeout=0.2)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def uploader(content_index):
+            while True:
+                path = path_queue.get()
+                if path is stop:
+                    return
+                record = {'path': path, 'document_id': '', 'status': 'pending', 'stage': 'upload',
+                          'message': '', 'chunk_count': 0, '_started': time.perf_counter()}
+                with lock:
+                    records.append(record)
+                try:
+                    size = os.path.getsize(path)
+                    response, sha256 = _upload_file(client, dataset_id, path, headers=direct_headers)
+                    result = _upload_result(path, size, response, sha256=sha256)
+                except Exception as e:
+                    result = _upload_result(path, 0, error=e)
+                observe('upload', record['_started'])
+                if result['status'] != 'success':
+                    fail(record, 'upload', result['message'])
+                    continue
+                record.update(document_id=result['document_id'], _uploaded=time.perf_counter())
+                content_index.add(dataset_id, sha256, result['document_id'], size, os.path.abspath(path))
+                if not handoff(parse_queue, record):
+                    fail(record, 'parse', "流水线已中止")
+        
+        def parse_dispatcher():
+            while True:
+                first = parse_queue.get()
+                if first is stop:
+                    return
+                # 凑满一批或等待200ms后提交
+                batch, got_stop = [first], False
+                deadline = time.monotonic() + 0.2
+                while len(batch) < parse_batch_size:
+                    try:
+                        item = parse_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is stop:
+                        got_stop = True
+                        break
+                    batch.append(item)
+                submitted = time.perf_counter()
+                outcome = _submit_parse(client, [r['document_id'] for r in batch], direct_headers)
+                for record in batch:
+                    observe('parse', submitted)
+                    error = outcome.get(record['document_id'])
+                    if error:
+                        fail(record, 'parse', error)
+                    else:
+                        record.update(stage='wait', _submitted=time.perf_counter())
+                        if not handoff(watch_queue, record):
+                            fail(record, 'wait', "流水线已中止")
+                if got_stop:
+                    return
+        
+        def watcher():
+            pending = {}
+            inputs_done = False
+            interval = min_interval
+            index = DocumentIndex()
+            try:
+                while True:
+                    # 在轮询间隔内持续接收新提交解析的文档
+                    deadline = time.monotonic() + (interval if pending else 3600)
+                    while not inputs_done:
+                        try:
+                            item = watch_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                        except queue.Empty:
+                            break
+                        if item is stop:
+                            inputs_done = True
+                        else:
+                            pending[item['document_id']] = item
+                            if len(pending) == 1:
+                                deadline = time.monotonic() + interval
+                    if not pending:
+                        if inputs_done:
+                            return
+                        continue
+                    if inputs_done:
+                        time.sleep(max(0.0, deadline - time.monotonic()))
+                    if timeout is not None:
+                        # 超时按每个文档上传完成的时间计算，与流水线中排在前面的文档无关
+                        now = time.perf_counter()
+                        for doc_id in [doc_id for doc_id, record in pending.items()
+                                       if now - record['_uploaded'] >= timeout]:
+                            fail(pending.pop(doc_id), 'wait', timeout_message)
+                        if not pending:
+                            continue
+                    try:
+                        docs = _lookup_documents(client, index, dataset_id, list(pending))
+                    except Exception as e:
+                        # 查询失败时本轮等待中的文档记为失败，线程继续接收后续文档
+                        for record in pending.values():
+                            fail(record, 'wait', f"查询解析状态失败: {e}")
+                        pending.clear()
+                        continue
+                    changed = False
+                    for doc_id, doc in docs.items():
+                        record = pending[doc_id]
+                        row = _status_row(doc)
+                        if (row.get('run'), _progress_bucket(row)) != record.get('_state'):
+                            changed = True
+                        record['_state'] = (row.get('run'), _progress_bucket(row))
+                        if row.get('run') in _FINISHED_RUN_STATES:
+                            del pending[doc_id]
+                            observe('wait', record['_submitted'])
+                            record['chunk_count'] = row.get('chunk_count') or 0
+                            if row.get('run') == 'DONE':
+                                record['stage'] = 'verify'
+                                if not handoff(verify_queue, record):
+                                    fail(record, 'verify', "流水线已中止")
+                            else:
+                                fail(record, 'wait', row.get('progress_msg') or f"解析状态 {row.get('run')}")
+                    near_done = any(float(r.get('_state', (None, 0))[1]) >= 9 for r in pending.values())
+                    interval = _next_interval(interval, changed, near_done, min_interval, max_interval)
+            finally:
+                index.close()
+        
+        def verifier():
+            while True:
+                record = verify_queue.get()
+                if record is stop:
+                    return
+                verify_started = time.perf_counter()
+                try:
+                    if not record['chunk_count']:
+                        fail(record, 'verify', "解析完成但没有生成文档块")
+                    elif probe and not _probe_retrieval(client, dataset_id, record['document_id'], probe):
+                        fail(record, 'verify', "探测检索没有命中该文档")
+                    else:
+                        record.update(status='verified', stage='done')
+                        observe('total', record['_started'])
+                except Exception as e:
+                    fail(record, 'verify', e)
+                observe('verify', verify_started)
+        
+        def start_stage(target, count, *args):
+            def run():
+                try:
+                    target(*args)
+                except Exception as e:
+                    # 阶段线程异常退出时中止流水线，其他阶段和关闭过程不再等待它
+                    with lock:
+                        stage_errors.append(f"{target.__name__}: {e}")
+                    aborted.set()
+            
+            threads = [threading.Thread(target=run, daemon=True) for _ in range(max(1, count))]
+            for thread in threads:
+                thread.start()
+            return threads
+        
+        content_index = ContentIndex()
+        try:
+            uploaders = start_stage(uploader, upload_workers, content_index)
+            dispatchers = start_stage(parse_dispatcher, parse_workers)
+            watchers = start_stage(watcher, watch_workers)
+            verifiers = start_stage(verifier, verify_workers)
+            
+            # 逐级关闭：上游阶段的线程全部结束后，再向下一阶段发送结束标记；
+            # 流水线中止时不再等待仍在运行的阶段
+            for path in files:
+                if not handoff(path_queue, path):
+                    break
+            for stage_queue, threads in ((path_queue, uploaders), (parse_queue, dispatchers),
+                                         (watch_queue, watchers), (verify_queue, verifiers)):
+                for _ in threads:
+                    handoff(stage_queue, stop)
+                for thread in threads:
+                    while thread.is_alive() and not aborted.is_set():
+                        thread.join(0.2)
+        finally:
+            content_index.close()
+        elapsed = time.perf_counter() - started
+        
+        with lock:
+            collected = list(records)
+        if aborted.is_set():
+            for error in stage_errors:
+                formatter.print_error(f"流水线阶段异常退出: {error}")
+            started_paths = {record['path'] for record in collected}
+            collected.extend({'path': path, 'document_id': '', 'status': 'pending', 'stage': 'upload',
+                            'message': '', 'chunk_count': 0} for path in files if path not in started_paths)
+            for record in collected:
+                if record['status'] == 'pending':
+                    fail(record, record['stage'], "流水线已中止")
+        
+        results = [{k: v for k, v in record.items() if not k.startswith('_')} for record in collected]
+        if report_path:
+            _write_report(report_path, results)
+        
+        failed = [r for r in results if r['status'] != 'verified']
+        stages = []
+        for stage in ('upload', 'parse', 'wait', 'verify', 'total'):
+            row = {'stage': stage, **latency_summary(latencies[stage])}
+            row['failed'] = sum(1 for r in failed if r['stage'] == stage)
+            stages.append(row)
+        summary = {
+            'files': len(results),
+            'verified': len(results) - len(failed),
+            'failed': len(failed),
+            'elapsed_s': round(elapsed, 2),
+            'docs_per_min': round((len(results) - len(failed)) / max(elapsed, 1e-9) * 60, 2),
+        }
+        
+        if output_format == 'table':
+            formatter.print_rich_table(stages, "各阶段延迟")
+            formatter.print_rich_table([summary], "导入汇总")
+            if failed:
+                formatter.print_rich_table([{'path': r['path'], 'stage': r['stage'], 'message': r['message']}
+                                            for r in failed], f"失败的文档 ({len(failed)} 个)")
+        else:
+            print(formatter.format_output({'summary': summary, 'stages': stages, 'failed': failed}))
+        
+        if failed:
+            formatter.print_error(f"{len(failed)} 个文档导入失败")
+        else:
+            formatter.print_success(f"全部 {len(results)} 个文档已导入并验证")
+    except Exception as e:
+        formatter = OutputFormatter()
+        formatter.print_error(f"流水线导入失败: {e}")
+
+
 def _ensure_token(client, formatter):
     """自动兼容两种token方式"""
     # 优先尝试 auth_token（直接token）
@@ -1,7 +1,13 @@
 import click
+import functools
+import json
+import time
 from typing import Dict, Any, Optional
 from api_client import APIClient
 from utils.output import OutputFormatter
+from utils.batching import bounded_map
+from utils.pagination import extract_chunks
+from utils.retrieval_cache import RetrievalCache
 
 
 @click.group()
@@ -10,6 +16,121 @@ def retrieval():
     pass
 
 
+def _split_ids(value):
+    """把逗号分隔的字符串或列表整理为ID列表"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def _build_search_request(question, dataset_ids, document_ids=None, top_k=10, similarity_threshold=None,
+                          vector_similarity_weight=None, highlight=False):
+    """构建 /api/v1/retrieval 的请求体，各检索命令共用"""
+    search_data = {
+        'question': question,
+        'dataset_ids': _split_ids(dataset_ids),
+        'top_k': top_k
+    }
+    
+    if document_ids:
+        search_data['document_ids'] = _split_ids(document_ids)
+    
+    if similarity_threshold is not None:
+        search_data['similarity_threshold'] = similarity_threshold
+    
+    if vector_similarity_weight is not None:
+        search_data['vector_similarity_weight'] = vector_similarity_weight
+    
+    if highlight:
+        search_data['highlight'] = highlight
+    
+    return search_data
+
+
+_QUERY_FIELDS = ('dataset_ids', 'document_ids', 'top_k', 'similarity_threshold',
+                 'vector_similarity_weight', 'highlight')
+
+
+def _read_queries(path):
+    """逐行读取JSONL查询文件（- 为标准输入），产出 (行号, 查询)，无法解析的行查询为错误信息字符串"""
+    with click.open_file(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                query = json.loads(line)
+            except ValueError as e:
+                yield line_no, f"无效的JSON: {e}"
+                continue
+            yield line_no, query if isinstance(query, dict) else "查询必须是JSON对象"
+
+
+def _query_default_options(func):
+    """为读取查询文件的命令添加查询字段的默认值选项，合并为 defaults 参数传入"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        kwargs['defaults'] = {field: kwargs.pop(field) for field in _QUERY_FIELDS}
+        return func(*args, **kwargs)
+    options = [
+        click.option('--dataset-ids', help='查询行未指定时使用的数据集ID，用逗号分隔'),
+        click.option('--document-ids', help='查询行未指定时使用的文档ID，用逗号分隔'),
+        click.option('--top-k', type=int, default=10, help='查询行未指定时返回的最大块数量'),
+        click.option('--similarity-threshold', type=float, help='查询行未指定时的相似度阈值'),
+        click.option('--vector-similarity-weight', type=float, help='查询行未指定时的向量相似度权重'),
+        click.option('--highlight', is_flag=True, help='查询行未指定时是否高亮匹配内容'),
+    ]
+    for option in reversed(options):
+        wrapper = option(wrapper)
+    return wrapper
+
+
+def _query_request(query, defaults):
+    """用查询行中的字段（缺省时取命令行默认值）构建检索请求"""
+    question = query.get('question')
+    if not question:
+        raise ValueError("缺少 question")
+    params = {field: query.get(field, defaults.get(field)) for field in _QUERY_FIELDS}
+    if not _split_ids(params['dataset_ids']):
+        raise ValueError("缺少 dataset_ids")
+    return _build_search_request(question, **params)
+
+
+# 各检索命令共用的缓存开关，默认取配置 retrieval_cache.enabled
+_cache_option = click.option('--cache/--no-result-cache', 'use_cache', default=None,
+                             help='是否使用检索结果缓存（默认取配置 retrieval_cache.enabled）')
+
+
+def _result_cache(client, use_cache):
+    return RetrievalCache.from_config(client, client.config.get('retrieval_cache'), use_cache)
+
+
+def _post_search(client, search_data, cache=None):
+    """调用检索接口，返回 (响应, 是否命中缓存)"""
+    fingerprint = None
+    if cache:
+        response, fingerprint = cache.get(search_data)
+        if response is not None:
+            return response, True
+    response = client.post('/api/v1/retrieval', json_data=search_data)
+    if cache:
+        cache.put(search_data, response, fingerprint)
+    return response, False
+
+
+def _run_search(client, search_data, cache=None):
+    """执行一次检索，返回 (块列表, 总数, 延迟毫秒, 是否命中缓存)"""
+    start = time.perf_counter()
+    response, cached = _post_search(client, search_data, cache)
+    latency_ms = (time.perf_counter() - start) * 1000
+    if isinstance(response, dict) and response.get('code', 0) != 0:
+        raise Exception(response.get('message', '未知错误'))
+    chunks, total = extract_chunks(response)
+    return chunks, total, latency_ms, cached
+
+
 @retrieval.command()
 @click.argument('question')
 @click.argument('dataset_ids', nargs=-1)
@@ -18,37 +139,25 @@ def retrieval():
 @click.option('--similarity-threshold', type=float, help='相似度阈值')
 @click.option('--vector-similarity-weight', type=float, help='向量相似度权重')
 @click.option('--highlight', is_flag=True, help='是否高亮匹配内容')
+@_cache_option
 @click.option('--format', 'output_format', default='table', 
               type=click.Choice(['table', 'json', 'yaml']), 
               help='输出格式')
 def search(question, dataset_ids, document_ids, top_k, similarity_threshold, 
-           vector_similarity_weight, highlight, output_format):
+           vector_similarity_weight, highlight, use_cache, output_format):
     """基于查询检索文档块"""
     try:
         client = APIClient()
         formatter = OutputFormatter(output_format)
         
         # 构建请求数据
-        search_data = {
-            'question': question,
-            'dataset_ids': list(dataset_ids),
-            'top_k': top_k
-        }
-        
-        if document_ids:
-            search_data['document_ids'] = [doc_id.strip() for doc_id in document_ids.split(',')]
-        
-        if similarity_threshold is not None:
-            search_data['similarity_threshold'] = similarity_threshold
-        
-        if vector_similarity_weight is not None:
-            search_data['vector_similarity_weight'] = vector_similarity_weight
+        search_data = _build_search_request(question, dataset_ids, document_ids, top_k, similarity_threshold,
+                                            vector_similarity_weight, highlight)
         
-        if highlight:
-            search_data['highlight'] = highlight
-        
-        # 调用API
-        response = client.post('/api/v1/retrieval', json_data=search_data)
+        # 调用API（启用缓存时先查检索结果缓存）
+        response, cached = _post_search(client, search_data, _result_cache(client, use_cache))
+        if cached and output_format == 'table':
+            formatter.print_info("结果来自检索缓存")
         
         # 格式化输出
         if output_format == 'table':
@@ -79,10 +188,11 @@ def search(question, dataset_ids, document_ids, top_k, similarity_threshold,
 @click.argument('question')
 @click.argument('dataset_id')
 @click.option('--top-k', type=int, default=5, help='返回的最大块数量')
+@_cache_option
 @click.option('--format', 'output_format', default='table', 
               type=click.Choice(['table', 'json', 'yaml']), 
               help='输出格式')
-def search_single_dataset(question, dataset_id, top_k, output_format):
+def search_single_dataset(question, dataset_id, top_k, use_cache, output_format):
     """在单个数据集中检索"""
     try:
         client = APIClient()
@@ -95,8 +205,10 @@ def search_single_dataset(question, dataset_id, top_k, output_format):
             'top_k': top_k
         }
         
-        # 调用API
-        response = client.post('/api/v1/retrieval', json_data=search_data)
+        # 调用API（启用缓存时先查检索结果缓存）
+        response, cached = _post_search(client, search_data, _result_cache(client, use_cache))
+        if cached and output_format == 'table':
+            formatter.print_info("结果来自检索缓存")
         
         # 格式化输出
         if output_format == 'table':
@@ -126,10 +238,11 @@ def search_single_dataset(question, dataset_id, top_k, output_format):
 @click.argument('dataset_id')
 @click.argument('document_id')
 @click.option('--top-k', type=int, default=3, help='返回的最大块数量')
+@_cache_option
 @click.option('--format', 'output_format', default='table', 
               type=click.Choice(['table', 'json', 'yaml']), 
               help='输出格式')
-def search_single_document(question, dataset_id, document_id, top_k, output_format):
+def search_single_document(question, dataset_id, document_id, top_k, use_cache, output_format):
     """在单个文档中检索"""
     try:
         client = APIClient()
@@ -143,8 +256,10 @@ def search_single_document(question, dataset_id, document_id, top_k, output_form
             'top_k': top_k
         }
         
-        # 调用API
-        response = client.post('/api/v1/retrieval', json_data=search_data)
+        # 调用API（启用缓存时先查检索结果缓存）
+        response, cached = _post_search(client, search_data, _result_cache(client, use_cache))
+        if cached and output_format == 'table':
+            formatter.print_info("结果来自检索缓存")
         
         # 格式化输出
         if output_format == 'table':
@@ -165,4 +280,581 @@ def search_single_document(question, dataset_id, document_id, top_k, output_form
             
     except Exception as e:
         formatter = OutputFormatter()
-        formatter.print_error(f"检索失败: {e}") 
\ No newline at end of file
+        formatter.print_error(f"检索失败: {e}") 
+
+
+@retrieval.command()
+@click.argument('queries_file', type=click.Path(dir_okay=False, allow_dash=True))
+@click.option('-o', '--output', default='-', type=click.Path(dir_okay=False, allow_dash=True),
+              help='结果JSONL文件，默认输出到标准输出')
+@click.option('--concurrency', type=click.IntRange(1, 256), default=8, show_default=True,
+              help='同时在途的检索请求数')
+@click.option('--unordered', is_flag=True, help='按完成顺序输出结果，而不是按输入顺序')
+@_query_default_options
+@_cache_option
+def batch(queries_file, output, concurrency, unordered, defaults, use_cache):
+    """从JSONL文件批量执行检索
+
+    每行一个查询，如 {"question": "...", "dataset_ids": [...], "top_k": 5}，
+    可带 document_ids、similarity_threshold、vector_similarity_weight、highlight，
+    缺省的字段取命令行选项。查询并发执行，结果逐行写出：
+    {"line": 行号, "query": 原查询, "chunks": [...], "total": n, "latency_ms": t, "cached": false, "error": null}。
+    查询文件惰性读取，内存占用与查询数量无关。
+    """
+    formatter = OutputFormatter(stderr=output == '-')
+    try:
+        client = APIClient()
+        client.ensure_pool_size(concurrency)
+        cache = _result_cache(client, use_cache)
+        
+        def run(item):
+            line_no, query = item
+            result = {'line': line_no, 'query': query, 'chunks': [], 'total': 0, 'latency_ms': None,
+                      'cached': False, 'error': None}
+            try:
+                if isinstance(query, str):
+                    raise ValueError(query)
+                chunks, total, latency_ms, cached = _run_search(client, _query_request(query, defaults), cache)
+                result.update(chunks=chunks, total=total if total is not None else len(chunks),
+                              latency_ms=round(latency_ms, 1), cached=cached)
+            except Exception as e:
+                result['error'] = str(e)
+            return result
+        
+        stats = {'queries': 0, 'errors': 0}
+        start = time.perf_counter()
+        # 按输入顺序输出时多缓冲一些结果，避免单个慢查询阻塞其余并发
+        window = concurrency if unordered else concurrency * 4
+        with click.open_file(output, 'w', encoding='utf-8') as out:
+            try:
+                for result in bounded_map(run, _read_queries(queries_file), workers=concurrency,
+                                          window=window, ordered=not unordered):
+                    stats['queries'] += 1
+                    if result['error']:
+                        stats['errors'] += 1
+                    out.write(json.dumps(result, ensure_ascii=False))
+                    out.write('\n')
+            except BrokenPipeError:
+                # 下游（如 head）提前关闭了管道
+                import os
+                import sys
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+                return
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        
+        summary = (f"完成 {stats['queries']} 个查询，失败 {stats['errors']} 个，耗时 {elapsed:.1f}s"
+                   f"（{stats['queries'] / elapsed:.1f} 查询/秒）")
+        if cache:
+            summary += f"，缓存命中 {cache.hits} 个"
+        if stats['errors']:
+            formatter.print_warning(summary)
+        else:
+            formatter.print_success(summary)
+    except Exception as e:
+        formatter.print_error(f"批量检索失败: {e}")
+
+
+
+def _load_requests(queries_file, defaults):
+    """读取查询文件并构建全部检索请求，返回 (请求列表, 无效行 [(行号, 原因)])"""
+    requests_, invalid = [], []
+    for line_no, query in _read_queries(queries_file):
+        try:
+            if isinstance(query, str):
+                raise ValueError(query)
+            requests_.append(_query_request(query, defaults))
+        except ValueError as e:
+            invalid.append((line_no, str(e)))
+    return requests_, invalid
+
+
+def _bench_timeline(records, bucket):
+    """按 bucket 秒分桶统计请求数、错误数和延迟百分位数"""
+    from utils.stats import latency_summary
+    buckets = {}
+    for offset, latency_ms, error in records:
+        buckets.setdefault(int(offset // bucket), []).append((latency_ms, error))
+    timeline = []
+    for index in range(max(buckets) + 1 if buckets else 0):
+        items = buckets.get(index, [])
+        summary = latency_summary([latency for latency, error in items if error is None], (50, 99))
+        timeline.append({'t_s': round(index * bucket, 3), 'requests': len(items),
+                         'errors': sum(1 for _, error in items if error is not None),
+                         'p50_ms': summary['p50_ms'], 'p99_ms': summary['p99_ms']})
+    return timeline
+
+
+def _print_timeline(formatter, timeline, bucket, width=40):
+    """以文本直方图显示每个时间段的请求数、错误数和p50/p99延迟（条形长度对应p99）"""
+    slowest = max((row['p99_ms'] or 0 for row in timeline), default=0) or 1
+    console = formatter.console
+    console.print(f"\n延迟随时间变化（每 {bucket:g}s，条形为p99）", style="bold blue")
+    console.print(f"{'t(s)':>8} {'请求':>6} {'错误':>5} {'p50':>8} {'p99':>8}")
+    for row in timeline:
+        bar = '█' * int(round((row['p99_ms'] or 0) / slowest * width))
+        p50 = f"{row['p50_ms']:.1f}" if row['p50_ms'] is not None else '-'
+        p99 = f"{row['p99_ms']:.1f}" if row['p99_ms'] is not None else '-'
+        console.print(f"{row['t_s']:>8g} {row['requests']:>6} {row['errors']:>5} {p50:>8} {p99:>8}  {bar}",
+                      style="red" if row['errors'] else None, highlight=False)
+
+
+@retrieval.command()
+@click.argument('queries_file', type=click.Path(dir_okay=False, allow_dash=True))
+@click.option('--qps', type=click.FloatRange(min=0, min_open=True),
+              help='开环模式：按固定速率发送请求，不等待之前的响应')
+@click.option('--concurrency', type=click.IntRange(1, 1024), default=8, show_default=True,
+              help='闭环模式（未指定 --qps 时）：固定数量的并发请求')
+@click.option('--duration', type=click.FloatRange(min=0, min_open=True), default=30.0, show_default=True,
+              help='压测时长（秒），不含预热')
+@click.option('--requests', 'max_requests', type=click.IntRange(min=1), help='请求总数，达到后提前结束')
+@click.option('--warmup', type=click.FloatRange(min=0), default=0.0, show_default=True,
+              help='预热时长（秒），期间的请求不计入统计')
+@click.option('--max-in-flight', type=click.IntRange(1, 4096), default=256, show_default=True,
+              help='开环模式下同时在途的请求上限，超出时在本地排队（排队时间计入延迟）')
+@click.option('--bucket', type=click.FloatRange(min=0, min_open=True), default=1.0, show_default=True,
+              help='延迟随时间变化统计的时间粒度（秒）')
+@click.option('-o', '--output', 'output_path', help='同时把JSON结果写入该文件')
+@_query_default_options
+@click.option('--format', 'output_format', default='table', 
+              type=click.Choice(['table', 'json', 'yaml']), 
+              help='输出格式')
+def bench(queries_file, qps, concurrency, duration, max_requests, warmup, max_in_flight, bucket,
+          output_path, defaults, output_format):
+    """用查询文件对检索接口压测，统计延迟分布、错误率和吞吐量
+
+    查询按文件顺序循环使用。指定 --qps 为开环模式：请求按计划时间发出，
+    延迟从计划时间算起，服务端变慢时本地排队的时间也计入延迟，不会因为
+    等待响应而少发请求；否则为闭环模式：--concurrency 个请求循环发送。
+    压测绕过检索结果缓存，也不重试失败的请求，不触发共享的熔断器。
+    """
+    import itertools
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from utils.retry import RetryPolicy, CircuitBreaker
+    from utils.stats import latency_summary
+    try:
+        client = APIClient()
+        formatter = OutputFormatter(output_format)
+        
+        requests_, invalid = _load_requests(queries_file, defaults)
+        for line_no, reason in invalid[:5]:
+            formatter.print_warning(f"跳过第 {line_no} 行: {reason}")
+        if not requests_:
+            formatter.print_error("查询文件中没有有效的查询")
+            return
+        
+        # 压测要观察服务端的真实表现：不重试，熔断器不落盘且不会打开
+        client.retry_policy = RetryPolicy(max_attempts=1)
+        client.circuit_breaker = CircuitBreaker(client.base_url, failure_threshold=2 ** 31)
+        workers = max_in_flight if qps else concurrency
+        client.ensure_pool_size(workers)
+        
+        mode = 'open' if qps else 'closed'
+        if output_format == 'table':
+            load = f"开环 {qps:g} QPS" if qps else f"闭环 并发 {concurrency}"
+            formatter.print_info(f"{load}，{len(requests_)} 个查询，预热 {warmup:g}s，压测 {duration:g}s")
+        
+        records = []
+        total_limit = None if max_requests is None else max_requests
+        counter = itertools.count()
+        started = time.perf_counter()
+        deadline = started + warmup + duration
+        
+        def send(index, scheduled):
+            search_data = requests_[index % len(requests_)]
+            sent = time.perf_counter()
+            error = None
+            try:
+                response = client.post('/api/v1/retrieval', json_data=search_data)
+                if isinstance(response, dict) and response.get('code', 0) != 0:
+                    error = f"code {response.get('code')}: {response.get('message', '')}"[:120]
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"[:120]
+            finished = time.perf_counter()
+            # 开环模式从计划发送时间起算，避免协调遗漏（coordinated omission）
+            latency_ms = (finished - (scheduled if scheduled is not None else sent)) * 1000
+            records.append((sent - started, latency_ms, error))
+        
+        if qps:
+            with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+                for index in counter:
+                    scheduled = started + index / qps
+                    if scheduled >= deadline or (total_limit is not None and index >= total_limit):
+                        break
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    executor.submit(send, index, scheduled)
+        else:
+            lock = threading.Lock()
+            
+            def worker():
+                while time.perf_counter() < deadline:
+                    with lock:
+                        index = next(counter)
+                    if total_limit is not None and index >= total_limit:
+                        return
+                    send(index, None)
+            
+            threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finished = time.perf_counter()
+        
+        measured = [(offset - warmup, latency_ms, error) for offset, latency_ms, error in records
+                    if offset >= warmup]
+        elapsed = max(finished - started - warmup, 1e-9)
+        errors = [error for _, _, error in measured if error is not None]
+        error_types = {}
+        for error in errors:
+            error_types[error] = error_types.get(error, 0) + 1
+        latency = latency_summary([latency_ms for _, latency_ms, error in measured if error is None],
+                                  (50, 90, 99, 99.9))
+        result = {
+            'mode': mode,
+            'target_qps': qps,
+            'concurrency': None if qps else concurrency,
+            'queries': len(requests_),
+            'duration_s': round(elapsed, 2),
+            'requests': len(measured),
+            'errors': len(errors),
+            'error_rate': round(len(errors) / len(measured), 4) if measured else 0.0,
+            'request_rate': round(len(measured) / elapsed, 2),
+            'throughput_rps': round((len(measured) - len(errors)) / elapsed, 2),
+            'latency_ms': latency,
+            'error_types': error_types,
+            'timeline': _bench_timeline(measured, bucket),
+        }
+        
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        
+        if output_format == 'table':
+            summary = {key: result[key] for key in ('mode', 'requests', 'errors', 'error_rate',
+                                                    'request_rate', 'throughput_rps', 'duration_s')}
+            formatter.print_rich_table([summary], "压测汇总")
+            formatter.print_rich_table([{key.replace('_ms', ''): value for key, value in latency.items()}],
+                                       "延迟 (ms)")
+            _print_timeline(formatter, result['timeline'], bucket)
+            if error_types:
+                formatter.print_rich_table([{'error': error, 'count': count} for error, count in
+                                            sorted(error_types.items(), key=lambda item: -item[1])],
+                                           "错误类型")
+        else:
+            print(formatter.format_output(result))
+    except Exception as e:
+        formatter = OutputFormatter()
+        formatter.print_error(f"压测失败: {e}")
+
+
+def _relevance(value):
+    """把相关ID列表或 {ID: 相关度} 整理为 {ID: 相关度}"""
+    if isinstance(value, dict):
+        return {str(key): float(grade) for key, grade in value.items()}
+    return {item: 1.0 for item in _split_ids(value)}
+
+
+def _read_gold(path, level='auto'):
+    """读取标注文件，返回 (样本列表, 无效行 [(行号, 原因)])
+
+    每行是一个查询加上 relevant_chunk_ids 和/或 relevant_document_ids；level 为
+    auto 时有块级标注就按块评估，否则按文档评估。
+    """
+    samples, invalid = [], []
+    for line_no, query in _read_queries(path):
+        if isinstance(query, str):
+            invalid.append((line_no, query))
+            continue
+        chunk_level = _relevance(query.get('relevant_chunk_ids'))
+        document_level = _relevance(query.get('relevant_document_ids'))
+        sample_level = level if level != 'auto' else ('chunk' if chunk_level else 'document')
+        relevant = chunk_level if sample_level == 'chunk' else document_level
+        if not relevant:
+            invalid.append((line_no, f"缺少 relevant_{sample_level}_ids"))
+            continue
+        samples.append({'line': line_no, 'query': query, 'level': sample_level, 'relevant': relevant})
+    return samples, invalid
+
+
+def _ranked_ids(chunks, level):
+    """按返回顺序取块ID；文档级评估时取文档ID并去重，同一文档的多个块只算一次"""
+    if level == 'chunk':
+        return [str(chunk.get('id')) for chunk in chunks]
+    return [*dict.fromkeys(str(chunk.get('document_id')) for chunk in chunks)]
+
+
+def _run_sample(client, sample, defaults, cache=None, overrides=None):
+    """执行一个标注样本的检索（请求与 retrieval search 使用同一个构建函数）
+
+    overrides 中的参数覆盖查询行和命令行默认值，用于参数扫描。
+    """
+    outcome = {'ranked': [], 'latency_ms': None, 'payload_bytes': 0, 'error': None}
+    try:
+        search_data = _query_request(sample['query'], defaults)
+        search_data.update(overrides or {})
+        chunks, _, latency_ms, _ = _run_search(client, search_data, cache)
+        outcome.update(ranked=_ranked_ids(chunks, sample['level']), latency_ms=latency_ms,
+                       payload_bytes=len(json.dumps(chunks, ensure_ascii=False).encode('utf-8')))
+    except Exception as e:
+        outcome['error'] = str(e)
+    return outcome
+
+
+def _run_gold(client, samples, defaults, concurrency, cache=None):
+    """并发执行全部标注样本的检索，按样本顺序返回结果"""
+    return [*bounded_map(lambda sample: _run_sample(client, sample, defaults, cache), samples,
+                         workers=concurrency)]
+
+
+def _parse_ks(value):
+    try:
+        ks = sorted({int(item) for item in _split_ids(value)})
+    except ValueError:
+        raise click.BadParameter(f"无效的k列表: {value}")
+    if not ks or ks[0] < 1:
+        raise click.BadParameter(f"无效的k列表: {value}")
+    return ks
+
+
+@retrieval.command(name='eval')
+@click.argument('gold_file', type=click.Path(dir_okay=False, allow_dash=True))
+@click.option('--k', 'k_values', default='1,3,5,10', show_default=True, help='计算指标的k值，用逗号分隔')
+@click.option('--level', type=click.Choice(['auto', 'chunk', 'document']), default='auto', show_default=True,
+              help='按块ID还是文档ID评估，auto 时有块级标注就按块评估')
+@click.option('--concurrency', type=click.IntRange(1, 256), default=8, show_default=True,
+              help='同时在途的检索请求数')
+@click.option('--details', 'details_path', type=click.Path(dir_okay=False, allow_dash=True),
+              help='逐个查询的诊断信息JSONL文件（- 为标准输出）')
+@_query_default_options
+@_cache_option
+@click.option('--format', 'output_format', default='table', 
+              type=click.Choice(['table', 'json', 'yaml']), 
+              help='输出格式')
+def evaluate(gold_file, k_values, level, concurrency, details_path, defaults, use_cache, output_format):
+    """按标注文件评估检索质量：recall@k、precision@k、MRR 和 nDCG@k
+
+    标注文件每行一个查询（字段同 retrieval batch），另加 relevant_chunk_ids 或
+    relevant_document_ids（ID列表，或 {ID: 相关度} 用于分级相关的nDCG）。
+    查询并发执行，指标用NumPy向量化汇总；--details 输出每个查询的命中位置、
+    各项指标和延迟，便于定位变差的查询。
+    """
+    from utils.stats import latency_summary
+    try:
+        client = APIClient()
+        formatter = OutputFormatter(output_format, stderr=details_path == '-')
+        ks = _parse_ks(k_values)
+        try:
+            from utils.stats import ranking_metrics
+            import numpy  # noqa: F401
+        except ImportError:
+            formatter.print_error("retrieval eval 需要 numpy: pip install numpy")
+            return
+        
+        samples, invalid = _read_gold(gold_file, level)
+        for line_no, reason in invalid[:5]:
+            formatter.print_warning(f"跳过第 {line_no} 行: {reason}")
+        if not samples:
+            formatter.print_error("标注文件中没有有效的样本")
+            return
+        
+        # 检索数量至少覆盖最大的k
+        if (defaults.get('top_k') or 0) < ks[-1]:
+            defaults = {**defaults, 'top_k': ks[-1]}
+        client.ensure_pool_size(concurrency)
+        cache = _result_cache(client, use_cache)
+        start = time.perf_counter()
+        outcomes = _run_gold(client, samples, defaults, concurrency, cache)
+        elapsed = time.perf_counter() - start
+        
+        ok = [i for i, outcome in enumerate(outcomes) if outcome['error'] is None]
+        metrics = ranking_metrics([outcomes[i]['ranked'] for i in ok], [samples[i]['relevant'] for i in ok], ks)
+        
+        if details_path:
+            per_query = metrics['per_query']
+            position = {i: row for row, i in enumerate(ok)}
+            with click.open_file(details_path, 'w', encoding='utf-8') as out:
+                for i, (sample, outcome) in enumerate(zip(samples, outcomes)):
+                    detail = {'line': sample['line'], 'question': sample['query'].get('question'),
+                              'level': sample['level'], 'relevant': len(sample['relevant']),
+                              'hits': [rank + 1 for rank, item in enumerate(outcome['ranked'])
+                                       if sample['relevant'].get(item, 0) > 0],
+                              'retrieved': outcome['ranked'][:ks[-1]],
+                              'latency_ms': round(outcome['latency_ms'], 1) if outcome['latency_ms'] else None,
+                              'error': outcome['error']}
+                    if i in position:
+                        for name, values in per_query.items():
+                            value = float(values[position[i]])
+                            detail[name] = None if value != value else round(value, 4)
+                    out.write(json.dumps(detail, ensure_ascii=False) + '\n')
+        
+        mean = metrics['mean']
+        result = {
+            'queries': len(samples),
+            'evaluated': len(ok),
+            'errors': len(samples) - len(ok),
+            'skipped_lines': len(invalid),
+            'mrr': mean['mrr'],
+            'metrics': [{'k': k, 'recall': mean[f'recall@{k}'], 'precision': mean[f'precision@{k}'],
+                         'ndcg': mean[f'ndcg@{k}']} for k in ks],
+            'latency_ms': latency_summary([outcomes[i]['latency_ms'] for i in ok]),
+            'elapsed_s': round(elapsed, 2),
+        }
+        
+        if output_format == 'table':
+            formatter.print_rich_table(result['metrics'], f"检索质量 (MRR {result['mrr']})")
+            formatter.print_info(f"评估 {result['evaluated']}/{result['queries']} 个查询，失败 {result['errors']} 个，"
+                                 f"p50 {result['latency_ms']['p50_ms']}ms，耗时 {result['elapsed_s']}s")
+        else:
+            print(formatter.format_output(result))
+    except click.BadParameter as e:
+        OutputFormatter().print_error(e.format_message())
+    except Exception as e:
+        formatter = OutputFormatter()
+        formatter.print_error(f"检索评估失败: {e}")
+
+
+def _parse_grid(value, cast, name):
+    """解析逗号分隔的参数取值列表，未指定时返回 [None]（不发送该参数，使用服务端默认值）"""
+    if not value:
+        return [None]
+    try:
+        return sorted({cast(item) for item in _split_ids(value)})
+    except ValueError:
+        raise click.BadParameter(f"无效的{name}列表: {value}")
+
+
+def _pareto_front(points, maximize, minimize):
+    """标记帕累托最优的点：不存在另一个点在所有维度上都不差且至少一个维度更好，缺失值视为最差"""
+    def score(point):
+        # 统一为越大越好
+        return ([point[key] if point[key] is not None else float('-inf') for key in maximize]
+                + [-point[key] if point[key] is not None else float('-inf') for key in minimize])
+    
+    scores = [score(point) for point in points]
+    for point, mine in zip(points, scores):
+        point['pareto'] = not any(other != mine and all(a >= b for a, b in zip(other, mine))
+                                  for other in scores)
+    return points
+
+
+@retrieval.command()
+@click.argument('gold_file', type=click.Path(dir_okay=False, allow_dash=True))
+@click.option('--weights', help='vector_similarity_weight 的取值，用逗号分隔，如 0.1,0.3,0.5,0.7')
+@click.option('--thresholds', help='similarity_threshold 的取值，用逗号分隔，如 0.1,0.2,0.3')
+@click.option('--top-ks', help='top_k 的取值，用逗号分隔，如 5,10,20；未指定时使用 --top-k')
+@click.option('--level', type=click.Choice(['auto', 'chunk', 'document']), default='auto', show_default=True,
+              help='按块ID还是文档ID评估，auto 时有块级标注就按块评估')
+@click.option('--concurrency', type=click.IntRange(1, 256), default=8, show_default=True,
+              help='所有参数组合共享的在途请求数上限')
+@click.option('--max-requests', type=click.IntRange(1), default=5000, show_default=True,
+              help='请求总数（参数组合数 × 查询数）上限，超过时不执行扫描')
+@click.option('--pareto-only', is_flag=True, help='只显示帕累托最优的参数组合')
+@click.option('-o', '--output', 'output_path', help='同时把JSON结果写入该文件')
+@_query_default_options
+@click.option('--format', 'output_format', default='table', 
+              type=click.Choice(['table', 'json', 'yaml']), 
+              help='输出格式')
+def sweep(gold_file, weights, thresholds, top_ks, level, concurrency, max_requests, pareto_only, output_path,
+          defaults, output_format):
+    """在参数网格上评估混合检索：vector_similarity_weight × similarity_threshold × top_k
+
+    所有参数组合的全部查询展开为一个任务流，共享 --concurrency 个在途请求，
+    各组合交替执行，服务端负载不随组合数增加。每个组合按标注文件计算
+    recall@top_k 和 MRR，并统计延迟和返回的数据量，最后给出质量（recall、MRR）
+    相对成本（p50延迟、平均返回字节数）的帕累托表。扫描不使用检索结果缓存。
+    每个请求都显式发送被评估的 top_k（覆盖查询行中的 top_k）；请求总数超过
+    --max-requests 时不执行。
+    """
+    from itertools import product
+    from utils.stats import latency_summary
+    try:
+        client = APIClient()
+        formatter = OutputFormatter(output_format)
+        try:
+            from utils.stats import ranking_metrics
+            import numpy  # noqa: F401
+        except ImportError:
+            formatter.print_error("retrieval sweep 需要 numpy: pip install numpy")
+            return
+        
+        # 未指定 --top-ks 时评估 --top-k，请求的 top_k 与计算指标的 k 始终一致
+        k_values = [k or defaults.get('top_k') or 10 for k in _parse_grid(top_ks, int, 'top-ks')]
+        grid = [{'vector_similarity_weight': weight, 'similarity_threshold': threshold, 'top_k': top_k}
+                for weight, threshold, top_k in product(
+                    _parse_grid(weights, float, 'weights'), _parse_grid(thresholds, float, 'thresholds'),
+                    k_values)]
+        
+        samples, invalid = _read_gold(gold_file, level)
+        for line_no, reason in invalid[:5]:
+            formatter.print_warning(f"跳过第 {line_no} 行: {reason}")
+        if not samples:
+            formatter.print_error("标注文件中没有有效的样本")
+            return
+        
+        total = len(grid) * len(samples)
+        if total > max_requests:
+            formatter.print_error(f"{len(grid)} 个参数组合 × {len(samples)} 个查询 = {total} 个请求，"
+                                  f"超过 --max-requests {max_requests}，请缩小参数网格或提高上限")
+            return
+        if output_format == 'table':
+            formatter.print_info(f"{len(grid)} 个参数组合 × {len(samples)} 个查询 = {total} 个请求，并发 {concurrency}")
+        client.ensure_pool_size(concurrency)
+        
+        # 网格点和查询交错展开，所有组合同时推进、共享同一个并发上限
+        tasks = [(point_index, sample_index) for sample_index in range(len(samples))
+                 for point_index in range(len(grid))]
+        
+        def run(task):
+            point_index, sample_index = task
+            overrides = {key: value for key, value in grid[point_index].items() if value is not None}
+            return task, _run_sample(client, samples[sample_index], defaults, overrides=overrides)
+        
+        outcomes = [[None] * len(samples) for _ in grid]
+        start = time.perf_counter()
+        for (point_index, sample_index), outcome in bounded_map(run, tasks, workers=concurrency, ordered=False):
+            outcomes[point_index][sample_index] = outcome
+        elapsed = time.perf_counter() - start
+        
+        points = []
+        for point, results in zip(grid, outcomes):
+            k = point['top_k']
+            ok = [i for i, outcome in enumerate(results) if outcome['error'] is None]
+            mean = ranking_metrics([results[i]['ranked'] for i in ok], [samples[i]['relevant'] for i in ok],
+                                   [k])['mean'] if ok else {}
+            latency = latency_summary([results[i]['latency_ms'] for i in ok], (50, 90))
+            payload = [results[i]['payload_bytes'] for i in ok]
+            points.append({
+                'weight': point['vector_similarity_weight'],
+                'threshold': point['similarity_threshold'],
+                'top_k': k,
+                'recall': mean.get(f'recall@{k}'),
+                'mrr': mean.get('mrr'),
+                'p50_ms': latency['p50_ms'],
+                'p90_ms': latency['p90_ms'],
+                'payload_kb': round(sum(payload) / len(payload) / 1024, 2) if payload else None,
+                'errors': len(results) - len(ok),
+            })
+        _pareto_front(points, maximize=('recall', 'mrr'), minimize=('p50_ms', 'payload_kb'))
+        points.sort(key=lambda point: (-(point['recall'] or 0), -(point['mrr'] or 0), point['p50_ms'] or 0))
+        
+        result = {'queries': len(samples), 'grid_points': len(grid), 'requests': total,
+                  'elapsed_s': round(elapsed, 2), 'points': points}
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        
+        shown = [point for point in points if point['pareto']] if pareto_only else points
+        if output_format == 'table':
+            formatter.print_rich_table([{**point, 'pareto': '★' if point['pareto'] else ''} for point in shown],
+                                       "参数扫描（recall@top_k / MRR，★ 为帕累托最优）")
+            formatter.print_info(f"完成 {total} 个请求，耗时 {elapsed:.1f}s")
+        else:
+            print(formatter.format_output({**result, 'points': shown}))
+    except click.BadParameter as e:
+        OutputFormatter().print_error(e.format_message())
+    except Exception as e:
+        formatter = OutputFormatter()
+        formatter.print_error(f"参数扫描失败: {e}")
@@ -0,0 +1,129 @@
+import click
+import os
+import time
+
+from utils.cli_runner import run_command, split_command_line
+
+
+DEFAULT_HISTORY_FILE = '~/.ragforge/shell_history'
+
+
+class CommandCompleter:
+    """基于click命令树的readline补全器"""
+
+    def __init__(self, root_command: click.Group):
+        self.root_command = root_command
+        self._matches = []
+
+    def _candidates(self, args, prefix):
+        ctx = click.Context(self.root_command)
+        command = self.root_command
+        for arg in args:
+            if isinstance(command, click.Group) and not arg.startswith('-'):
+                sub = command.get_command(ctx, arg)
+                if sub is None:
+                    break
+                command = sub
+        names = []
+        if isinstance(command, click.Group):
+            names.extend(command.list_commands(ctx))
+        if prefix.startswith('-') or not isinstance(command, click.Group):
+            for param in command.params:
+                if isinstance(param, click.Option):
+                    names.extend(param.opts + param.secondary_opts)
+            names.append('--help')
+        if command is self.root_command:
+            names.extend(SHELL_BUILTINS)
+        return sorted(name for name in set(names) if name.startswith(prefix))
+
+    def complete(self, text, state):
+        import readline
+        if state == 0:
+            line = readline.get_line_buffer()[:readline.get_endidx()]
+            try:
+                args = split_command_line(line)
+            except ValueError:
+                args = []
+            if text and args and args[-1] == text:
+                args = args[:-1]
+            self._matches = self._candidates(args, text)
+        return self._matches[state] if state < len(self._matches) else None
+
+
+# shell内置命令
+SHELL_BUILTINS = ('exit', 'quit', 'help')
+
+
+def _setup_readline(root_command, history_file):
+    """启用历史记录和Tab补全，readline不可用时返回None"""
+    try:
+        import readline
+    except ImportError:
+        return None
+    try:
+        readline.read_history_file(history_file)
+    except OSError:
+        pass
+    readline.set_history_length(1000)
+    readline.set_completer(CommandCompleter(root_command).complete)
+    readline.set_completer_delims(' \t\n')
+    readline.parse_and_bind('tab: complete')
+    return readline
+
+
+@click.command()
+@click.option('--history-file', default=DEFAULT_HISTORY_FILE, help='命令历史文件')
+@click.option('--timing', is_flag=True, help='显示每条命令的耗时')
+@click.pass_context
+def shell(ctx, history_file, timing):
+    """交互式shell，在同一进程内执行命令
+
+    所有命令共享配置缓存、连接池和响应缓存，省去每条命令的进程启动开销。
+    命令格式与CLI相同（可省略 `python main.py` 前缀），例如 `datasets list`。
+    """
+    root_command = ctx.find_root().command
+    history_path = os.path.expanduser(history_file)
+    readline = _setup_readline(root_command, history_path)
+
+    # 预热配置、日志和连接池
+    from api_client import APIClient
+    APIClient()
+
+    click.echo("RAGForge shell - 输入 help 查看命令，exit 退出，Tab 补全")
+    try:
+        while True:
+            try:
+                line = input('ragforge> ')
+            except KeyboardInterrupt:
+                click.echo()
+                continue
+            except EOFError:
+                click.echo()
+                break
+
+            try:
+                args = split_command_line(line)
+            except ValueError as e:
+                click.echo(f"命令解析失败: {e}", err=True)
+                continue
+            if not args:
+                continue
+            if args[0] in ('exit', 'quit'):
+                break
+            if args[0] == 'help':
+                args = args[1:] + ['--help']
+            if args[0] == 'shell':
+                click.echo("已在shell中", err=True)
+                continue
+
+            start = time.perf_counter()
+            exit_code = run_command(root_command, args)
+            if timing:
+                click.echo(f"[{(time.perf_counter() - start) * 1000:.0f} ms, 退出码 {exit_code}]", err=True)
+    finally:
+        if readline is not None:
+            try:
+                os.makedirs(os.path.dirname(history_path) or '.', exist_ok=True)
+                readline.write_history_file(history_path)
+            except OSError:
+                pass
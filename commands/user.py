@@ -2,7 +2,6 @@ import click
 from typing import Dict, Any, Optional
 from api_client import APIClient
 from utils.output import OutputFormatter
-from password_utils import encrypt_password
 
 # 全局认证状态管理
 _auth_client = None
@@ -87,6 +86,7 @@ def login(email, password, output_format):
         formatter = OutputFormatter(output_format)
         
         # 加密密码
+        from password_utils import encrypt_password
         encrypted_password = encrypt_password(password)
         
         # 构建登录数据
@@ -178,6 +178,7 @@ def register(email, password, nickname, output_format):
         formatter = OutputFormatter(output_format)
         
         # 加密密码
+        from password_utils import encrypt_password
         encrypted_password = encrypt_password(password)
         
         # 构建注册数据
@@ -220,6 +221,7 @@ def reset_password(email, new_password, output_format):
         formatter = OutputFormatter(output_format)
         
         # 加密新密码
+        from password_utils import encrypt_password
         encrypted_new_password = encrypt_password(new_password)
         
         # 构建重置密码数据
@@ -266,6 +268,7 @@ def change_password(old_password, new_password, output_format):
             return
         
         # 加密密码
+        from password_utils import encrypt_password
         encrypted_old_password = encrypt_password(old_password)
         encrypted_new_password = encrypt_password(new_password)
         
@@ -5,25 +5,33 @@
 这个脚本演示了如何使用 RAGForge Shell 上传文件到数据集。
 """
 
-import subprocess
 import sys
 import os
 
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import cli
+from utils.cli_runner import OutputCapture, split_command_line
+from utils.output import reset_error_count, error_count
+
 
 def run_command(cmd):
-    """运行命令并显示结果"""
+    """在当前进程内运行命令并显示结果（所有命令共享同一个连接池）"""
     print(f"执行: {cmd}")
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=30)
-        if result.returncode == 0:
+        reset_error_count()
+        with OutputCapture() as capture:
+            returncode, stdout, stderr = capture.run(cli, split_command_line(cmd))
+        if returncode == 0 and error_count() == 0:
             print("✅ 成功")
-            if result.stdout.strip():
-                print(f"输出: {result.stdout.strip()}")
+            if stdout.strip():
+                print(f"输出: {stdout.strip()}")
         else:
             print("❌ 失败")
-            if result.stderr.strip():
-                print(f"错误: {result.stderr.strip()}")
-        return result.returncode == 0
+            if stderr.strip() or stdout.strip():
+                print(f"错误: {(stderr or stdout).strip()}")
+        return returncode == 0 and error_count() == 0
     except Exception as e:
         print(f"❌ 执行错误: {e}")
         return False
@@ -4,33 +4,70 @@ RAGForge API 脚本工具
 提供简洁易用的命令行接口
 """
 
-import click
 import os
 import sys
 
 # 添加当前目录到 Python 路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from api_client import APIClient
-from utils.output import OutputFormatter
+# 守护进程运行时直接把命令转发给它，跳过click和命令模块的导入
+if __name__ == '__main__':
+    from utils.daemon_client import forward
+    _exit_code = forward(sys.argv[1:])
+    if _exit_code is not None:
+        sys.exit(_exit_code)
+
+import click
+import importlib
+
+from utils.http_cache import NO_CACHE
+
+
+# 命令组 -> "模块:属性"，仅在执行对应子命令时才导入
+LAZY_COMMANDS = {
+    'datasets': 'commands.datasets:datasets',
+    'documents': 'commands.documents:documents',
+    'models': 'commands.models:models',
+    'chunks': 'commands.chunks:chunks',
+    'retrieval': 'commands.retrieval:retrieval',
+    'user': 'commands.user:user',
+    'debug': 'commands.debug:debug',
+    'system': 'commands.system:system',
+    'teams': 'commands.teams:teams',
+    'daemon': 'commands.daemon:daemon',
+    'shell': 'commands.shell:shell',
+    'batch': 'commands.batch:batch',
+}
+
+
+class LazyGroup(click.Group):
+    """延迟加载子命令的命令组
 
-# 导入命令模块
-from commands.datasets import datasets
-from commands.documents import documents
-from commands.chunks import chunks
-from commands.retrieval import retrieval
-from commands.models import models
-from commands.user import user
-from commands.debug import debug
-from commands.system import system
-from commands.teams import teams
+    命令模块会连带导入requests、rich、pycryptodome等较重的依赖，
+    按需导入可以让 `main.py version` 这类命令不再为其付出启动时间。
+    """
+    
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+    
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+    
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module_name, attr = self.lazy_commands[cmd_name].split(':')
+            command = getattr(importlib.import_module(module_name), attr)
+            self.add_command(command, name=cmd_name)
+        return super().get_command(ctx, cmd_name)
 
 
-@click.group()
+@click.group(cls=LazyGroup, lazy_commands=LAZY_COMMANDS)
 @click.option('--config', default='config.yaml', help='配置文件路径')
 @click.option('--debug', is_flag=True, help='启用调试模式')
+@click.option('--no-cache', is_flag=True, help='绕过只读接口的本地响应缓存')
 @click.pass_context
-def cli(ctx, config, debug):
+def cli(ctx, config, debug, no_cache):
     """RAGForge API 脚本工具
     
     提供简洁易用的命令行接口，封装各种API调用。
@@ -45,18 +82,9 @@ def cli(ctx, config, debug):
     ctx.ensure_object(dict)
     ctx.obj['config'] = config
     ctx.obj['debug'] = debug
-
-
-# 添加命令到CLI组
-cli.add_command(datasets, name='datasets')
-cli.add_command(documents, name='documents')
-cli.add_command(models, name='models')
-cli.add_command(chunks, name='chunks')
-cli.add_command(retrieval, name='retrieval')
-cli.add_command(user, name='user')
-cli.add_command(debug, name='debug')
-cli.add_command(system, name='system')
-cli.add_command(teams, name='teams')
+    if no_cache:
+        token = NO_CACHE.set(True)
+        ctx.call_on_close(lambda: NO_CACHE.reset(token))
 
 
 @cli.command()
@@ -100,6 +128,7 @@ def api_list(output_format):
             print(formatter.format_output(response))
             
     except Exception as e:
+        from utils.output import OutputFormatter
         formatter = OutputFormatter()
         formatter.print_error(f"获取API列表失败: {e}")
 
@@ -152,6 +181,7 @@ def api_call(endpoint, method, data, output_format):
             print(formatter.format_output(response))
             
     except Exception as e:
+        from utils.output import OutputFormatter
         formatter = OutputFormatter()
         formatter.print_error(f"API调用失败: {e}")
 
@@ -170,6 +200,7 @@ def config_show():
         formatter.print_rich_table([config], "当前配置")
         
     except Exception as e:
+        from utils.output import OutputFormatter
         formatter = OutputFormatter()
         formatter.print_error(f"获取配置失败: {e}")
 
@@ -49,22 +49,18 @@ done
 
 echo "测试文档生成完成"
 
-# 批量上传文档
+# 批量上传文档（在同一进程内执行，共享连接池）
 echo "批量上传文档..."
-success_count=0
-fail_count=0
-
+: > temp_batch/commands.txt
 for i in {1..5}; do
-    echo "上传文档 ${i}..."
-    if uv run python "$PROJECT_ROOT/main.py" documents upload "batch_test_dataset" --file "temp_batch/doc_${i}.txt" &> /dev/null; then
-        echo "文档 ${i} 上传成功"
-        success_count=$((success_count + 1))
-    else
-        echo "文档 ${i} 上传失败"
-        fail_count=$((fail_count + 1))
-    fi
+    echo "documents upload batch_test_dataset --file temp_batch/doc_${i}.txt" >> temp_batch/commands.txt
 done
 
+uv run python "$PROJECT_ROOT/main.py" batch run temp_batch/commands.txt --jobs 4 --continue-on-error --quiet --log temp_batch/results.jsonl || true
+
+success_count=$(grep -c '"status": "ok"' temp_batch/results.jsonl || true)
+fail_count=$(grep -c '"status": "failed"' temp_batch/results.jsonl || true)
+
 echo "批量上传完成"
 echo "成功: ${success_count} 个文档"
 echo "失败: ${fail_count} 个文档"
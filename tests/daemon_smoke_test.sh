@@ -0,0 +1,62 @@
+#!/bin/bash
+
+# 守护进程转发冒烟测试 - 验证通过守护进程转发的命令输出与本地执行一致
+# 使用方法: ./tests/daemon_smoke_test.sh
+# 环境变量:
+#   PYTHON                 Python解释器（默认 python）
+#   DAEMON_SMOKE_CMDS      自定义要对比的命令，以分号分隔
+# 使用临时socket，不影响已在运行的守护进程；无需登录或服务端
+
+set -e
+
+# 颜色定义
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# 获取脚本所在目录的上级目录（项目根目录）
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+
+PYTHON="${PYTHON:-python}"
+DAEMON_SMOKE_CMDS="${DAEMON_SMOKE_CMDS:-version;--help;datasets --help;documents --help}"
+
+WORK_DIR="$(mktemp -d)"
+export RAGFORGE_DAEMON_SOCKET="$WORK_DIR/daemon.sock"
+unset RAGFORGE_NO_DAEMON
+
+cleanup() {
+    "$PYTHON" "$PROJECT_ROOT/main.py" daemon stop > /dev/null 2>&1 || true
+    rm -rf "$WORK_DIR"
+}
+trap cleanup EXIT
+
+"$PYTHON" "$PROJECT_ROOT/main.py" daemon start --log-file "$WORK_DIR/daemon.log"
+
+failed=0
+IFS=';' read -ra COMMANDS <<< "$DAEMON_SMOKE_CMDS"
+for cmd in "${COMMANDS[@]}"; do
+    # shellcheck disable=SC2086
+    expected=$(RAGFORGE_NO_DAEMON=1 "$PYTHON" "$PROJECT_ROOT/main.py" $cmd 2>&1)
+    set +e
+    # shellcheck disable=SC2086
+    actual=$("$PYTHON" "$PROJECT_ROOT/main.py" $cmd 2>&1)
+    exit_code=$?
+    set -e
+    if [ "$exit_code" -ne 0 ] || [ -z "$actual" ] || [ "$actual" != "$expected" ]; then
+        echo -e "${RED}[ERROR]${NC} main.py $cmd 转发执行失败（退出码 $exit_code）"
+        diff <(echo "$expected") <(echo "$actual") || true
+        failed=1
+    else
+        echo -e "${BLUE}[INFO]${NC} main.py $cmd 转发输出一致"
+    fi
+done
+
+if [ "$failed" -ne 0 ]; then
+    echo -e "${RED}[ERROR]${NC} 守护进程日志:"
+    tail -20 "$WORK_DIR/daemon.log"
+    exit 1
+fi
+
+echo -e "${GREEN}[SUCCESS]${NC} 守护进程转发冒烟测试通过"
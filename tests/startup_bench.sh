@@ -0,0 +1,65 @@
+#!/bin/bash
+
+# CLI启动时间基准测试 - 防止启动时间回退
+# 使用方法: ./tests/startup_bench.sh [运行次数]
+# 环境变量:
+#   PYTHON                 Python解释器（默认 python）
+#   STARTUP_BUDGET_MS      `main.py version` 中位耗时上限，超出时返回非零（默认 250）
+#   STARTUP_BENCH_CMDS     自定义要测量的命令，以分号分隔
+
+set -e
+
+# 颜色定义
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# 获取脚本所在目录的上级目录（项目根目录）
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(dirname "$SCRIPT_DIR")"
+
+PYTHON="${PYTHON:-python}"
+RUNS="${1:-10}"
+STARTUP_BUDGET_MS="${STARTUP_BUDGET_MS:-250}"
+STARTUP_BENCH_CMDS="${STARTUP_BENCH_CMDS:-version;--help;documents --help;retrieval --help}"
+
+# 测量一条命令RUNS次的中位耗时（毫秒）
+median_ms() {
+    local args="$1"
+    local samples=()
+    for ((i = 0; i < RUNS; i++)); do
+        local start end
+        start=$(date +%s%N)
+        # shellcheck disable=SC2086
+        "$PYTHON" "$PROJECT_ROOT/main.py" $args > /dev/null 2>&1 || true
+        end=$(date +%s%N)
+        samples+=($(( (end - start) / 1000000 )))
+    done
+    printf '%s\n' "${samples[@]}" | sort -n | awk '{a[NR]=$1} END {print a[int((NR + 1) / 2)]}'
+}
+
+echo -e "${BLUE}[INFO]${NC} CLI启动时间基准（每条命令运行 ${RUNS} 次，取中位数）"
+printf '%-30s %10s\n' "命令" "耗时(ms)"
+
+IFS=';' read -ra COMMANDS <<< "$STARTUP_BENCH_CMDS"
+version_ms=""
+for cmd in "${COMMANDS[@]}"; do
+    ms=$(median_ms "$cmd")
+    printf '%-30s %10s\n' "main.py $cmd" "$ms"
+    if [ "$cmd" = "version" ]; then
+        version_ms="$ms"
+    fi
+done
+
+# 列出 `main.py version` 导入耗时最多的模块，便于定位回退来源
+echo -e "\n${BLUE}[INFO]${NC} main.py version 导入耗时前10的模块（累计微秒）"
+"$PYTHON" -X importtime "$PROJECT_ROOT/main.py" version 2>&1 >/dev/null \
+    | grep '^import time:' | sort -t'|' -k2 -n | tail -10
+
+if [ -n "$version_ms" ] && [ "$version_ms" -gt "$STARTUP_BUDGET_MS" ]; then
+    echo -e "${RED}[ERROR]${NC} main.py version 耗时 ${version_ms}ms，超出预算 ${STARTUP_BUDGET_MS}ms"
+    exit 1
+fi
+
+echo -e "${GREEN}[SUCCESS]${NC} 启动时间在预算之内"
@@ -0,0 +1,105 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def read_ids(path: str) -> List[str]:
+    """从文件（- 为标准输入）读取ID，每行一个，忽略空行和 # 注释"""
+    import click
+    with click.open_file(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def submit_with_bisect(send: Callable[[List[str]], Optional[str]], ids: List[str],
+                       pending: Optional[Callable[[List[str]], Iterable[str]]] = None
+                       ) -> Dict[str, Optional[str]]:
+    """提交一批ID，返回 {ID: 错误信息}，成功的为None
+
+    send(ids) 成功时返回None，被服务端拒绝时返回错误信息。批量接口通常只要
+    有一个ID有问题整批都会报错，此时把批次二分后分别重新提交，只需少量
+    额外请求即可定位具体出错的ID。send 抛出的异常（网络错误、认证失败等）
+    与具体ID无关，不再拆分，整批记为失败。
+
+    服务端可能在报错前已处理了批次中的一部分ID。给出 pending(ids) 时，批次被
+    拒绝后先用它查询仍需处理的ID（如删除时仍然存在的文档），其余ID记为成功，
+    只对剩下的ID二分重试；pending 本身出错时按整批都未处理对待。
+    """
+    try:
+        error = send(ids)
+    except Exception as e:
+        return {item: str(e) for item in ids}
+    if error is None:
+        return {item: None for item in ids}
+    outcome = {}
+    if pending is not None:
+        try:
+            remaining = set(pending(ids))
+        except Exception:
+            remaining = set(ids)
+        outcome = {item: None for item in ids if item not in remaining}
+        ids = [item for item in ids if item in remaining]
+        if not ids:
+            return outcome
+    if len(ids) == 1:
+        outcome[ids[0]] = error
+        return outcome
+    middle = len(ids) // 2
+    outcome.update(submit_with_bisect(send, ids[:middle], pending))
+    outcome.update(submit_with_bisect(send, ids[middle:], pending))
+    return outcome
+
+
+def run_batches(send: Callable[[List[str]], Optional[str]], ids: List[str], batch_size: int = 100,
+                workers: int = 4, on_batch: Optional[Callable[[Dict[str, Optional[str]]], None]] = None,
+                pending: Optional[Callable[[List[str]], Iterable[str]]] = None
+                ) -> Dict[str, Optional[str]]:
+    """把ID按batch_size分批、最多workers个批次并发提交，返回每个ID的结果
+
+    on_batch 在每批完成时（在调用线程中）以该批的结果调用，可用于显示进度。
+    pending 的含义见 submit_with_bisect。
+    """
+    batch_size = max(1, batch_size)
+    batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+    outcome = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(submit_with_bisect, send, batch, pending) for batch in batches]
+        for future in as_completed(futures):
+            result = future.result()
+            outcome.update(result)
+            if on_batch:
+                on_batch(result)
+    return outcome
+
+
+def bounded_map(fn: Callable[[T], R], items: Iterable[T], workers: int = 4,
+                window: Optional[int] = None, ordered: bool = True) -> Iterator[R]:
+    """用线程池并发执行fn，逐个产出结果
+
+    最多同时有 window（默认 workers*2）个任务已提交，items 惰性读取，因此
+    输入和结果都不会整体载入内存。ordered 为True时按输入顺序产出（慢任务会
+    阻塞其后已完成的结果，window 决定可缓冲多少个），否则按完成顺序产出。
+    fn 抛出的异常在产出对应结果时抛出。
+    """
+    window = max(1, window or workers * 2)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        if ordered:
+            pending = deque()
+            for item in items:
+                pending.append(executor.submit(fn, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+            return
+        running = set()
+        for item in items:
+            running.add(executor.submit(fn, item))
+            if len(running) >= window:
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(running):
+            yield future.result()
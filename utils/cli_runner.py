@@ -0,0 +1,98 @@
+import click
+import io
+import sys
+import threading
+
+
+def run_command(root_command: click.Command, argv) -> int:
+    """在本进程内执行一条CLI命令行并返回退出码"""
+    try:
+        result = root_command.main(args=list(argv), prog_name='main.py', standalone_mode=False)
+        return result if isinstance(result, int) else 0
+    except click.exceptions.Exit as e:
+        return e.exit_code
+    except click.ClickException as e:
+        e.show()
+        return e.exit_code
+    except click.Abort:
+        click.echo("操作已取消", err=True)
+        return 1
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception as e:
+        click.echo(f"错误: {e}", err=True)
+        return 1
+
+
+# 命令行前缀，粘贴脚本中的完整命令时自动去掉
+_PROGRAM_PREFIXES = (('uv', 'run', 'python', 'main.py'), ('python', 'main.py'),
+                     ('python3', 'main.py'), ('main.py',))
+
+
+def split_command_line(line: str):
+    """把一行命令解析为参数列表，忽略空行、注释和 `python main.py` 前缀"""
+    import shlex
+    args = shlex.split(line, comments=True)
+    for prefix in _PROGRAM_PREFIXES:
+        if tuple(args[:len(prefix)]) == prefix:
+            return args[len(prefix):]
+    return args
+
+
+class _ThreadLocalStream(io.TextIOBase):
+    """按线程分流的输出流：设置了缓冲区的线程写入缓冲区，其余线程写入原始流"""
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    @property
+    def buffer_target(self):
+        return getattr(self._local, 'target', None)
+
+    @buffer_target.setter
+    def buffer_target(self, target):
+        self._local.target = target
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False if self.buffer_target is not None else self._fallback.isatty()
+
+    def write(self, text):
+        target = self.buffer_target
+        return (target if target is not None else self._fallback).write(text)
+
+    def flush(self):
+        if self.buffer_target is None:
+            self._fallback.flush()
+
+
+class OutputCapture:
+    """在同一进程内并发执行命令并分别捕获各自的输出
+
+    用法:
+        with OutputCapture() as capture:
+            exit_code, stdout, stderr = capture.run(cli, ['datasets', 'list'])
+    """
+
+    def __enter__(self):
+        self.original_stdout, self.original_stderr = sys.stdout, sys.stderr
+        self._stdout = _ThreadLocalStream(sys.stdout)
+        self._stderr = _ThreadLocalStream(sys.stderr)
+        sys.stdout, sys.stderr = self._stdout, self._stderr
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        sys.stdout, sys.stderr = self.original_stdout, self.original_stderr
+
+    def run(self, root_command: click.Command, argv):
+        """执行一条命令，返回 (退出码, 标准输出, 标准错误)"""
+        out, err = io.StringIO(), io.StringIO()
+        self._stdout.buffer_target, self._stderr.buffer_target = out, err
+        try:
+            exit_code = run_command(root_command, argv)
+        finally:
+            self._stdout.buffer_target = self._stderr.buffer_target = None
+        return exit_code, out.getvalue(), err.getvalue()
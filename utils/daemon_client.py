@@ -0,0 +1,123 @@
+"""守护进程瘦客户端
+
+只依赖标准库，main.py在导入click和命令模块之前就用它把命令转发给
+常驻的守护进程（见 commands/daemon.py），使转发路径的启动开销最小。
+"""
+
+import json
+import os
+import shutil
+import socket
+import sys
+from typing import Dict, Any, Optional
+
+
+DEFAULT_SOCKET_PATH = '~/.ragforge/daemon.sock'
+
+# 设置该环境变量可禁止CLI转发到守护进程
+NO_DAEMON_ENV = 'RAGFORGE_NO_DAEMON'
+
+# 需要交互或管理守护进程本身的命令，始终在本进程内执行
+LOCAL_COMMANDS = {'daemon', 'shell'}
+
+# 根命令中需要参数的全局选项，判断子命令时连同参数一起跳过
+GLOBAL_OPTIONS_WITH_VALUE = {'--config'}
+
+# 随请求转发给守护进程的环境变量
+FORWARDED_ENV = ('RAGFORGE_NO_CACHE', 'NO_COLOR', 'TERM')
+
+
+def get_socket_path() -> str:
+    """守护进程的Unix socket路径，可通过 RAGFORGE_DAEMON_SOCKET 覆盖"""
+    return os.path.expanduser(os.environ.get('RAGFORGE_DAEMON_SOCKET', DEFAULT_SOCKET_PATH))
+
+
+def _connect(timeout: Optional[float] = 1.0) -> Optional[socket.socket]:
+    """连接守护进程，未运行时返回None"""
+    path = get_socket_path()
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any]):
+    """发送一条以换行结尾的JSON消息"""
+    sock.sendall(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+def request(op: str, **payload) -> Optional[Dict[str, Any]]:
+    """发送一条控制请求并返回应答"""
+    sock = _connect()
+    if sock is None:
+        return None
+    with sock, sock.makefile('r', encoding='utf-8') as reader:
+        send_message(sock, dict(payload, op=op))
+        line = reader.readline()
+    return json.loads(line) if line else None
+
+
+def _command_name(argv) -> Optional[str]:
+    """跳过开头的全局选项（如 --debug、--config x），返回子命令名，没有时返回None"""
+    args = iter(argv)
+    for arg in args:
+        if arg in GLOBAL_OPTIONS_WITH_VALUE:
+            next(args, None)
+        elif not arg.startswith('-'):
+            return arg
+    return None
+
+
+def forward(argv) -> Optional[int]:
+    """瘦客户端：把命令行转发给守护进程执行
+
+    返回命令的退出码；守护进程未运行或该命令需要在本进程执行时返回None，
+    调用方应回退到进程内执行。
+    """
+    command = _command_name(argv)
+    if os.environ.get(NO_DAEMON_ENV) or command is None or command in LOCAL_COMMANDS:
+        return None
+    sock = _connect()
+    if sock is None:
+        return None
+
+    env = {key: os.environ[key] for key in FORWARDED_ENV if key in os.environ}
+    env['COLUMNS'] = str(shutil.get_terminal_size().columns)
+    if sys.stdout.isatty():
+        env['FORCE_COLOR'] = '1'
+    request = {'op': 'run', 'argv': list(argv), 'cwd': os.getcwd(), 'env': env}
+    # 只有显式以 "-" 从标准输入读取时才转发stdin，避免阻塞在未关闭的管道上
+    if '-' in argv:
+        request['stdin'] = sys.stdin.read()
+
+    exit_code = 1
+    with sock, sock.makefile('r', encoding='utf-8') as reader:
+        try:
+            send_message(sock, request)
+            for line in reader:
+                message = json.loads(line)
+                if 'stdout' in message:
+                    sys.stdout.write(message['stdout'])
+                    sys.stdout.flush()
+                elif 'stderr' in message:
+                    sys.stderr.write(message['stderr'])
+                    sys.stderr.flush()
+                elif 'exit_code' in message:
+                    exit_code = message['exit_code']
+                    break
+        except KeyboardInterrupt:
+            # 通知守护进程中止命令并释放执行锁，与本地执行时一样提示后退出
+            try:
+                send_message(sock, {'op': 'cancel'})
+            except OSError:
+                pass
+            sys.stderr.write("\n操作已取消\n")
+            return 1
+    return exit_code
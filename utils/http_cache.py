@@ -0,0 +1,197 @@
+import contextvars
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Dict, Any, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+
+# 只读端点的默认缓存时间（秒），键为端点路径的通配模式
+DEFAULT_CACHE_TTLS = {
+    '/api/v1/datasets': 30,
+    '/v1/llm/factories': 3600,
+    '/v1/llm/default_models': 300,
+    '/v1/system/version': 3600,
+    '/apispec.json': 86400,
+}
+
+# 写操作影响的其他资源组：写端点的通配模式 -> 需要一并失效的路径
+# （同一资源组内的写操作总会使该组失效，这里只列出跨组的影响）
+DEFAULT_CACHE_INVALIDATIONS = {
+    # 上传、删除、解析文档会改变知识库的文档数和块数
+    '/v1/document/*': ['/api/v1/datasets'],
+    '/v1/kb/*': ['/api/v1/datasets'],
+    '/v1/chunk/*': ['/api/v1/datasets'],
+}
+
+DEFAULT_CACHE_CONFIG = {
+    'enabled': True,
+    'dir': '~/.ragforge/cache/http',
+    'max_size_mb': 64,
+    'ttls': DEFAULT_CACHE_TTLS,
+    'invalidations': DEFAULT_CACHE_INVALIDATIONS,
+}
+
+# 设置该环境变量可绕过缓存
+NO_CACHE_ENV = 'RAGFORGE_NO_CACHE'
+
+# main.py --no-cache 只作用于当前命令：保存在上下文变量中，命令结束时恢复，
+# shell、batch run 中的后续命令和其他线程中并发执行的命令不受影响
+NO_CACHE = contextvars.ContextVar('ragforge_no_cache', default=False)
+
+
+def cache_disabled() -> bool:
+    """当前命令是否绕过本地缓存（--no-cache 或 RAGFORGE_NO_CACHE）"""
+    return NO_CACHE.get() or bool(os.environ.get(NO_CACHE_ENV))
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def resource_group(path: str) -> str:
+    """路径所属的资源组：版本号之后的第一段，如 /v1/llm/set_api_key -> /v1/llm，
+    /api/v1/datasets/<id>/documents -> /api/v1/datasets；没有版本号时取第一段"""
+    parts = [part for part in path.split('/') if part]
+    for i, part in enumerate(parts):
+        if re.fullmatch(r'v\d+', part):
+            return '/' + '/'.join(parts[:i + 2])
+    return '/' + '/'.join(parts[:1])
+
+
+class HTTPCache:
+    """GET响应的磁盘缓存
+
+    每个条目是一个JSON文件，文件名为 ``<资源组哈希>_<请求哈希>.json``。写操作
+    之后失效整个资源组（如 ``/v1/llm`` 下的所有条目），以及 invalidations 中
+    为该写端点列出的其他路径所在的组。条目过期后若带有ETag，则通过
+    If-None-Match重新验证。缓存总大小超过上限时按最近使用时间（mtime）淘汰。
+    """
+
+    def __init__(self, directory: str, max_size_mb: float = 64, ttls: Optional[Dict[str, float]] = None,
+                 invalidations: Optional[Dict[str, List[str]]] = None):
+        self.directory = os.path.expanduser(directory)
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.ttls = dict(ttls or {})
+        self.invalidations = dict(invalidations or {})
+        # 目录总大小的估计值（覆盖写入时偏大），超过上限时才重新扫描目录
+        self._approx_size = None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> Optional['HTTPCache']:
+        """从 cache 配置构建；缓存被禁用时返回None"""
+        merged = dict(DEFAULT_CACHE_CONFIG)
+        merged.update(config or {})
+        if not merged.get('enabled') or cache_disabled():
+            return None
+        return cls(merged['dir'], merged['max_size_mb'], merged['ttls'], merged['invalidations'])
+
+    def ttl_for(self, endpoint: str) -> Optional[float]:
+        """返回端点的缓存时间，不可缓存时返回None"""
+        path = endpoint.split('?', 1)[0]
+        for pattern, ttl in self.ttls.items():
+            if fnmatch.fnmatch(path, pattern):
+                return ttl
+        return None
+
+    def make_key(self, url: str, params: Optional[Dict] = None, auth: Optional[str] = None) -> str:
+        """根据URL、查询参数和认证头生成缓存键（不同用户的响应互不可见）"""
+        request = json.dumps([url, sorted((params or {}).items()), auth or ''], default=str)
+        return f"{self._group_prefix(url)}_{_digest(request)}"
+
+    @staticmethod
+    def _group_prefix(url: str, path: Optional[str] = None) -> str:
+        """缓存文件名前缀：服务地址加资源组的哈希"""
+        parts = urlsplit(url)
+        return _digest(f"{parts.scheme}://{parts.netloc}{resource_group(path or parts.path)}")[:16]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目（可能已过期），并刷新其最近使用时间"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any]) -> bool:
+        return entry.get('expires_at', 0) > time.time()
+
+    def store(self, key: str, data: Any, ttl: float, etag: Optional[str] = None):
+        """写入缓存条目并按需淘汰"""
+        entry = {'expires_at': time.time() + ttl, 'etag': etag, 'data': data}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.entry-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            written = os.path.getsize(tmp_path)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError, ValueError):
+            return
+        self._evict(written)
+
+    def refresh(self, key: str, entry: Dict[str, Any], ttl: float):
+        """304重新验证成功后延长条目有效期"""
+        self.store(key, entry.get('data'), ttl, entry.get('etag'))
+
+    def affected_paths(self, path: str) -> Iterable[str]:
+        """对path的写操作需要失效的路径：path本身及 invalidations 中匹配的路径"""
+        yield path
+        for pattern, paths in self.invalidations.items():
+            if fnmatch.fnmatch(path, pattern):
+                yield from paths
+
+    def invalidate(self, url: str):
+        """删除写操作影响的资源组中的全部缓存条目（用于写操作之后）"""
+        path = urlsplit(url).path
+        prefixes = {self._group_prefix(url, affected) for affected in self.affected_paths(path)}
+        try:
+            entries = os.scandir(self.directory)
+        except OSError:
+            return
+        with entries:
+            for item in entries:
+                if item.name.split('_', 1)[0] in prefixes:
+                    try:
+                        os.remove(item.path)
+                    except OSError:
+                        pass
+
+    def _evict(self, written: int = 0):
+        """总大小超过上限时，按mtime从旧到新删除条目
+
+        每次写入只累加估计的总大小，估计值超过上限时才扫描目录，
+        连续写入大量条目时不必每次都遍历整个缓存目录。
+        """
+        if self._approx_size is not None:
+            self._approx_size += written
+            if self._approx_size <= self.max_size:
+                return
+        try:
+            with os.scandir(self.directory) as entries:
+                files = [(item.stat().st_mtime, item.stat().st_size, item.path)
+                         for item in entries if item.name.endswith('.json')]
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        if total > self.max_size:
+            for _, size, path in sorted(files):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_size:
+                    break
+        self._approx_size = total
@@ -0,0 +1,349 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+
+
+DEFAULT_JOURNAL_PATH = '~/.ragforge/ingest_journal.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest (
+    dataset_id  TEXT NOT NULL,
+    path        TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime       REAL NOT NULL,
+    sha256      TEXT,
+    document_id TEXT,
+    status      TEXT NOT NULL,
+    message     TEXT,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (dataset_id, path)
+);
+CREATE TABLE IF NOT EXISTS content (
+    dataset_id  TEXT NOT NULL,
+    sha256      TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    size        INTEGER,
+    source      TEXT,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (dataset_id, sha256)
+);
+CREATE INDEX IF NOT EXISTS content_document ON content (dataset_id, document_id);
+CREATE TABLE IF NOT EXISTS documents (
+    dataset_id  TEXT NOT NULL,
+    id          TEXT NOT NULL,
+    update_time REAL,
+    row         TEXT NOT NULL,
+    PRIMARY KEY (dataset_id, id)
+);
+CREATE TABLE IF NOT EXISTS document_sync (
+    dataset_id  TEXT PRIMARY KEY,
+    watermark   REAL,
+    synced_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS export_state (
+    dataset_id  TEXT PRIMARY KEY,
+    watermark   REAL,
+    documents   INTEGER,
+    target      TEXT,
+    exported_at REAL NOT NULL
+);
+"""
+
+# 文件数少于该值时直接在本进程内计算哈希，省去启动进程池的开销
+_PARALLEL_HASH_THRESHOLD = 16
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _hash_or_none(path: str) -> Optional[str]:
+    try:
+        return file_sha256(path)
+    except OSError:
+        return None
+
+
+def hash_files(paths: List[str], workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+    """用进程池并行计算多个文件的SHA-256，无法读取的文件对应None
+
+    哈希计算受CPU限制，多进程才能跟上高速磁盘；文件很少时在本进程内计算。
+    """
+    if len(paths) < _PARALLEL_HASH_THRESHOLD or workers == 1:
+        return {path: _hash_or_none(path) for path in paths}
+    from concurrent.futures import ProcessPoolExecutor
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, min(64, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(paths, executor.map(_hash_or_none, paths, chunksize=chunksize)))
+
+
+class _LocalStore:
+    """本地SQLite存储的公共部分（上传日志和内容索引共用一个数据库文件）"""
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        self.path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class IngestJournal(_LocalStore):
+    """上传日志：在本地SQLite中记录每个文件的上传结果
+
+    每个知识库内按文件绝对路径记录大小、mtime、内容哈希和返回的文档ID，
+    每条结果立即提交，进程中途退出后已完成的文件不会丢失。恢复上传时
+    只需一次查询加上对每个文件的stat，10万个文件也能在数秒内完成比对。
+    """
+
+    def completed(self, dataset_id: str) -> Dict[str, Dict[str, Any]]:
+        """返回知识库中已成功上传的文件，键为绝对路径"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime, sha256, document_id FROM ingest "
+                "WHERE dataset_id = ? AND status = 'success'", (dataset_id,)).fetchall()
+        return {row[0]: {'size': row[1], 'mtime': row[2], 'sha256': row[3], 'document_id': row[4]}
+                for row in rows}
+
+    def is_unchanged(self, dataset_id: str, path: str, entry: Dict[str, Any]) -> bool:
+        """判断文件自上次成功上传后是否未变
+
+        大小和mtime一致即视为未变；仅mtime变化时比较内容哈希，
+        内容相同则更新记录中的mtime，下次直接命中。
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != entry['size']:
+            return False
+        if stat.st_mtime == entry['mtime']:
+            return True
+        if not entry.get('sha256') or file_sha256(path) != entry['sha256']:
+            return False
+        with self._lock:
+            self._conn.execute("UPDATE ingest SET mtime = ? WHERE dataset_id = ? AND path = ?",
+                               (stat.st_mtime, dataset_id, os.path.abspath(path)))
+            self._conn.commit()
+        return True
+
+    def record(self, dataset_id: str, path: str, status: str, size: int, mtime: float,
+               sha256: Optional[str] = None, document_id: Optional[str] = None,
+               message: Optional[str] = None):
+        """记录（或覆盖）一个文件的上传结果"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ingest "
+                "(dataset_id, path, size, mtime, sha256, document_id, status, message, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (dataset_id, os.path.abspath(path), size, mtime, sha256 or None,
+                 document_id or None, status, message or None, time.time()))
+            self._conn.commit()
+
+
+class ContentIndex(_LocalStore):
+    """内容寻址索引：按知识库把文件SHA-256映射到RAGForge文档ID
+
+    与上传日志共用同一个SQLite文件。索引来自本工具的上传结果，
+    并可用服务端文档列表校正（删除服务端已不存在的文档）。上传前查询
+    索引即可跳过内容完全相同的文件，无论文件路径或名称是否变化。
+    """
+
+    def lookup(self, dataset_id: str, sha256: str) -> Optional[str]:
+        """返回内容相同的已有文档ID"""
+        with self._lock:
+            row = self._conn.execute("SELECT document_id FROM content WHERE dataset_id = ? AND sha256 = ?",
+                                     (dataset_id, sha256)).fetchone()
+        return row[0] if row else None
+
+    def lookup_many(self, dataset_id: str, hashes: Iterable[str]) -> Dict[str, str]:
+        """批量查询，返回 {sha256: document_id}"""
+        wanted = set(h for h in hashes if h)
+        with self._lock:
+            rows = self._conn.execute("SELECT sha256, document_id FROM content WHERE dataset_id = ?",
+                                      (dataset_id,)).fetchall()
+        return {sha: doc_id for sha, doc_id in rows if sha in wanted}
+
+    def add(self, dataset_id: str, sha256: str, document_id: str, size: Optional[int] = None,
+            source: Optional[str] = None):
+        """登记一个文档的内容哈希"""
+        if not sha256 or not document_id:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO content (dataset_id, sha256, document_id, size, source, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (dataset_id, sha256, document_id, size, source, time.time()))
+            self._conn.commit()
+
+    def remove_documents(self, dataset_id: str, document_ids: Iterable[str]) -> int:
+        """删除指定文档的索引条目，返回删除的条数"""
+        ids = [(dataset_id, doc_id) for doc_id in document_ids]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("DELETE FROM content WHERE dataset_id = ? AND document_id = ?", ids)
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def import_journal(self, dataset_id: str) -> int:
+        """把上传日志中已成功且带哈希的记录补充进索引，返回新增条数"""
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute(
+                "INSERT OR IGNORE INTO content (dataset_id, sha256, document_id, size, source, updated_at) "
+                "SELECT dataset_id, sha256, document_id, size, path, updated_at FROM ingest "
+                "WHERE dataset_id = ? AND status = 'success' AND sha256 IS NOT NULL "
+                "AND document_id IS NOT NULL", (dataset_id,))
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def reconcile(self, dataset_id: str, existing_ids: Iterable[str]) -> int:
+        """按服务端文档列表校正索引：删除文档已不存在的条目，返回删除条数"""
+        existing = set(existing_ids)
+        with self._lock:
+            rows = self._conn.execute("SELECT document_id FROM content WHERE dataset_id = ?",
+                                      (dataset_id,)).fetchall()
+        stale = {row[0] for row in rows if row[0] not in existing}
+        return self.remove_documents(dataset_id, stale) if stale else 0
+
+    def count(self, dataset_id: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM content WHERE dataset_id = ?",
+                                      (dataset_id,)).fetchone()[0]
+
+
+class DocumentIndex(_LocalStore):
+    """文档列表的本地缓存：按知识库保存 文档ID -> 文档行
+
+    用于按ID查询文档状态，而不必每次下载完整文档列表。记录每个知识库
+    已同步到的最大 update_time 作为水位，增量刷新时只需拉取更新过的文档。
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        super().__init__(path)
+        # (知识库ID, 文档ID) -> 上次按ID核对的时间，只保存在内存中
+        self._verified = {}
+
+    def watermark(self, dataset_id: str) -> Optional[float]:
+        """返回知识库的同步水位，从未同步过时返回None"""
+        with self._lock:
+            row = self._conn.execute("SELECT watermark FROM document_sync WHERE dataset_id = ?",
+                                     (dataset_id,)).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, dataset_id: str, docs: Iterable[Dict[str, Any]]) -> Optional[float]:
+        """写入（或覆盖）文档行，返回这批文档中最大的 update_time"""
+        rows = []
+        latest = None
+        for doc in docs:
+            if not doc.get('id'):
+                continue
+            update_time = doc.get('update_time')
+            if not isinstance(update_time, (int, float)):
+                update_time = None
+            elif latest is None or update_time > latest:
+                latest = update_time
+            rows.append((dataset_id, doc['id'], update_time, json.dumps(doc, ensure_ascii=False)))
+        if rows:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO documents (dataset_id, id, update_time, row) VALUES (?, ?, ?, ?)",
+                    rows)
+                self._conn.commit()
+        return latest
+
+    def mark_synced(self, dataset_id: str, watermark: Optional[float]):
+        """记录同步水位（只会前移）"""
+        current = self.watermark(dataset_id)
+        if current is not None and (watermark is None or watermark < current):
+            watermark = current
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO document_sync (dataset_id, watermark, synced_at) "
+                               "VALUES (?, ?, ?)", (dataset_id, watermark, time.time()))
+            self._conn.commit()
+
+    def get_many(self, dataset_id: str, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """按ID批量读取文档行"""
+        ids = list(ids)
+        found = {}
+        with self._lock:
+            # SQLite单条语句的参数个数有上限，分批查询
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                for doc_id, row in self._conn.execute(
+                        f"SELECT id, row FROM documents WHERE dataset_id = ? AND id IN ({placeholders})",
+                        [dataset_id, *chunk]):
+                    found[doc_id] = json.loads(row)
+        return found
+
+    def get_all(self, dataset_id: str) -> Dict[str, Dict[str, Any]]:
+        """读取知识库的全部文档行"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, row FROM documents WHERE dataset_id = ?",
+                                      (dataset_id,)).fetchall()
+        return {doc_id: json.loads(row) for doc_id, row in rows}
+
+    def least_recently_verified(self, dataset_id: str, ids: Iterable[str], limit: int) -> List[str]:
+        """从ids中选出最久没有按ID核对过（或从未核对过）的至多limit个"""
+        with self._lock:
+            return sorted(ids, key=lambda doc_id: self._verified.get((dataset_id, doc_id), 0))[:limit]
+
+    def mark_verified(self, dataset_id: str, ids: Iterable[str]):
+        now = time.monotonic()
+        with self._lock:
+            for doc_id in ids:
+                self._verified[(dataset_id, doc_id)] = now
+
+    def remove(self, dataset_id: str, ids: Iterable[str]):
+        with self._lock:
+            self._conn.executemany("DELETE FROM documents WHERE dataset_id = ? AND id = ?",
+                                   [(dataset_id, doc_id) for doc_id in ids])
+            self._conn.commit()
+
+
+class ExportState(_LocalStore):
+    """知识库导出的水位：上次成功导出时文档的最大 update_time
+
+    增量导出只导出 update_time 大于水位的文档。
+    """
+
+    def watermark(self, dataset_id: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute("SELECT watermark FROM export_state WHERE dataset_id = ?",
+                                     (dataset_id,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, dataset_id: str, watermark: Optional[float], documents: int, target: str):
+        """记录一次成功的导出（水位只会前移）"""
+        current = self.watermark(dataset_id)
+        if current is not None and (watermark is None or watermark < current):
+            watermark = current
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO export_state "
+                               "(dataset_id, watermark, documents, target, exported_at) VALUES (?, ?, ?, ?, ?)",
+                               (dataset_id, watermark, documents, target, time.time()))
+            self._conn.commit()
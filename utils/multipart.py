@@ -0,0 +1,164 @@
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Any, Callable, Optional
+
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+_RATE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_rate(value: Optional[str]) -> Optional[float]:
+    """解析带宽限制，如 "512K"、"10M"（字节/秒），空值表示不限速"""
+    if not value:
+        return None
+    text = value.strip().upper().rstrip('/S').rstrip('B')
+    unit = text[-1] if text and text[-1] in _RATE_UNITS else ''
+    number = text[:-1] if unit else text
+    try:
+        rate = float(number) * _RATE_UNITS[unit]
+    except ValueError:
+        raise ValueError(f"无效的带宽限制: {value}")
+    return rate if rate > 0 else None
+
+
+class BandwidthLimiter:
+    """令牌桶限速器，可在多个并发上传之间共享以限制总带宽"""
+
+    def __init__(self, bytes_per_second: float):
+        self.rate = float(bytes_per_second)
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()
+
+    def reserve(self, nbytes: int) -> float:
+        """预约发送nbytes字节，返回发送前需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + nbytes / self.rate
+            return start - now
+
+
+class MultipartEncoder:
+    """流式 multipart/form-data 编码器
+
+    表单字段和文件按固定大小的块逐段产出，请求体不会整体载入内存，
+    内存占用与文件大小和并发数无关。长度可预先计算，因此请求带
+    Content-Length 而不是分块传输。同时支持同步迭代（requests）和
+    异步迭代（aiohttp，读文件在线程中进行，不阻塞事件循环），每次迭代都会
+    重新打开文件，可安全重发。发送的同时计算文件内容的SHA-256，完整发送一遍
+    后可从 ``sha256`` 读取。
+
+    progress_callback 接收已发送文件字节数的增量；重发时先以负数撤回上一次
+    迭代已报告的字节，累计值不会超过文件大小。
+
+    用法:
+        encoder = MultipartEncoder({'kb_id': dataset_id}, 'file', path)
+        client.post(endpoint, data=encoder, headers=encoder.headers)
+    """
+
+    def __init__(self, fields: Dict[str, Any], file_field: str, file_path: str,
+                 filename: Optional[str] = None, content_type: Optional[str] = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE,
+                 progress_callback: Optional[Callable[[int], None]] = None,
+                 limiter: Optional[BandwidthLimiter] = None):
+        self.file_path = file_path
+        self.block_size = max(1024, int(block_size))
+        self.progress_callback = progress_callback
+        self.limiter = limiter
+        self.boundary = uuid.uuid4().hex
+        self.file_size = os.path.getsize(file_path)
+        self._digest = hashlib.sha256()
+        self._reported = 0
+
+        filename = filename or os.path.basename(file_path)
+        content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        parts = []
+        for name, value in fields.items():
+            parts.append(f'--{self.boundary}\r\n'
+                         f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                         f'{value}\r\n')
+        quoted_name = filename.replace('\\', '\\\\').replace('"', '\\"')
+        parts.append(f'--{self.boundary}\r\n'
+                     f'Content-Disposition: form-data; name="{file_field}"; filename="{quoted_name}"\r\n'
+                     f'Content-Type: {content_type}\r\n\r\n')
+        self._head = ''.join(parts).encode('utf-8')
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """随请求发送的Content-Type和Content-Length"""
+        return {'Content-Type': self.content_type, 'Content-Length': str(len(self))}
+
+    @property
+    def sha256(self) -> str:
+        """最近一次完整发送的文件内容哈希"""
+        return self._digest.hexdigest()
+
+    def __len__(self):
+        return len(self._head) + self.file_size + len(self._tail)
+
+    def _restart(self):
+        """开始新一次迭代：撤回上一次迭代（被中断或重发前）报告的进度"""
+        if self.progress_callback and self._reported:
+            self.progress_callback(-self._reported)
+        self._reported = 0
+
+    def _sent(self, block: bytes):
+        # 进度只统计文件内容，不含表单头尾
+        if self.progress_callback and block is not self._head and block is not self._tail:
+            self._reported += len(block)
+            self.progress_callback(len(block))
+
+    def _delay(self, block: bytes) -> float:
+        return self.limiter.reserve(len(block)) if self.limiter else 0
+
+    def __iter__(self):
+        self._restart()
+        digest = hashlib.sha256()
+        with open(self.file_path, 'rb') as f:
+            block = self._head
+            while block:
+                delay = self._delay(block)
+                if delay > 0:
+                    time.sleep(delay)
+                yield block
+                self._sent(block)
+                block = f.read(self.block_size)
+                digest.update(block)
+        self._digest = digest
+        delay = self._delay(self._tail)
+        if delay > 0:
+            time.sleep(delay)
+        yield self._tail
+
+    async def __aiter__(self):
+        import asyncio
+        self._restart()
+        digest = hashlib.sha256()
+        f = await asyncio.to_thread(open, self.file_path, 'rb')
+        try:
+            block = self._head
+            while block:
+                delay = self._delay(block)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield block
+                self._sent(block)
+                block = await asyncio.to_thread(f.read, self.block_size)
+                digest.update(block)
+        finally:
+            f.close()
+        self._digest = digest
+        delay = self._delay(self._tail)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        yield self._tail
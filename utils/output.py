@@ -1,17 +1,43 @@
 import json
-import yaml
-from typing import Dict, Any, List
-from tabulate import tabulate
-from rich.console import Console
-from rich.table import Table
+import threading
+from typing import Dict, Any, List, Optional
+
+
+# 每个线程已输出的错误消息数，批量执行时用于判断命令是否失败
+# （命令在出错时打印错误后正常返回，退出码仍为0）
+_error_state = threading.local()
+
+
+def reset_error_count():
+    """清零当前线程的错误计数"""
+    _error_state.count = 0
+
+
+def error_count() -> int:
+    """当前线程自上次清零以来输出的错误消息数"""
+    return getattr(_error_state, 'count', 0)
 
 
 class OutputFormatter:
-    """输出格式化工具"""
+    """输出格式化工具
+
+    yaml、tabulate、rich 只在对应格式真正输出时才导入，以缩短CLI启动时间。
+    """
     
-    def __init__(self, format_type: str = "table"):
+    def __init__(self, format_type: str = "table", stderr: bool = False):
         self.format_type = format_type
-        self.console = Console()
+        self.stderr = stderr
+        self._console = None
+        self._csv_writer = None
+    
+    @property
+    def console(self):
+        """惰性创建的Rich控制台"""
+        if self._console is None:
+            from rich.console import Console
+            # 标准输出用于数据流时，提示信息改写到标准错误
+            self._console = Console(stderr=self.stderr)
+        return self._console
     
     def format_output(self, data: Any, title: str = "") -> str:
         """格式化输出数据"""
@@ -30,6 +56,7 @@ class OutputFormatter:
     
     def _format_yaml(self, data: Any) -> str:
         """YAML格式输出"""
+        import yaml
         return yaml.dump(data, default_flow_style=False, allow_unicode=True)
     
     def _format_table(self, data: Any, title: str = "") -> str:
@@ -46,8 +73,32 @@ class OutputFormatter:
             # 其他情况，直接转换为字符串
             return str(data)
         
+        from tabulate import tabulate
         return tabulate(table_data, headers=headers, tablefmt="grid")
     
+    def write_rows(self, rows: List[Dict], fields: Optional[List[str]] = None):
+        """流式写出一批行（ndjson 或 csv），可多次调用，每批写完立即刷新
+
+        csv 的列由 fields 或第一行的键决定，嵌套值以JSON字符串输出。
+        """
+        import sys
+        out = sys.stdout
+        if self.format_type == "csv":
+            if not rows and self._csv_writer is None:
+                return
+            if self._csv_writer is None:
+                import csv
+                self._csv_writer = csv.DictWriter(out, fieldnames=fields or list(rows[0].keys()),
+                                                  extrasaction='ignore')
+                self._csv_writer.writeheader()
+            for row in rows:
+                self._csv_writer.writerow({k: json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
+                                           for k, v in row.items()})
+        else:
+            for row in rows:
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        out.flush()
+    
     def print_rich_table(self, data: List[Dict], title: str = ""):
         """使用Rich库打印彩色表格"""
         if not isinstance(data, list):
@@ -56,6 +107,7 @@ class OutputFormatter:
             self.console.print("暂无数据", style="yellow")
             return
         
+        from rich.table import Table
         table = Table(title=title, show_header=True, header_style="bold magenta")
         
         # 定义重要字段的显示优先级
@@ -109,6 +161,7 @@ class OutputFormatter:
     
     def print_error(self, message: str):
         """打印错误消息"""
+        _error_state.count = error_count() + 1
         self.console.print(f"❌ {message}", style="red")
     
     def print_warning(self, message: str):
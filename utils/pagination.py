@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_PREFETCH = 4
+
+
+def extract_documents(response: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """从文档列表响应中取出 (文档列表, 总数)
+
+    兼容 ``{'documents': [...]}``、``{'data': [...]}`` 和
+    ``{'data': {'docs': [...], 'total': n}}`` 几种返回格式，总数未知时为None。
+    """
+    docs = response.get('documents')
+    if docs is None or docs is False or docs == {}:
+        docs = response.get('data')
+    total = None
+    if isinstance(docs, dict) and 'docs' in docs:
+        total = docs.get('total')
+        docs = docs['docs']
+    if not isinstance(docs, list):
+        docs = []
+    return docs, total if isinstance(total, int) else None
+
+
+def extract_chunks(response: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """从文档块列表响应中取出 (块列表, 总数)，兼容 ``{'chunks': [...]}`` 和 ``{'data': {'chunks': [...]}}``"""
+    data = response.get('data') if isinstance(response.get('data'), dict) else response
+    chunks = data.get('chunks')
+    if not isinstance(chunks, list):
+        chunks = []
+    total = data.get('total')
+    return chunks, total if isinstance(total, int) else None
+
+
+def iter_pages(client, endpoint: str, params: Optional[Dict[str, Any]] = None,
+               page_size: int = DEFAULT_PAGE_SIZE, prefetch: int = DEFAULT_PREFETCH,
+               extract=extract_documents, headers: Optional[Dict[str, str]] = None
+               ) -> Iterator[List[Dict[str, Any]]]:
+    """按 page/page_size 分页拉取列表，逐页产出
+
+    第一页返回总数后，后续页面最多 ``prefetch`` 页并发预取，但仍按页码顺序
+    产出；同时在内存中的页面数有上限，因此内存占用与列表总长度无关。
+    服务端不返回总数时退化为顺序翻页，直到某页不足 page_size 条。
+    headers 随每个请求发送（如列表接口需要的Bearer认证头）；响应的 code
+    不为0（如认证失败）时抛出异常，而不是当作空页。
+    """
+    base_params = dict(params or {})
+
+    def fetch(page: int) -> List[Dict[str, Any]]:
+        response = client.get(endpoint, params={**base_params, 'page': page, 'page_size': page_size},
+                              headers=headers, use_cache=False)
+        if isinstance(response, dict) and response.get('code', 0) != 0:
+            raise Exception(f"API错误: {response.get('message', '未知错误')}")
+        return extract(response)
+
+    docs, total = fetch(1)
+    yield docs
+    if len(docs) < page_size:
+        return
+
+    if total is None or prefetch <= 1:
+        page = 2
+        while True:
+            docs, _ = fetch(page)
+            if docs:
+                yield docs
+            if len(docs) < page_size:
+                return
+            page += 1
+
+    last_page = (total + page_size - 1) // page_size
+    client.ensure_pool_size(prefetch)
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        pending = {}
+        next_page = 2
+        for page in range(2, last_page + 1):
+            # 保持最多prefetch个页面在途
+            while next_page <= last_page and next_page < page + prefetch:
+                pending[next_page] = executor.submit(fetch, next_page)
+                next_page += 1
+            docs, _ = pending.pop(page).result()
+            if docs:
+                yield docs
+            if len(docs) < page_size:
+                # 列表在翻页过程中变短了，丢弃其余的预取
+                for future in pending.values():
+                    future.cancel()
+                return
+
+
+def iter_documents(client, dataset_id: str, params: Optional[Dict[str, Any]] = None,
+                   page_size: int = DEFAULT_PAGE_SIZE, prefetch: int = DEFAULT_PREFETCH,
+                   headers: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+    """惰性遍历知识库中的所有文档"""
+    for docs in iter_pages(client, f'/api/v1/datasets/{dataset_id}/documents', params,
+                           page_size=page_size, prefetch=prefetch, headers=headers):
+        yield from docs
+
+
+def iter_chunks(client, dataset_id: str, document_id: str, page_size: int = 1024,
+                prefetch: int = 1) -> Iterator[Dict[str, Any]]:
+    """惰性遍历文档的所有块"""
+    for chunks in iter_pages(client, f'/api/v1/datasets/{dataset_id}/documents/{document_id}/chunks',
+                             page_size=page_size, prefetch=prefetch, extract=extract_chunks):
+        yield from chunks
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from utils.http_cache import HTTPCache, cache_disabled
+
+
+DEFAULT_RETRIEVAL_CACHE_CONFIG = {
+    'enabled': False,
+    'max_entries': 1024,
+    'disk': True,
+    'dir': '~/.ragforge/cache/retrieval',
+    'max_size_mb': 128,
+    'ttl': 600,
+}
+
+# 数据集指纹在进程内的复用时间（秒），批量检索时不必每个查询都查询数据集
+_FINGERPRINT_TTL = 10
+
+# 数据集中会随文档增删、解析完成而变化的字段
+_FINGERPRINT_FIELDS = ('update_time', 'document_count', 'chunk_count')
+
+
+def normalize_request(search_data: Dict[str, Any]) -> Dict[str, Any]:
+    """规范化检索请求：问题折叠空白，ID列表去重排序，其余参数原样保留"""
+    return {
+        'question': ' '.join(str(search_data.get('question', '')).split()),
+        'dataset_ids': sorted(set(search_data.get('dataset_ids') or [])),
+        'document_ids': sorted(set(search_data.get('document_ids') or [])),
+        'top_k': search_data.get('top_k'),
+        'similarity_threshold': search_data.get('similarity_threshold'),
+        'vector_similarity_weight': search_data.get('vector_similarity_weight'),
+        'highlight': bool(search_data.get('highlight')),
+    }
+
+
+class RetrievalCache:
+    """检索结果缓存：进程内LRU + 可选的磁盘缓存（带TTL）
+
+    键是规范化请求、服务地址和认证头的哈希。每个条目同时保存写入时各数据集的
+    指纹（update_time、文档数、块数），读取时指纹不一致即视为失效，因此数据集
+    内容变化后不会返回旧结果。数据集指纹通过 ``/api/v1/datasets?id=`` 获取，
+    该请求绕过HTTP缓存、在进程内复用10秒；无法获取指纹时不读也不写缓存。
+    """
+
+    def __init__(self, client, max_entries: int = 1024, disk: Optional[HTTPCache] = None, ttl: float = 600):
+        self.client = client
+        self.max_entries = max(1, int(max_entries))
+        self.disk = disk
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, client, config: Optional[Dict[str, Any]] = None,
+                    enabled: Optional[bool] = None) -> Optional['RetrievalCache']:
+        """从 retrieval_cache 配置构建；enabled 不为None时覆盖配置，缓存被禁用时返回None"""
+        merged = dict(DEFAULT_RETRIEVAL_CACHE_CONFIG)
+        merged.update(config or {})
+        if enabled is not None:
+            merged['enabled'] = enabled
+        if not merged.get('enabled') or cache_disabled():
+            return None
+        disk = HTTPCache(merged['dir'], merged['max_size_mb']) if merged.get('disk') else None
+        return cls(client, merged['max_entries'], disk, merged['ttl'])
+
+    def key(self, search_data: Dict[str, Any]) -> str:
+        request = [self.client.base_url, self.client.session.headers.get('Authorization', ''),
+                   normalize_request(search_data)]
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _dataset_fingerprint(self, dataset_id: str) -> Optional[list]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._fingerprints.get(dataset_id)
+        if cached and cached[0] > now:
+            return cached[1]
+        api_token = self.client.config.get('api', {}).get('api_token')
+        headers = {'Authorization': f"Bearer {api_token}"} if api_token else None
+        try:
+            response = self.client.get('/api/v1/datasets', params={'id': dataset_id}, headers=headers,
+                                       use_cache=False)
+        except Exception:
+            return None
+        datasets = response.get('data') if isinstance(response, dict) else None
+        dataset = next((d for d in datasets or [] if isinstance(d, dict) and d.get('id') == dataset_id), None)
+        if dataset is None:
+            return None
+        fingerprint = [dataset.get(field) for field in _FINGERPRINT_FIELDS]
+        with self._lock:
+            self._fingerprints[dataset_id] = (now + _FINGERPRINT_TTL, fingerprint)
+        return fingerprint
+
+    def fingerprint(self, search_data: Dict[str, Any]) -> Optional[Dict[str, list]]:
+        """请求涉及的各数据集的当前指纹，任一数据集无法获取时返回None"""
+        fingerprints = {}
+        for dataset_id in sorted(set(search_data.get('dataset_ids') or [])):
+            fingerprint = self._dataset_fingerprint(dataset_id)
+            if fingerprint is None:
+                return None
+            fingerprints[dataset_id] = fingerprint
+        return fingerprints
+
+    def get(self, search_data: Dict[str, Any]) -> Tuple[Optional[Any], Optional[Dict[str, list]]]:
+        """查找缓存，返回 (响应或None, 当前指纹)；指纹在未命中时传给 put，避免重复查询"""
+        fingerprint = self.fingerprint(search_data)
+        if fingerprint is None:
+            return None, None
+        key = self.key(search_data)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry['expires_at'] > now and entry['fingerprint'] == fingerprint:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry['response'], fingerprint
+        if self.disk:
+            entry = self.disk.lookup(key)
+            data = entry.get('data') if entry and self.disk.is_fresh(entry) else None
+            if isinstance(data, dict) and data.get('fingerprint') == fingerprint:
+                self._remember(key, {'expires_at': entry['expires_at'], 'fingerprint': fingerprint,
+                                     'response': data['response']})
+                with self._lock:
+                    self.hits += 1
+                return data['response'], fingerprint
+        with self._lock:
+            self.misses += 1
+        return None, fingerprint
+
+    def put(self, search_data: Dict[str, Any], response: Any, fingerprint: Optional[Dict[str, list]]):
+        """写入成功的检索响应；fingerprint 为None（无法校验有效性）时不缓存"""
+        if fingerprint is None or not isinstance(response, dict) or response.get('code', 0) != 0:
+            return
+        key = self.key(search_data)
+        self._remember(key, {'expires_at': time.time() + self.ttl, 'fingerprint': fingerprint,
+                             'response': response})
+        if self.disk:
+            self.disk.store(key, {'fingerprint': fingerprint, 'response': response}, self.ttl)
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
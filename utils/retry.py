@@ -0,0 +1,197 @@
+import fnmatch
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+
+# 幂等的HTTP方法，失败后可以安全重试
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+DEFAULT_RETRY_CONFIG = {
+    'max_attempts': 3,
+    'backoff_base': 0.5,
+    'backoff_max': 30.0,
+    'statuses': [429, 502, 503, 504],
+    # 只读的POST端点，重试不会产生副作用
+    'idempotent_post': ['/api/v1/retrieval'],
+}
+
+DEFAULT_CIRCUIT_CONFIG = {
+    'failure_threshold': 5,
+    'reset_timeout': 30.0,
+    # 两次读取共享状态文件之间的最短间隔（秒），其间使用内存中的状态
+    'refresh_interval': 1.0,
+    'state_file': '~/.ragforge/circuit_breaker.json',
+}
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被快速拒绝"""
+
+
+class RetryPolicy:
+    """重试策略：指数退避 + 全抖动，支持Retry-After，区分幂等请求"""
+
+    def __init__(self, max_attempts: int = 3, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 statuses=(429, 502, 503, 504), idempotent_post=()):
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.statuses = set(statuses)
+        self.idempotent_post = list(idempotent_post)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'RetryPolicy':
+        """从 api.retry 配置构建"""
+        merged = dict(DEFAULT_RETRY_CONFIG)
+        merged.update(config or {})
+        return cls(**merged)
+
+    def is_idempotent(self, method: str, endpoint: str, idempotent: Optional[bool] = None) -> bool:
+        """判断请求是否可以安全重试"""
+        if idempotent is not None:
+            return idempotent
+        if method in IDEMPOTENT_METHODS:
+            return True
+        path = endpoint.split('?', 1)[0]
+        return method == 'POST' and any(fnmatch.fnmatch(path, p) for p in self.idempotent_post)
+
+    def should_retry_status(self, status_code: int, safe: bool) -> bool:
+        """判断状态码是否需要重试；429表示请求未被处理，任何方法都可以重试"""
+        if status_code not in self.statuses:
+            return False
+        return safe or status_code == 429
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """计算第attempt次失败后的等待时间"""
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.backoff_max)
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """解析Retry-After头（秒数或HTTP日期）"""
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            return parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+
+
+class CircuitBreaker:
+    """熔断器
+
+    连续失败达到阈值后打开，在reset_timeout内快速失败；超时后进入半开状态，
+    只放行一个试探请求，成功则关闭，失败则再次打开。试探请求放行时把打开
+    期限顺延reset_timeout并写回状态文件，其他线程和进程在试探结束前仍被
+    拒绝，试探请求没有结果（如进程退出）时期限到后再放行下一个。
+
+    状态按base_url保存在本地文件中，并行运行的多个CLI进程共享同一个熔断状态，
+    避免后端故障时形成重试风暴。状态在内存中缓存，至多每refresh_interval秒
+    读取一次文件；记录失败时总是重新读取，失败计数不会因缓存而丢失。
+    """
+
+    def __init__(self, key: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 state_file: Optional[str] = None, refresh_interval: float = 1.0):
+        self.key = key
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.state_file = os.path.expanduser(state_file) if state_file else None
+        self.refresh_interval = float(refresh_interval)
+        self.failures = 0
+        self.opened_until = 0.0
+        self.probing = False
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, key: str, config: Optional[Dict[str, Any]]) -> 'CircuitBreaker':
+        """从 api.circuit_breaker 配置构建"""
+        merged = dict(DEFAULT_CIRCUIT_CONFIG)
+        merged.update(config or {})
+        return cls(key, **merged)
+
+    def _read_all(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self, force: bool = False):
+        if not self.state_file:
+            return
+        now = time.monotonic()
+        if not force and self._loaded_at is not None and now - self._loaded_at < self.refresh_interval:
+            return
+        state = self._read_all().get(self.key, {})
+        self.failures = state.get('failures', 0)
+        self.opened_until = state.get('opened_until', 0.0)
+        self.probing = state.get('probing', False)
+        self._loaded_at = now
+
+    def _save(self):
+        if not self.state_file:
+            return
+        try:
+            states = self._read_all()
+            states[self.key] = {'failures': self.failures, 'opened_until': self.opened_until,
+                                'probing': self.probing}
+            directory = os.path.dirname(self.state_file) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.circuit-')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(states, f)
+            os.replace(tmp_path, self.state_file)
+        except OSError:
+            # 状态文件只是跨进程共享的优化，写入失败时退化为进程内熔断
+            pass
+
+    def before_request(self):
+        """请求前检查，熔断器打开（或半开状态下已有试探请求）时抛出CircuitOpenError"""
+        with self._lock:
+            self._load()
+            if self.opened_until and self.opened_until <= time.time():
+                # 放行试探请求前重新读取，其他进程可能已经放行了试探请求
+                self._load(force=True)
+            if not self.opened_until:
+                return
+            remaining = self.opened_until - time.time()
+            if remaining > 0:
+                if self.probing:
+                    raise CircuitOpenError("服务端连续失败，熔断器半开，正在等待试探请求的结果")
+                raise CircuitOpenError(f"服务端连续失败，熔断器已打开，{remaining:.0f}秒后重试")
+            # 半开：放行本次请求作为唯一的试探请求
+            self.opened_until = time.time() + self.reset_timeout
+            self.probing = True
+            self._save()
+
+    def record_success(self):
+        """记录一次成功，关闭熔断器"""
+        with self._lock:
+            if self.failures or self.opened_until:
+                self.failures = 0
+                self.opened_until = 0.0
+                self.probing = False
+                self._save()
+
+    def record_failure(self):
+        """记录一次失败，达到阈值时打开熔断器"""
+        with self._lock:
+            self._load(force=True)
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_until = time.time() + self.reset_timeout
+                self.probing = False
+            self._save()
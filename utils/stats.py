@@ -0,0 +1,72 @@
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """最近秩法百分位数，sorted_values 需已升序排列，空列表返回None"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def latency_summary(values_ms: Iterable[float], percentiles=(50, 90, 99)) -> Dict[str, Optional[float]]:
+    """汇总一组延迟（毫秒）：count、各百分位数、max 和 mean"""
+    values = sorted(values_ms)
+    summary = {'count': len(values)}
+    for q in percentiles:
+        value = percentile(values, q)
+        summary[f'p{q}_ms'] = round(value, 1) if value is not None else None
+    summary['max_ms'] = round(values[-1], 1) if values else None
+    summary['mean_ms'] = round(sum(values) / len(values), 1) if values else None
+    return summary
+
+
+def ranking_metrics(ranked: List[List[str]], relevant: List[Dict[str, float]],
+                    ks: Iterable[int] = (1, 5, 10)) -> Dict[str, Any]:
+    """计算检索排序指标：recall@k、precision@k、nDCG@k 和 MRR
+
+    ranked[i] 是第i个查询按返回顺序排列的ID，relevant[i] 是该查询的相关ID及
+    相关度（二元相关时均为1）。所有查询的命中情况先展开为一个
+    (查询数 × max(k)) 的相关度矩阵，各@k指标都是在该矩阵上的向量化运算；
+    MRR 不截断，按完整返回列表中第一个相关结果的排名计算。返回 {'per_query': {指标: ndarray}, 'mean': {指标: float}}；没有相关ID的
+    查询 recall/nDCG 为NaN，求平均时忽略。nDCG 使用线性增益。
+    """
+    import numpy as np
+
+    ks = sorted(set(int(k) for k in ks))
+    depth = ks[-1]
+    n = len(ranked)
+    gains = np.zeros((n, depth))
+    ideal = np.zeros((n, depth))
+    n_relevant = np.zeros(n)
+    reciprocal_rank = np.zeros(n)
+    for i, (ids, grades) in enumerate(zip(ranked, relevant)):
+        first = next((rank for rank, item in enumerate(ids) if grades.get(item, 0.0) > 0), None)
+        reciprocal_rank[i] = 1.0 / (first + 1) if first is not None else 0.0
+        row = [grades.get(item, 0.0) for item in ids[:depth]]
+        gains[i, :len(row)] = row
+        best = sorted(grades.values(), reverse=True)[:depth]
+        ideal[i, :len(best)] = best
+        n_relevant[i] = sum(1 for grade in grades.values() if grade > 0)
+
+    hits = gains > 0
+    discounts = 1.0 / np.log2(np.arange(2, depth + 2))
+    cumulative_hits = np.cumsum(hits, axis=1)
+    dcg = np.cumsum(gains * discounts, axis=1)
+    idcg = np.cumsum(ideal * discounts, axis=1)
+    has_relevant = n_relevant > 0
+
+    per_query = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k in ks:
+            per_query[f'recall@{k}'] = np.where(has_relevant, cumulative_hits[:, k - 1] / n_relevant, np.nan)
+            per_query[f'precision@{k}'] = cumulative_hits[:, k - 1] / k
+            per_query[f'ndcg@{k}'] = np.where(idcg[:, k - 1] > 0, dcg[:, k - 1] / idcg[:, k - 1], np.nan)
+    per_query['mrr'] = reciprocal_rank
+
+    mean = {}
+    for name, values in per_query.items():
+        valid = values[~np.isnan(values)]
+        mean[name] = round(float(valid.mean()), 4) if valid.size else None
+    return {'per_query': per_query, 'mean': mean}